@@ -0,0 +1,449 @@
+"""
+Benchmarks for the FT Tool Box data layer.
+
+These only use the modules that don't need Maya, so they can run from a plain Python
+interpreter. Run from the directory that contains the ft_tool_box package:
+
+    python -m ft_tool_box.benchmark
+
+The theme and window drag benchmarks also need PySide, they run with the offscreen Qt
+platform unless QT_QPA_PLATFORM is set, e.g. to xcb.
+"""
+import os
+import copy
+import json
+import hashlib
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+import multiprocessing
+
+from . import payload_codec as PC
+from . import library_sync as LS
+from . import records as RC
+from . import library_io as LIO
+
+LIBRARY_SIZES = (100, 1000, 10000)
+BUTTONS_PER_TAB = 50
+
+SCRIPT_SNIPPETS = [
+    'import maya.cmds as cmds\nfor node in cmds.ls(selection=True):\n    cmds.setAttr(node + ".visibility", 0)\n',
+    '@TF.tool_tip("Key all selected controls")\nimport maya.cmds as cmds\ncmds.setKeyframe(cmds.ls(selection=True))\n',
+    'string $sel[] = `ls -sl`;\nfor ($s in $sel) { setAttr ($s + ".rotateX") 0; }\n',
+    '@TF.reset_all()\n',
+]
+COLORS = ["#5285A6", "#84bf4d", "#9B0028", "#E3AC79", "#399DCD"]
+
+
+def make_library(button_count, seed=0):
+    """Build a synthetic tool box library with the given number of function buttons"""
+    rng = random.Random(seed)
+    tabs = []
+    button_id = 0
+    tab_id = 3
+    while button_id < button_count:
+        tab = {
+            "id": tab_id,
+            "text": str(tab_id + 1),
+            "tooltip": "Custom Tab",
+            "checked_color": "#84bf4d",
+            "unchecked_color": "#798b61",
+            "hover_color": "#84bf4d",
+            "widget_name": f"custom_widget_{tab_id}",
+            "border_radius": 2,
+            "buttons": []
+        }
+        for _ in range(min(BUTTONS_PER_TAB, button_count - button_id)):
+            script = rng.choice(SCRIPT_SNIPPETS) + f"# button {button_id}\n"
+            tab["buttons"].append({
+                "id": button_id,
+                "tab_id": tab_id,
+                "text": f"Button {button_id}",
+                "script": script,
+                "script_type": "python",
+                "python_code": script,
+                "mel_code": "",
+                "color": rng.choice(COLORS)
+            })
+            button_id += 1
+        tabs.append(tab)
+        tab_id += 1
+    return {"tabs": tabs, "next_function_id": button_id}
+
+
+def _time(func, repeat):
+    """Return the best wall time of func over repeat runs, in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000.0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_payload_encoding(sizes=LIBRARY_SIZES, repeat=5):
+    """Compare the stored size and save/load time of plain JSON against the compressed envelope"""
+    print("Payload encoding (best of {} runs)".format(repeat))
+    print(f"{'buttons':>8} {'format':>10} {'size KB':>10} {'save ms':>10} {'load ms':>10}")
+    results = []
+    for size in sizes:
+        library = make_library(size)
+        for label, compress in (("json", False), ("envelope", True)):
+            stored = PC.encode(library, compress=compress)
+            save_ms = _time(lambda: PC.encode(library, compress=compress), repeat)
+            load_ms = _time(lambda: PC.decode(stored), repeat)
+            assert PC.decode(stored) == library
+            print(f"{size:>8} {label:>10} {len(stored) / 1024.0:>10.1f} {save_ms:>10.2f} {load_ms:>10.2f}")
+            results.append({"buttons": size, "format": label, "bytes": len(stored),
+                            "save_ms": save_ms, "load_ms": load_ms})
+    return results
+
+
+def _stored_tabs(button_count):
+    """Build the tabs of a library the way the database keeps them, with scripts referenced by hash"""
+    tabs = make_library(button_count)["tabs"]
+    for tab in tabs:
+        for button in tab["buttons"]:
+            script = button.pop("script")
+            button["tooltip"] = ""
+            button["script_hash"] = hashlib.sha1(script.encode('utf-8')).hexdigest()
+            button["python_code_hash"] = hashlib.sha1(button.pop("python_code").encode('utf-8')).hexdigest()
+            button["mel_code_hash"] = button.pop("mel_code")
+    return tabs
+
+
+def _traced_size(build):
+    """Return what build() returned and the memory still allocated for it, in bytes"""
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        value = build()
+        return value, tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+
+
+def bench_records(button_count=10000, repeat=5):
+    """Compare the memory use and speed of plain dicts against the __slots__ record types"""
+    stored = json.dumps(_stored_tabs(button_count))
+    dict_tabs, dict_bytes = _traced_size(lambda: json.loads(stored))
+    record_tabs, record_bytes = _traced_size(lambda: [RC.TabRecord.from_json(tab) for tab in json.loads(stored)])
+    assert [tab.to_json() for tab in record_tabs] == dict_tabs
+
+    def read_fields(tabs):
+        for tab in tabs:
+            for button in tab["buttons"]:
+                button["text"], button.get("color"), "tooltip" in button
+
+    # Hot readers read the fields of records as attributes
+    def read_attributes(tabs):
+        for tab in tabs:
+            for button in tab.buttons:
+                button.text, button.color, button.tooltip is not RC.MISSING
+
+    rows = (
+        ("load", lambda: json.loads(stored),
+                 lambda: [RC.TabRecord.from_json(tab) for tab in json.loads(stored)]),
+        ("save", lambda: json.dumps(dict_tabs),
+                 lambda: json.dumps([tab.to_json() for tab in record_tabs])),
+        ("read", lambda: read_fields(dict_tabs), lambda: read_attributes(record_tabs)),
+        ("read []", lambda: read_fields(dict_tabs), lambda: read_fields(record_tabs)),
+        ("copy", lambda: [dict(button) for tab in dict_tabs for button in tab["buttons"]],
+                 lambda: [button.copy() for tab in record_tabs for button in tab["buttons"]]),
+        ("deepcopy", lambda: copy.deepcopy(dict_tabs), lambda: copy.deepcopy(record_tabs)),
+        # Position of the last button of every tab, as the undo journal looks it up
+        ("index", lambda: [tab["buttons"].index(tab["buttons"][-1]) for tab in dict_tabs if tab["buttons"]],
+                  lambda: [tab["buttons"].index(tab["buttons"][-1]) for tab in record_tabs if tab["buttons"]]),
+    )
+    print(f"Records, {button_count} buttons (best of {repeat} runs)")
+    print(f"{'':>10} {'dict':>10} {'record':>10}")
+    print(f"{'memory KB':>10} {dict_bytes / 1024.0:>10.1f} {record_bytes / 1024.0:>10.1f}")
+    results = {"dict_bytes": dict_bytes, "record_bytes": record_bytes}
+    for label, dict_func, record_func in rows:
+        dict_ms = _time(dict_func, repeat)
+        record_ms = _time(record_func, repeat)
+        print(f"{label + ' ms':>10} {dict_ms:>10.2f} {record_ms:>10.2f}")
+        results[label] = (dict_ms, record_ms)
+    return results
+
+
+def _traced_peak(func):
+    """Return the peak memory allocated while func runs, in bytes"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_library_import(sizes=LIBRARY_SIZES):
+    """Compare the peak memory of reading a library file whole against reading it one tab at a time"""
+    directory = tempfile.mkdtemp(prefix='ftToolBoxImport')
+    try:
+        print("Library import")
+        print(f"{'buttons':>8} {'file KB':>10} {'whole KB':>10} {'stream KB':>10} {'stream ms':>10}")
+        results = []
+        for size in sizes:
+            path = os.path.join(directory, f"library_{size}.json")
+            LIO.export_library(path, make_library(size)["tabs"])
+
+            def read_whole():
+                with open(path, 'rb') as f:
+                    for tab in LS.parse_library(f.read().decode('utf-8')):
+                        pass
+
+            def read_streaming():
+                with LIO.LibraryReader(path) as reader:
+                    for tab in reader.iter_tabs():
+                        pass
+
+            whole_bytes = _traced_peak(read_whole)
+            stream_bytes = _traced_peak(read_streaming)
+            stream_ms = _time(read_streaming, 3)
+            print(f"{size:>8} {os.path.getsize(path) / 1024.0:>10.1f} {whole_bytes / 1024.0:>10.1f} "
+                  f"{stream_bytes / 1024.0:>10.1f} {stream_ms:>10.2f}")
+            results.append({"buttons": size, "whole_bytes": whole_bytes, "stream_bytes": stream_bytes,
+                            "stream_ms": stream_ms})
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _shared_library_worker(path, worker, rounds):
+    """One simulated Maya session: edit its own buttons, add buttons to a shared tab and save"""
+    library = LS.SharedLibrary(path)
+    tabs = library.load()
+    save_ms = []
+    for round_index in range(rounds):
+        # Rename a button owned by this worker
+        buttons = [button for tab in tabs for button in tab["buttons"]]
+        owned = [button for button in buttons if button["id"] % 1000 == worker]
+        if owned:
+            owned[round_index % len(owned)]["text"] = f"worker {worker} round {round_index}"
+        # Every worker adds buttons to the same tab, so the tab record conflicts on every save
+        new_id = 1000000 + worker * 10000 + round_index
+        tabs[0]["buttons"].append({"id": new_id, "tab_id": tabs[0]["id"], "text": f"new {new_id}",
+                                   "script": f"print({new_id})\n", "script_type": "python",
+                                   "color": "#5285A6"})
+        start = time.perf_counter()
+        tabs, _ = library.save(tabs)
+        save_ms.append((time.perf_counter() - start) * 1000.0)
+    return {"worker": worker, "save_ms": save_ms, "lines_read": library.lines_read,
+            "lines_written": library.lines_written, "compactions": library.compactions}
+
+
+def bench_shared_library(button_count=1000, workers=4, rounds=25):
+    """Save to one shared library from several processes at once and check nothing was lost"""
+    print(f"Shared library: {workers} processes x {rounds} saves, {button_count} buttons")
+    directory = tempfile.mkdtemp(prefix="ftToolBoxBench")
+    path = os.path.join(directory, "shared_library.json")
+    try:
+        LS.SharedLibrary(path).save(make_library(button_count)["tabs"])
+        snapshot_bytes = os.path.getsize(path)
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers) as pool:
+            results = pool.starmap(_shared_library_worker,
+                                   [(path, worker, rounds) for worker in range(workers)])
+
+        # Every session's last rename and every added button must be in the file
+        tabs = LS.SharedLibrary(path).load()
+        buttons = {button["id"]: button for tab in tabs for button in tab["buttons"]}
+        shared_tab_ids = [button["id"] for button in tabs[0]["buttons"]]
+        missing = [1000000 + worker * 10000 + round_index for worker in range(workers)
+                   for round_index in range(rounds)
+                   if 1000000 + worker * 10000 + round_index not in shared_tab_ids]
+        renamed = sum(1 for worker in range(workers)
+                      if any(button["text"] == f"worker {worker} round {rounds - 1}" for button in buttons.values()))
+
+        save_ms = sorted(ms for result in results for ms in result["save_ms"])
+        saves = len(save_ms)
+        print(f"{'saves':>8} {'median ms':>10} {'max ms':>10} {'read/save':>10} {'write/save':>10} {'compact':>8}")
+        print(f"{saves:>8} {save_ms[saves // 2]:>10.2f} {save_ms[-1]:>10.2f} "
+              f"{sum(r['lines_read'] for r in results) / float(saves):>10.1f} "
+              f"{sum(r['lines_written'] for r in results) / float(saves):>10.1f} "
+              f"{sum(r['compactions'] for r in results):>8}")
+        print(f"snapshot {snapshot_bytes / 1024.0:.1f} KB, after saves {os.path.getsize(path) / 1024.0:.1f} KB, "
+              f"missing buttons {len(missing)}, sessions with their last rename {renamed}/{workers}")
+        return {"saves": saves, "save_ms": save_ms, "missing": missing, "renamed": renamed}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _theme_window(QtWidgets, pages, buttons_per_page, style):
+    """Build a window like the tool box: a stack of scroll area pages full of colored buttons
+
+    Args:
+        style (callable): style(widget, rules, widget_class) styles one widget
+    """
+    from . import theme as TH
+    window = QtWidgets.QWidget()
+    layout = QtWidgets.QVBoxLayout(window)
+    stack = QtWidgets.QStackedWidget()
+    layout.addWidget(stack)
+    for page_index in range(pages):
+        scroll_area = QtWidgets.QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        style(scroll_area, TH.SCROLL_AREA_RULES, "QWidget")
+        content = QtWidgets.QWidget()
+        style(content, TH.PAGE_CONTENT_RULES, "QWidget")
+        grid = QtWidgets.QGridLayout(content)
+        for index in range(buttons_per_page):
+            button = QtWidgets.QPushButton(f"Button {index}")
+            style(button, TH.button_rules(COLORS[(page_index + index) % len(COLORS)]), "QPushButton")
+            grid.addWidget(button, index // 4, index % 4)
+        scroll_area.setWidget(content)
+        stack.addWidget(scroll_area)
+    return window, stack
+
+
+def bench_theme(pages=6, buttons_per_page=100, repeat=3):
+    """Compare a style sheet per widget against style variants compiled into one window style sheet"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide6 import QtWidgets
+    except ImportError:
+        from PySide2 import QtWidgets
+    from . import theme as TH
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    def own_style_sheet(widget, rules, widget_class):
+        widget.setStyleSheet(rules.replace(TH.SELF, widget_class))
+
+    def theme_variant(widget, rules, widget_class):
+        TH.apply_style(widget, rules, widget_class)
+
+    print(f"Theme: {pages} pages x {buttons_per_page} buttons (best of {repeat} runs)")
+    print(f"{'style':>12} {'build ms':>10} {'switch ms':>10}")
+    results = []
+    for label, style in (("per widget", own_style_sheet), ("theme", theme_variant)):
+        def build():
+            window, stack = _theme_window(QtWidgets, pages, buttons_per_page, style)
+            if style is theme_variant:
+                TH.THEME.attach(window)
+            window.resize(400, 300)
+            window.show()
+            app.processEvents()
+            return window, stack
+
+        def build_and_close():
+            window, _ = build()
+            window.close()
+            window.deleteLater()
+            app.processEvents()
+
+        build_ms = _time(build_and_close, repeat)
+
+        window, stack = build()
+
+        def switch_pages():
+            for index in range(pages):
+                stack.setCurrentIndex(index)
+                window.repaint()
+                app.processEvents()
+
+        switch_ms = _time(switch_pages, repeat)
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+        print(f"{label:>12} {build_ms:>10.2f} {switch_ms:>10.2f}")
+        results.append({"style": label, "build_ms": build_ms, "switch_ms": switch_ms})
+    return results
+
+
+def bench_window_drag(moves=300, buttons=200, move_interval=0.002, repeat=3):
+    """Compare the CPU time of dragging a frameless window, moving or resizing it on every mouse move,
+    against the throttled fallback, and check if the platform moves windows itself"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide6 import QtWidgets, QtCore, QtGui
+    except ImportError:
+        from PySide2 import QtWidgets, QtCore, QtGui
+    from . import window_drag as WD
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    # A window full of buttons, so a resize lays them out again
+    window = QtWidgets.QWidget()
+    window.setWindowFlags(QtCore.Qt.Window | QtCore.Qt.FramelessWindowHint)
+    grid = QtWidgets.QGridLayout(window)
+    for index in range(buttons):
+        grid.addWidget(QtWidgets.QPushButton(f"Button {index}"), index // 20, index % 20)
+    window.setGeometry(100, 100, 300, 200)
+    window.show()
+    app.processEvents()
+    throttle = WD.GeometryThrottle(window)
+    start_geometry = window.geometry()
+
+    def drag(apply_geometry, resize):
+        # One mouse move every move_interval seconds, like a mouse polled at 500 Hz
+        window.setGeometry(start_geometry)
+        app.processEvents()
+        start = time.process_time()
+        for index in range(moves):
+            geometry = QtCore.QRect(start_geometry)
+            if resize:
+                geometry.setWidth(start_geometry.width() + index)
+            else:
+                geometry.moveTopLeft(start_geometry.topLeft() + QtCore.QPoint(index, index // 2))
+            apply_geometry(geometry)
+            app.processEvents()
+            time.sleep(move_interval)
+        throttle.flush()
+        return (time.process_time() - start) * 1000.0
+
+    supported = WD.start_system_move(window)
+    print(f"Window drag: {moves} mouse moves on {QtGui.QGuiApplication.platformName()}, {buttons} buttons, "
+          f"system move {'supported' if supported else 'not supported'} (best of {repeat} runs)")
+    print(f"{'drag':>8} {'geometry':>12} {'cpu ms':>10} {'applied':>8}")
+
+    applied = [0]
+    def every_move(geometry):
+        window.setGeometry(geometry)
+        applied[0] += 1
+
+    def throttled(geometry):
+        throttle.set_geometry(geometry)
+
+    results = []
+    for drag_label, resize in (("move", False), ("resize", True)):
+        for label, apply_geometry in (("none", lambda geometry: None), ("every move", every_move),
+                                      ("throttled", throttled)):
+            best = None
+            for _ in range(repeat):
+                applied[0] = throttle.applied = 0
+                cpu_ms = drag(apply_geometry, resize)
+                count = applied[0] + throttle.applied
+                if best is None or cpu_ms < best[0]:
+                    best = (cpu_ms, count)
+            print(f"{drag_label:>8} {label:>12} {best[0]:>10.2f} {best[1]:>8}")
+            results.append({"drag": drag_label, "geometry": label, "cpu_ms": best[0], "applied": best[1]})
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return {"system_move": supported, "results": results}
+
+
+BENCHMARKS = {
+    "payload": bench_payload_encoding,
+    "records": bench_records,
+    "import": bench_library_import,
+    "shared_library": bench_shared_library,
+    "theme": bench_theme,
+    "window_drag": bench_window_drag,
+}
+
+
+def main(names=None):
+    """Run the named benchmarks, or all of them"""
+    for name in names or BENCHMARKS:
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    import sys
+    main(sys.argv[1:])
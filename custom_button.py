@@ -15,6 +15,18 @@ import maya.mel as mel
 
 from . import utils as UT
 from . import custom_line_edit as CLE
+from . import script_store as SS
+from . import theme as TH
+
+# Colors offered by the color menu of function buttons
+FUNCTION_BUTTON_COLORS = [
+    "#000000", "#3F3F3F", "#999999", "#9B0028", "#00045F",
+    "#0000FF", "#004618", "#250043", "#C700C7", "#894733",
+    "#3E221F", "#992500", "#FF0000", "#00FF00", "#004199",
+    "#FFFFFF", "#FFFF00", "#63DCFF", "#43FFA2", "#FFAFAF",
+    "#E3AC79", "#FFFF62", "#009953", "#D9916C", "#DFC74D",
+    "#A1CE46", "#3AC093", "#40D1B8", "#399DCD", "#9B6BCD"
+]
 
 class TwoColumnMenu(QtWidgets.QMenu):
     def __init__(self, parent=None):
@@ -333,8 +345,9 @@ class CustomButton(QtWidgets.QPushButton):
         self.menu_actions = []  # Store menu actions
         self.cmHeight = cmHeight
         self.rename_line_edit = None  # Initialize rename_line_edit attribute
+        self.icon_text = bool(icon and text and width is None)  # Icon and text buttons align their text right
         self.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
-        self.setStyleSheet(self.get_style_sheet(color, flat, radius))
+        self.apply_style()
         
         icon_size = size if size else 24
         
@@ -349,7 +362,6 @@ class CustomButton(QtWidgets.QPushButton):
             if width is None:
                 if icon:
                     self.setMinimumWidth(self.calculate_button_width(text, padding=30))
-                    self.setStyleSheet(self.styleSheet() + " QPushButton { text-align: right; padding-right: 10px; }")
                 else:
                     self.setMinimumWidth(self.calculate_button_width(text))
         elif icon and (width is None or height is None):
@@ -385,42 +397,18 @@ class CustomButton(QtWidgets.QPushButton):
         #--------------------------------------------------------------------------------------------------------
     
     def get_style_sheet(self, color, flat, radius):
-        if flat:
-            return f'''
-                QPushButton {{
-                    background-color: transparent;
-                    color: {self.textColor};
-                    border: none;
-                    padding: 1px;
-                    border-radius: {radius}px;
-                    font-size: {self.textSize}px;
-                }}
-                QPushButton:hover {{
-                    color: {UT.rgba_value(self.textColor, 1.2)};
-                }}
-            '''
-        else:
-            return f'''
-                QPushButton {{
-                    background-color: {UT.rgba_value(color, 1.0)}; 
-                    color: {self.textColor};
-                    border: none;
-                    padding: 1px;
-                    border-radius: {radius}px;
-                    font-size: {self.textSize}px;
-                }}
-                QPushButton:hover {{
-                    background-color: {UT.rgba_value(color, 1.2)};
-                }}
-                QPushButton:pressed {{
-                    background-color: {UT.rgba_value(color, 0.8)};
-                }}
-                QToolTip {{
-                    background-color: {color};
-                    color: white;
-                    border: 0px;
-                }}
-            '''
+        """Get the button's rules as a style sheet of its own"""
+        rules = TH.button_rules(color, self.textColor, self.textSize, radius, flat, self.icon_text)
+        return rules.replace(TH.SELF, "QPushButton")
+    
+    def apply_style(self):
+        """Style the button through the window's theme, see theme.apply_style"""
+        TH.apply_style(self, TH.button_rules(self.base_color, self.textColor, self.textSize,
+                                             self.radius, self.isFlat(), self.icon_text))
+    
+    def showEvent(self, event):
+        TH.ensure_styled(self)
+        super(CustomButton, self).showEvent(event)
         
     def calculate_button_width(self, text, padding=20):
         font_metrics = QtGui.QFontMetrics(QtWidgets.QApplication.font())
@@ -572,23 +560,23 @@ class CustomButton(QtWidgets.QPushButton):
             painter.drawPath(path)
         
     def reset_button_state(self):
-        self.setStyleSheet(self.get_style_sheet(self.base_color, self.isFlat(), self.radius))
+        self.apply_style()
         self.update()
 
     def update_color(self, color):
         self.base_color = color
-        self.setStyleSheet(self.get_style_sheet(color, self.isFlat(), self.radius))
+        self.apply_style()
         
     def update_text_color(self, color):
         """Update the text color of the button"""
         self.textColor = color
-        self.setStyleSheet(self.get_style_sheet(self.base_color, self.isFlat(), self.radius))
+        self.apply_style()
         self.update()
         
     def update_text_size(self, size):
         """Update the font size of the button text"""
         self.textSize = size
-        self.setStyleSheet(self.get_style_sheet(self.base_color, self.isFlat(), self.radius))
+        self.apply_style()
         self.update()
 
 class CustomRadioButton(QtWidgets.QRadioButton):
@@ -607,7 +595,7 @@ class CustomRadioButton(QtWidgets.QRadioButton):
             self.auto_exclusive = False
             self.setAutoExclusive(False)  # This is key - it prevents auto-grouping
         
-        self.setStyleSheet(self._get_style())
+        TH.apply_style(self, self._get_rules(), "QRadioButton")
         
         if width is not None or height is not None:
             self.setFixedSize(width or self.sizeHint().width(), height or self.sizeHint().height())
@@ -619,66 +607,18 @@ class CustomRadioButton(QtWidgets.QRadioButton):
         else:
             super().mousePressEvent(event)
 
+    def _get_rules(self):
+        return TH.radio_button_rules(self.color, self.fill, self.border_radius, self.custom_width, self.custom_height)
+
     def _get_style(self):
-        base_style = f"""
-            QRadioButton {{
-                background-color: {'transparent' if not self.fill else '#555555'};
-                color: white;
-                padding: 5px;
-                border-radius: {self.border_radius}px;
-            }}
-        """
-        
-        if self.custom_width is not None:
-            base_style += f"QRadioButton {{ min-width: {self.custom_width}px; max-width: {self.custom_width}px; }}"
-        
-        if self.custom_height is not None:
-            base_style += f"QRadioButton {{ min-height: {self.custom_height}px; max-height: {self.custom_height}px; }}"
+        return self._get_rules().replace(TH.SELF, "QRadioButton")
 
-        if self.fill:
-            return base_style + f"""
-                QRadioButton::indicator {{
-                    width: 0px;
-                    height: 0px;
-                }}
-                QRadioButton:checked {{
-                    background-color: {self.color};
-                }}
-                QRadioButton:hover {{
-                    background-color: #6a6a6a;
-                }}
-                QRadioButton:checked:hover {{
-                    background-color: {self._lighten_color(self.color, 1.2)};
-                }}
-            """
-        else:
-            return base_style + f"""
-                QRadioButton::indicator {{
-                    width: 13px;
-                    height: 13px;
-                }}
-                QRadioButton::indicator:unchecked {{
-                    background-color: #555555;
-                    border: 0px solid #555555;
-                    border-radius: {self.border_radius}px;
-                }}
-                QRadioButton::indicator:checked {{
-                    background-color: {self.color};
-                    border: 0px solid {self.color};
-                    border-radius: 3px;
-                }}
-                QRadioButton::indicator:hover {{
-                    background-color: #6a6a6a;
-                }}
-                QRadioButton::indicator:checked:hover {{
-                    background-color: {self._lighten_color(self.color, 1.2)};
-                }}
-            """
+    def showEvent(self, event):
+        TH.ensure_styled(self)
+        super(CustomRadioButton, self).showEvent(event)
 
     def _lighten_color(self, color, factor):
-        c = QtGui.QColor(color)
-        h, s, l, _ = c.getHslF()
-        return QtGui.QColor.fromHslF(h, s, min(1.0, l * factor), 1.0).name()
+        return TH.lighten_color(color, factor)
 
     def group(self, group_name):
         if self.group_enabled:
@@ -787,32 +727,7 @@ class CustomToggleButton(QtWidgets.QPushButton):
         self.toggled.connect(self.on_toggle)
         self.setText(text)
         
-        # Calculate font size based on button height (approximately 60% of height)
-        font_size = int(self.button_height * 0.6)  # Round down to ensure integer font size
-        
-        self.setStyleSheet(f'''
-            QPushButton {{
-                background-color: {self.unchecked_color};
-                border: none;
-                color: rgba(250, 250, 250, .6);
-                padding: 0px;
-                text-align: center;
-                border-radius: {border_radius};
-                font-size: {font_size}px;
-            }}
-            QPushButton:hover {{
-                background-color: {self.hover_color};
-            }}
-            QPushButton:checked {{
-                background-color: {self.checked_color};
-                color: white;
-            }}
-            QToolTip {{
-                background-color: {self.checked_color};
-                color: white;
-                border: 0px;
-            }}
-        ''')
+        self.apply_style()
         self.setToolTip(f"<html><body><p>{tooltip}</p></body></html>")
         
         # Add context menu for tab operations
@@ -860,31 +775,19 @@ class CustomToggleButton(QtWidgets.QPushButton):
         if unchecked_color is not None:
             self.unchecked_color = unchecked_color
             
-        # Update the stylesheet with the new colors
+        # Update the style with the new colors
+        self.apply_style()
+
+    def apply_style(self):
+        """Style the button through the window's theme, see theme.apply_style"""
+        # Font size is about 60% of the button height
         font_size = int(self.button_height * 0.6)
-        self.setStyleSheet(f'''
-            QPushButton {{
-                background-color: {self.unchecked_color};
-                border: none;
-                color: rgba(250, 250, 250, .6);
-                padding: 0px;
-                text-align: center;
-                border-radius: {self.border_radius};
-                font-size: {font_size}px;
-            }}
-            QPushButton:hover {{
-                background-color: {self.hover_color};
-            }}
-            QPushButton:checked {{
-                background-color: {self.checked_color};
-                color: white;
-            }}
-            QToolTip {{
-                background-color: {self.checked_color};
-                color: white;
-                border: 0px;
-            }}
-        ''')
+        TH.apply_style(self, TH.toggle_button_rules(self.checked_color, self.hover_color, self.unchecked_color,
+                                                    self.border_radius, font_size))
+
+    def showEvent(self, event):
+        TH.ensure_styled(self)
+        super(CustomToggleButton, self).showEvent(event)
 
     def _on_destroyed(self):
         """Clean up references when button is destroyed"""
@@ -1194,17 +1097,15 @@ class CustomFunctionButton(CustomButton):
     color_changed = QtCore.Signal(int, str)
     
     def __init__(self, text='Function', button_id=None, script='', color='#5285A6', parent=None, width=None, height=24, 
-                 script_type='python', cmColor="#444444",cmHeight=24):
+                 script_type='python', cmColor="#444444",cmHeight=24, tooltip=None, script_loader=None):
         # Ensure text is properly formatted
         display_text = text.strip() if text else 'Function'
         
-        # Check if the script contains a tooltip directive
-        tooltip_text = f'Function Button: {display_text}'
-        if script:
-            import re
-            tooltip_match = re.search(r'^\s*@TF\.tool_tip\s*\(\s*[\"\'](.*?)[\"\'](\s*)?\)', script, flags=re.MULTILINE)
-            if tooltip_match:
-                tooltip_text = tooltip_match.group(1)
+        # Use the tooltip stored with the button, or the tooltip directive of the script
+        if tooltip is None:
+            tooltip = SS.extract_tooltip(script)
+        self.script_tooltip = tooltip or ""
+        tooltip_text = self.script_tooltip or f'Function Button: {display_text}'
         
         super(CustomFunctionButton, self).__init__(
             text=display_text,
@@ -1219,7 +1120,8 @@ class CustomFunctionButton(CustomButton):
         )
         
         self.button_id = button_id  # Unique identifier for the button
-        self.script = script  # Script to run when button is clicked
+        self._script = script  # Script to run when button is clicked
+        self._script_loader = script_loader  # Reads the script when it isn't given, called on first use
         self.rename_line_edit = None  # Will hold the QLineEdit for inline renaming
         
         # Validate script_type
@@ -1235,6 +1137,49 @@ class CustomFunctionButton(CustomButton):
         # Setup context menu
         self.setup_context_menu()
     
+    @property
+    def script(self):
+        """The script to run, read through the script loader the first time it's needed"""
+        if not self._script and self._script_loader is not None:
+            self._script = self._script_loader() or ''
+            self._script_loader = None
+        return self._script
+    
+    @script.setter
+    def script(self, script):
+        self._script = script
+        self._script_loader = None
+    
+    def set_script_loader(self, script_loader):
+        """Drop the current script, it's read through script_loader the next time it's needed"""
+        self._script = ''
+        self._script_loader = script_loader
+    
+    def rebind(self, text='Function', button_id=None, color='#5285A6', tooltip=None, script_type='python', script_loader=None):
+        """Reuse the button for another function button, keeping its context menu, timers and signal connections
+
+        Only the parts that differ from the button's current state are updated, the style sheet
+        is only rebuilt when the color changes.
+        """
+        display_text = text.strip() if text else 'Function'
+        self.timer.stop()
+        self.click_count = 0
+        self.button_id = button_id
+        self.set_script_loader(script_loader)
+        self.script_type = script_type.lower() if script_type.lower() in ['python', 'mel'] else 'python'
+        if self.text() != display_text:
+            self.setText(display_text)
+            self.setMinimumWidth(self.calculate_button_width(display_text))
+        if self.base_color != color:
+            self.update_color(color)
+        self.set_script_tooltip(tooltip)
+
+    def set_script_tooltip(self, tooltip):
+        """Set the tooltip from the script's tooltip directive, or the default tooltip if it's empty"""
+        self.script_tooltip = tooltip or ""
+        tooltip_text = self.script_tooltip or f'Function Button: {self.text()}'
+        self.setToolTip(f"<html><body><p style='color:white; white-space:nowrap; '>{tooltip_text}</p></body></html>")
+    
     def setup_context_menu(self):
         # Add items to the context menu
         self.addMenuLabel('Function Button',position=(0,0),colSpan=2) 
@@ -1335,7 +1280,7 @@ class CustomFunctionButton(CustomButton):
             new_name = line_edit.text().strip()
             if new_name:
                 self.setText(new_name)
-                self.setToolTip(f'<html><body><p style=\'color:white; white-space:nowrap; \'>Function Button: {new_name}</p></body></html>')
+                self.set_script_tooltip(self.script_tooltip)
                 
                 # Update the button width to fit the new text
                 if self.width() is not None:
@@ -1364,9 +1309,8 @@ class CustomFunctionButton(CustomButton):
     def create_color_change_function(self, color):
         """Create a function that changes the button's color"""
         def change_to_color():
-            # Set the base color property and update stylesheet
-            self.base_color = color
-            self.setStyleSheet(self.get_style_sheet(color, False, self.radius))
+            # Set the base color property and update the style
+            self.update_color(color)
             
             # Emit signal to update the database
             if self.button_id is not None:
@@ -1404,16 +1348,7 @@ class CustomFunctionButton(CustomButton):
         color_layout.setSpacing(5)
         color_layout.setContentsMargins(3, 5, 3, 5)
         
-        color_palette = [
-            "#000000", "#3F3F3F", "#999999", "#9B0028", "#00045F",  
-            "#0000FF", "#004618", "#250043", "#C700C7", "#894733",  
-            "#3E221F", "#992500", "#FF0000", "#00FF00", "#004199",  
-            "#FFFFFF", "#FFFF00", "#63DCFF", "#43FFA2", "#FFAFAF",  
-            "#E3AC79", "#FFFF62", "#009953", "#D9916C", "#DFC74D",  
-            "#A1CE46", "#3AC093", "#40D1B8", "#399DCD", "#9B6BCD"  
-        ]
-
-        for i, color in enumerate(color_palette):
+        for i, color in enumerate(FUNCTION_BUTTON_COLORS):
             color_button = QtWidgets.QPushButton()
             color_button.setFixedSize(20, 20)
             color_button.setStyleSheet(f'''QPushButton {{background-color: {color}; border: none; border-radius: 3px;}} 
@@ -9,6 +9,8 @@ except ImportError:
     from PySide2.QtCore import QTimer, QPropertyAnimation, QEasingCurve
     from shiboken2 import wrapInstance
 
+from . import theme as TH
+
 class CustomDialog(QtWidgets.QDialog):
     def __init__(self, parent=None, title="", size=(250, 150), info_box=False):
         super(CustomDialog, self).__init__(parent)
@@ -212,4 +214,47 @@ class ColorPickerDialog(CustomDialog):
         if self.exec_() == QtWidgets.QDialog.Accepted:
             return self.color_button.color
         return None
-    
\ No newline at end of file
+    
+class ImportDialog(CustomDialog):
+    """Choose how to import a library: merge all tabs, replace the custom tabs or merge selected tabs"""
+    def __init__(self, parent=None, title="Import Ft ToolBox Data", tabs=(), size=(300, 320)):
+        super(ImportDialog, self).__init__(parent, title, size)
+        
+        self.merge_radio = QtWidgets.QRadioButton("Merge all tabs")
+        self.replace_radio = QtWidgets.QRadioButton("Replace custom tabs")
+        self.selected_radio = QtWidgets.QRadioButton("Merge selected tabs")
+        self.merge_radio.setChecked(True)
+        for radio in (self.merge_radio, self.replace_radio, self.selected_radio):
+            self.add_widget(radio)
+        
+        # One checkable item per tab in the library
+        self.tab_list = QtWidgets.QListWidget()
+        # The dialog isn't a themed window, so the list gets its variant's rules as its own style sheet
+        TH.apply_style(self.tab_list, TH.IMPORT_TAB_LIST_RULES, "QListWidget")
+        TH.ensure_styled(self.tab_list)
+        for tab in tabs:
+            item = QtWidgets.QListWidgetItem(f"{tab['text']}  ({tab['button_count']} buttons)")
+            item.setToolTip(tab.get("tooltip", ""))
+            item.setData(QtCore.Qt.UserRole, tab["id"])
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked)
+            self.tab_list.addItem(item)
+        self.tab_list.setEnabled(False)
+        self.selected_radio.toggled.connect(self.tab_list.setEnabled)
+        self.add_widget(self.tab_list)
+        
+        self.add_button_box()
+    
+    def get_options(self):
+        """Show the dialog
+        
+        Returns:
+            tuple or None: (replace, tab IDs to import or None for all tabs), None if canceled
+        """
+        if self.exec_() != QtWidgets.QDialog.Accepted:
+            return None
+        if self.selected_radio.isChecked():
+            tab_ids = [self.tab_list.item(row).data(QtCore.Qt.UserRole) for row in range(self.tab_list.count())
+                       if self.tab_list.item(row).checkState() == QtCore.Qt.Checked]
+            return False, tab_ids
+        return self.replace_radio.isChecked(), None
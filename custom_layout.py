@@ -33,6 +33,8 @@ class CustomGridLayout(QtWidgets.QGridLayout):
         self.rows = rows
         self.cols = cols
         self.widget_count = 0
+        # Cached cell positions of the widgets, per grid dimensions and widget count
+        self._arrangements = {}
         
         # Validate input
         if rows == 0 and cols == 0:
@@ -64,18 +66,7 @@ class CustomGridLayout(QtWidgets.QGridLayout):
             return
         
         # Auto-calculate position based on layout type
-        if self.rows > 0 and self.cols == 0:
-            # Vertical layout (fixed rows)
-            row = self.widget_count % self.rows
-            col = self.widget_count // self.rows
-        elif self.rows == 0 and self.cols > 0:
-            # Horizontal layout (fixed columns)
-            row = self.widget_count // self.cols
-            col = self.widget_count % self.cols
-        else:
-            # Grid layout with both dimensions specified
-            row = self.widget_count // self.cols
-            col = self.widget_count % self.cols
+        row, col = self._position(self.widget_count, self.rows, self.cols)
         
         # Add the widget at the calculated position
         super(CustomGridLayout, self).addWidget(widget, row, col, rowSpan, colSpan)
@@ -94,32 +85,62 @@ class CustomGridLayout(QtWidgets.QGridLayout):
                     self.removeWidget(widget)
         self.widget_count = 0
     
+    @staticmethod
+    def _position(index, rows, cols):
+        """
+        Get the cell of the widget at index for the given grid dimensions.
+        
+        Returns:
+            tuple: (row, col)
+        """
+        if rows > 0 and cols == 0:
+            # Vertical layout (fixed rows)
+            return index % rows, index // rows
+        # Horizontal layout (fixed columns), or grid layout with both dimensions specified
+        return index // cols, index % cols
+    
+    def arrangement(self, rows, cols, count):
+        """
+        Get the cells of count widgets for the given grid dimensions, computed once per dimensions.
+        
+        Returns:
+            list: (row, col) of each widget, in the order they were added
+        """
+        key = (rows, cols, count)
+        positions = self._arrangements.get(key)
+        if positions is None:
+            positions = [self._position(index, rows, cols) for index in range(count)]
+            self._arrangements[key] = positions
+        return positions
+    
     def grid(self, rows, cols):
         """
         Reconfigure the grid dimensions.
         
+        The widgets keep their parent, only the cells of their layout items change, so the
+        grid is laid out again in a single pass.
+        
         Args:
             rows (int): Number of rows in the grid. If 0, rows will be determined automatically.
             cols (int): Number of columns in the grid. If 0, columns will be determined automatically.
         """
-        self.rows = rows
-        self.cols = cols
-        
         # Validate input
         if rows == 0 and cols == 0:
             # Default to horizontal layout if both are 0
-            self.rows = 1
-            self.cols = 0
+            rows = 1
+            cols = 0
         
-        # Rearrange existing widgets
-        widgets = []
-        for i in range(self.count()):
-            item = self.itemAt(i)
-            if item and item.widget():
-                widgets.append(item.widget())
+        if (rows, cols) == (self.rows, self.cols):
+            return
+        self.rows = rows
+        self.cols = cols
         
-        self.clear()
+        # Take the layout items out in order, their widgets stay where they are
+        items = []
+        while self.count():
+            items.append(self.takeAt(0))
         
-        # Re-add widgets with new arrangement
-        for widget in widgets:
-            self.addWidget(widget)
+        # Put them back in the cells of the new arrangement
+        for item, (row, col) in zip(items, self.arrangement(rows, cols, len(items))):
+            super(CustomGridLayout, self).addItem(item, row, col)
+        self.widget_count = len(items)
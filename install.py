@@ -3,7 +3,7 @@ Drag and drop this file into Maya to install the FT Tool Box.
 
 This will:
 - Create a button in the active shelf with the FT Tool Box logo
-- The button will load/reload the FT Tool Box tool
+- The button will show the FT Tool Box tool, Shift+click reloads it from disk
 """
 
 import maya.cmds as cmds
@@ -24,17 +24,19 @@ def create_ft_tool_box_button():
     parent_dir_normalized = parent_dir.replace("\\", "/")
     command_str = r'''
 import sys
-import os
-sys.path.append("{0}")
-
-import ft_tool_box.__unload_pkg as unld
+import maya.cmds as cmds
+if "{0}" not in sys.path:
+    sys.path.append("{0}")
 
-try:
-    unld.unload(ft_tool_box)
-    import ft_tool_box.main
-except:
+# The tool box stays imported and its window is kept alive between clicks,
+# Shift+click imports it again from disk and builds a new window
+if "ft_tool_box.main" in sys.modules:
+    if cmds.getModifiers() & 1:
+        sys.modules["ft_tool_box.main"].hard_reload()
+    else:
+        sys.modules["ft_tool_box.main"].run()
+else:
     import ft_tool_box.main
-    unld.unload(ft_tool_box)
 '''.format(parent_dir_normalized)
     
     # Get the active shelf
@@ -0,0 +1,226 @@
+"""
+Streaming export and import of tool box libraries.
+
+Exports are written in the change log format of library_sync, one record per line, so an
+exported file can also be used as a shared library. Tabs are written one at a time as they
+are produced, and nothing but the tab being written is held in memory.
+
+LibraryReader reads any library file, a log written by export or by "Store Data" or a plain
+JSON file from older versions, in two passes. The first pass only records where the last line
+of every record starts, the second reads the records of one tab at a time. Memory use depends
+on the number of records, not on the size of their scripts. Plain JSON files can't be read
+incrementally and are parsed as a whole.
+
+This module doesn't use Maya, so it can be used from other processes and benchmarks.
+"""
+import os
+import re
+import json
+import uuid
+import tempfile
+
+from . import library_sync as LS
+
+# Start of the lines written by library_sync.format_line, read without parsing the record
+LINE_KEY_PATTERN = re.compile(rb'^\{"kind": "(tab|button)", "id": (-?\d+)')
+# Tab of a button record. Quotes inside scripts are escaped, so this only matches the field.
+TAB_ID_PATTERN = re.compile(rb'"tab_id": (-?\d+)')
+
+
+def export_library(path, tabs):
+    """Write tabs to a library file, one record per line
+
+    The file is written to a temporary file and renamed over the library while holding its
+    lock, so other sessions never read a partially written library.
+
+    Args:
+        path (str): The library file
+        tabs (iterable): Tabs with their buttons and inlined scripts, consumed one at a time,
+            e.g. from ToggleButtonDatabase.iter_export_tabs. Default tabs are skipped.
+
+    Returns:
+        int: Number of tabs written
+    """
+    directory = os.path.dirname(path) or '.'
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    tab_count = 0
+    with LS.FileLock(path):
+        fd, temp_path = tempfile.mkstemp(prefix='.ftToolBox', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(LS.format_header(uuid.uuid4().hex))
+                for tab in tabs:
+                    if tab["id"] <= 2:
+                        continue
+                    for (kind, record_id), record in LS.flatten_tab(tab):
+                        f.write(LS.format_line(kind, record_id, record))
+                    tab_count += 1
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    return tab_count
+
+
+class LibraryReader:
+    """Reads the tabs of a library file incrementally
+
+    Usage:
+        with LibraryReader(path) as reader:
+            for tab in reader.iter_tabs():
+                ...
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = LS.FileLock(path, shared=True)
+        self._file = None
+        self._offsets = {}         # ('tab', id) or ('button', id) -> offset of its last line
+        self._tab_ids = []         # Tab IDs in the order they first appear
+        self._button_tab_ids = {}  # button id -> tab id, from its last line
+        self._tabs = None          # Parsed tabs of a plain JSON file
+
+    def open(self):
+        """Lock the file and index its records
+
+        Raises:
+            ValueError: If the file is neither a library log nor a {"tabs": [...]} file
+        """
+        self._lock.acquire()
+        try:
+            self._file = open(self.path, 'rb')
+            self._index()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        """Close the file and release its lock"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._lock.release()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _index(self):
+        """Find the last line of every record without parsing the records"""
+        first_line = self._file.readline()
+        if LS.parse_header(first_line.decode('utf-8')) is None:
+            # Older JSON exports have to be parsed as a whole
+            self._file.seek(0)
+            data = json.loads(self._file.read().decode('utf-8') or 'null')
+            if not isinstance(data, dict) or not isinstance(data.get("tabs"), list):
+                raise ValueError("Invalid tool box library format")
+            self._tabs = [tab for tab in data["tabs"] if tab.get("id", 0) > 2]
+            return
+
+        offset = len(first_line)
+        seen_tab_ids = set()
+        for line in self._file:
+            line_offset, offset = offset, offset + len(line)
+            if not line.endswith(b'\n'):
+                # A last line that is still being written
+                break
+            if not line.strip():
+                continue
+            match = LINE_KEY_PATTERN.match(line)
+            if match:
+                key = (match.group(1).decode('ascii'), int(match.group(2)))
+                deleted = line.rstrip().endswith(b'"record": null}')
+            else:
+                entry = json.loads(line.decode('utf-8'))
+                key = (entry["kind"], entry["id"])
+                deleted = entry.get("record") is None
+
+            if deleted:
+                self._offsets.pop(key, None)
+                if key[0] == "button":
+                    self._button_tab_ids.pop(key[1], None)
+                continue
+            self._offsets[key] = line_offset
+            if key[0] == "tab":
+                if key[1] not in seen_tab_ids:
+                    seen_tab_ids.add(key[1])
+                    self._tab_ids.append(key[1])
+            else:
+                tab_id_match = TAB_ID_PATTERN.search(line)
+                self._button_tab_ids[key[1]] = int(tab_id_match.group(1)) if tab_id_match else None
+
+    def _read_record(self, key):
+        """Read the current record of a key from its indexed line"""
+        self._file.seek(self._offsets[key])
+        return json.loads(self._file.readline().decode('utf-8'))["record"]
+
+    def list_tabs(self):
+        """Get a summary of every tab in the library, to choose which tabs to import
+
+        Returns:
+            list: One dict per tab with its 'id', 'text', 'tooltip' and 'button_count'
+        """
+        summaries = []
+        if self._tabs is not None:
+            for tab in self._tabs:
+                summaries.append({"id": tab["id"], "text": tab.get("text", ""),
+                                  "tooltip": tab.get("tooltip", ""),
+                                  "button_count": len(tab.get("buttons", []))})
+            return summaries
+
+        button_counts = {}
+        for tab_id in self._button_tab_ids.values():
+            button_counts[tab_id] = button_counts.get(tab_id, 0) + 1
+        for tab_id in self._tab_ids:
+            if ("tab", tab_id) not in self._offsets:
+                continue
+            record = self._read_record(("tab", tab_id))
+            summaries.append({"id": tab_id, "text": record.get("text", ""),
+                              "tooltip": record.get("tooltip", ""),
+                              "button_count": button_counts.get(tab_id, 0)})
+        return summaries
+
+    def iter_tabs(self, tab_ids=None):
+        """Read the tabs of the library one at a time
+
+        Args:
+            tab_ids (iterable, optional): IDs of the tabs to read, all tabs if None
+
+        Yields:
+            dict: A tab with its buttons and inlined scripts, like the tabs of export_tabs
+        """
+        selected = None if tab_ids is None else set(tab_ids)
+        if self._tabs is not None:
+            for tab in self._tabs:
+                if selected is None or tab["id"] in selected:
+                    yield tab
+            return
+
+        # Buttons that point at a tab that doesn't list them, see library_sync.unflatten_records
+        unlisted = {}
+        for button_id, tab_id in self._button_tab_ids.items():
+            unlisted.setdefault(tab_id, []).append(button_id)
+
+        for tab_id in self._tab_ids:
+            if ("tab", tab_id) not in self._offsets or (selected is not None and tab_id not in selected):
+                continue
+            tab = self._read_record(("tab", tab_id))
+            listed_ids = [button_id for button_id in tab.get("buttons", [])
+                          if self._button_tab_ids.get(button_id) == tab_id]
+            listed = set(listed_ids)
+            button_ids = listed_ids + [button_id for button_id in unlisted.get(tab_id, [])
+                                       if button_id not in listed]
+            tab["id"] = tab_id
+            tab["buttons"] = []
+            for button_id in button_ids:
+                button = self._read_record(("button", button_id))
+                button["id"] = button_id
+                tab["buttons"].append(button)
+            yield tab
@@ -0,0 +1,540 @@
+"""
+Shared tool box library files that several Maya sessions can save to at the same time.
+
+A shared library is a JSON-lines change log. The first line is a header, every other line
+replaces or deletes one record:
+
+    {"ft_tool_box_library": 1, "generation": "<id of this compaction>"}
+    {"kind": "tab", "id": 3, "record": {"text": "4", ..., "buttons": [0, 1]}}
+    {"kind": "button", "id": 0, "record": {"tab_id": 3, "text": "Key", "script": "...", ...}}
+    {"kind": "button", "id": 1, "record": null}
+
+Tab records list the IDs of their buttons in order instead of the buttons themselves, so a
+change to one button is one line. A session remembers how far it has read the file, and a
+save only reads the lines appended by other sessions since then, merges them with its own
+changes (three-way, against the records it read last) and appends the records it changed.
+IDs are allocated by each session, so when two sessions add a tab or a button under the same
+ID, the saving session moves its record to a free ID instead of merging the two.
+The file is rewritten as a snapshot through a temporary file and a rename when the log gets
+much longer than the library.
+
+All reads and writes hold an advisory lock on '<library>.lock'. Plain JSON files written by
+older versions of "Store Data" ({"tabs": [...]}) are read as a snapshot and converted on the
+first save.
+
+This module doesn't use Maya, so it can be used from other processes and benchmarks.
+"""
+import os
+import json
+import time
+import uuid
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+HEADER_KEY = "ft_tool_box_library"
+LOG_VERSION = 1
+
+# Rewrite the log when it has this many lines more than twice the number of records
+COMPACT_SLACK = 64
+
+_MISSING = object()
+
+
+class FileLock:
+    """Advisory lock on a file, held with a 'with' block
+
+    The lock is taken on a separate '<path>.lock' file, so the locked file itself can be
+    replaced by a rename while the lock is held. Windows only has exclusive locks, there a
+    shared lock is exclusive too.
+
+    Usage:
+        with FileLock(path):
+            ...
+    """
+    def __init__(self, path, shared=False, timeout=10.0, poll_interval=0.02):
+        self.lock_path = f"{path}.lock"
+        self.shared = shared
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._file = None
+
+    def acquire(self):
+        """Wait for the lock
+
+        Raises:
+            TimeoutError: If the lock couldn't be taken within the timeout
+        """
+        directory = os.path.dirname(self.lock_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._file = open(self.lock_path, 'a+')
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(),
+                                (fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    self._file.close()
+                    self._file = None
+                    raise TimeoutError(f"Timed out waiting for the lock on {self.lock_path}")
+                time.sleep(self.poll_interval)
+
+    def release(self):
+        """Release the lock"""
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+def atomic_write(path, content):
+    """Replace a file with new content (bytes) through a temporary file and a rename"""
+    directory = os.path.dirname(path) or '.'
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    fd, temp_path = tempfile.mkstemp(prefix='.ftToolBox', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def flatten_tab(tab):
+    """Split a tab into its records, the tab's record first
+
+    Args:
+        tab (dict): Tab with its buttons and inlined scripts, e.g. from export_tabs
+
+    Yields:
+        tuple: (('tab', id) or ('button', id), record). The tab record lists its button IDs
+            in order instead of the buttons.
+    """
+    tab_record = {key: value for key, value in tab.items() if key != "buttons"}
+    tab_record["buttons"] = [button["id"] for button in tab.get("buttons", [])]
+    yield ("tab", tab["id"]), tab_record
+    for button in tab.get("buttons", []):
+        button_record = dict(button)
+        button_record["tab_id"] = tab["id"]
+        yield ("button", button["id"]), button_record
+
+
+def flatten_tabs(tabs):
+    """Split tabs into records keyed by ('tab', id) and ('button', id)
+
+    Args:
+        tabs (list): Tabs with their buttons and inlined scripts, e.g. from export_tabs
+
+    Returns:
+        dict: The records of the tabs (with their button IDs in order) and of the buttons
+    """
+    records = {}
+    for tab in tabs:
+        records.update(flatten_tab(tab))
+    return records
+
+
+def format_header(generation):
+    """Get the header line of a log with the given generation"""
+    return json.dumps({HEADER_KEY: LOG_VERSION, "generation": generation}) + '\n'
+
+
+def format_line(kind, record_id, record):
+    """Get the log line that replaces a record, or deletes it if record is None"""
+    return json.dumps({"kind": kind, "id": record_id, "record": record}) + '\n'
+
+
+def unflatten_records(records):
+    """Build tabs with their buttons from records made by flatten_tabs, sorted by tab ID"""
+    buttons_by_tab = {}
+    for (kind, record_id), record in records.items():
+        if kind == "button":
+            buttons_by_tab.setdefault(record.get("tab_id"), {})[record_id] = record
+
+    tabs = []
+    for (kind, tab_id), record in sorted(records.items(), key=lambda item: item[0]):
+        if kind != "tab":
+            continue
+        tab = {key: value for key, value in record.items() if key != "buttons"}
+        tab_buttons = buttons_by_tab.get(tab_id, {})
+        # Listed buttons in order, then buttons that point at the tab but aren't listed yet
+        ordered_ids = [button_id for button_id in record.get("buttons", []) if button_id in tab_buttons]
+        listed_ids = set(ordered_ids)
+        ordered_ids += [button_id for button_id in tab_buttons if button_id not in listed_ids]
+        tab["buttons"] = [dict(tab_buttons[button_id]) for button_id in ordered_ids]
+        tabs.append(tab)
+    return tabs
+
+
+def merge_order(base, ours, theirs):
+    """Three-way merge of two edited lists of button IDs
+
+    Their order is kept, buttons we removed are dropped and buttons we added are appended.
+    """
+    base = set(base or [])
+    removed = base - set(ours)
+    merged = [item for item in theirs if item not in removed]
+    present = base | set(merged)
+    merged += [item for item in ours if item not in present]
+    return merged
+
+
+def merge_record(base, ours, theirs):
+    """Three-way merge of one record, any of which can be None for a missing record
+
+    When both sides changed the record, the fields we changed are applied on top of theirs.
+    An edit wins over a delete.
+    """
+    if ours == theirs:
+        return ours
+    if ours == base:
+        return theirs
+    if theirs == base:
+        return ours
+    if ours is None:
+        return theirs
+    if theirs is None:
+        return ours
+
+    base = base or {}
+    merged = dict(theirs)
+    for field in set(ours) | set(base):
+        ours_value = ours.get(field, _MISSING)
+        base_value = base.get(field, _MISSING)
+        if ours_value == base_value:
+            continue
+        if field == "buttons" and isinstance(ours_value, list) and isinstance(theirs.get(field), list):
+            merged[field] = merge_order(base.get(field), ours_value, theirs[field])
+        elif ours_value is _MISSING:
+            merged.pop(field, None)
+        else:
+            merged[field] = ours_value
+    return merged
+
+
+def parse_library(content):
+    """Get the tabs stored in library file content (text), either format
+
+    Raises:
+        ValueError: If the content is neither a change log nor a {"tabs": [...]} file
+    """
+    records, _, _, _ = _parse_content(content)
+    return unflatten_records(records)
+
+
+def parse_header(line):
+    """Get the generation from a log header line, or None if the line isn't a header"""
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(header, dict) or HEADER_KEY not in header:
+        return None
+    if header[HEADER_KEY] > LOG_VERSION:
+        raise ValueError(f"Unsupported tool box library version {header[HEADER_KEY]}")
+    return header.get("generation", "")
+
+
+def _apply_lines(records, lines):
+    """Apply log lines to records and return the changes they made, keyed like the records"""
+    changes = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        key = (entry["kind"], entry["id"])
+        record = entry.get("record")
+        if record is None:
+            records.pop(key, None)
+        else:
+            records[key] = record
+        changes[key] = record
+    return changes
+
+
+def _parse_content(content):
+    """Parse a whole library file
+
+    Returns:
+        tuple: (records, generation or None for a plain JSON file, offset of the end of the
+            last complete line, number of log lines)
+    """
+    if not content.strip():
+        return {}, None, 0, 0
+
+    first_line, _, rest = content.partition('\n')
+    generation = parse_header(first_line)
+    if generation is None:
+        data = json.loads(content)
+        if not isinstance(data, dict) or not isinstance(data.get("tabs"), list):
+            raise ValueError("Invalid tool box library format")
+        custom_tabs = [tab for tab in data["tabs"] if tab.get("id", 0) > 2]
+        return flatten_tabs(custom_tabs), None, len(content.encode('utf-8')), 0
+
+    # Ignore a last line that is still being written
+    complete, _, _ = rest.rpartition('\n')
+    lines = complete.split('\n') if complete else []
+    records = {}
+    _apply_lines(records, lines)
+    offset = len(first_line.encode('utf-8')) + 1 + (len(complete.encode('utf-8')) + 1 if complete else 0)
+    return records, generation, offset, len(lines)
+
+
+class SharedLibrary:
+    """One session's view of a shared library file
+
+    Use get_shared_library to get the instance for a path, it remembers what this session
+    last read from the file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.records = {}        # The file's records as of offset, the base of three-way merges
+        self.generation = None   # Generation of the log that was read, None if it isn't a log
+        self.offset = 0          # Bytes of the file that were read
+        self.line_count = 0      # Log lines that were read
+        self.loaded = False
+        self._pulled_base = {}   # Records as they were before the last _pull changed them
+        # Counters, for benchmarks
+        self.lines_read = 0
+        self.lines_written = 0
+        self.compactions = 0
+
+    def load(self, local_tabs=None):
+        """Read the library and merge it with the local tabs
+
+        The first load returns the file's tabs as they are. Later loads keep the local changes
+        made since the last load or save, merged with the changes other sessions saved since then.
+
+        Args:
+            local_tabs (list, optional): The local custom tabs, as returned by export_tabs
+
+        Returns:
+            list: The merged tabs
+        """
+        first_load = not self.loaded
+        local_changes = self._local_changes(local_tabs) if local_tabs is not None else {}
+        with FileLock(self.path, shared=True):
+            self._pull()
+
+        if first_load or local_tabs is None:
+            return unflatten_records(self.records)
+
+        merged = dict(self.records)
+        for key, record in self._merge(self._renumber_added(local_changes)).items():
+            if record is None:
+                merged.pop(key, None)
+            else:
+                merged[key] = record
+        return unflatten_records(merged)
+
+    def save(self, local_tabs):
+        """Merge the local tabs with the changes other sessions saved and write the result
+
+        Only the merged records that differ from the file are appended.
+
+        Args:
+            local_tabs (list): The local custom tabs, as returned by export_tabs
+
+        Returns:
+            tuple: (merged tabs, True if other sessions changed the library since the last
+                load or save, so the local tabs need updating)
+        """
+        local_changes = self._local_changes(local_tabs)
+        with FileLock(self.path):
+            their_changes = self._pull()
+            to_write = self._merge(self._renumber_added(local_changes))
+            for key, record in to_write.items():
+                if record is None:
+                    self.records.pop(key, None)
+                else:
+                    self.records[key] = record
+
+            if self.generation is None or self.line_count + len(to_write) > 2 * len(self.records) + COMPACT_SLACK:
+                self._write_snapshot()
+            elif to_write:
+                self._append(to_write)
+
+        others_changed = bool(their_changes) or any(local_changes.get(key, _MISSING) != record
+                                                     for key, record in to_write.items())
+        return unflatten_records(self.records), others_changed
+
+    def _local_changes(self, local_tabs):
+        """Get the records that differ between the local tabs and the file as last read"""
+        local_records = flatten_tabs(tab for tab in local_tabs if tab["id"] > 2)
+        changes = {}
+        for key, record in local_records.items():
+            if self.records.get(key) != record:
+                changes[key] = record
+        for key in self.records:
+            if key not in local_records:
+                changes[key] = None
+        return changes
+
+    def _renumber_added(self, local_changes):
+        """Move records we added under an ID that another session also added to a free ID
+
+        Merging the two records would keep only one of them. A renumbered tab gets a new widget
+        name if it had the same one, and our records that refer to the old ID are updated. Must
+        be called right after _pull, which records the base of the records it changed.
+
+        Returns:
+            dict: The local changes with the renumbered records
+        """
+        collisions = [key for key, ours in local_changes.items()
+                      if ours is not None and self._pulled_base.get(key, _MISSING) is None
+                      and self.records.get(key) not in (None, ours)]
+        if not collisions:
+            return local_changes
+
+        changes = dict(local_changes)
+        used_ids = {"tab": set(), "button": set()}
+        for kind, record_id in list(self.records) + list(changes):
+            used_ids[kind].add(record_id)
+        for kind, old_id in collisions:
+            new_id = max(used_ids[kind], default=2 if kind == "tab" else -1) + 1
+            used_ids[kind].add(new_id)
+            record = dict(changes.pop((kind, old_id)), id=new_id)
+            if kind == "tab":
+                if record.get("widget_name") == self.records[(kind, old_id)].get("widget_name"):
+                    record["widget_name"] = f"custom_widget_{new_id}"
+                for key, button in changes.items():
+                    if key[0] == "button" and button is not None and button.get("tab_id") == old_id:
+                        changes[key] = dict(button, tab_id=new_id)
+            else:
+                tab_key = ("tab", record.get("tab_id"))
+                tab = changes.get(tab_key)
+                if tab is not None:
+                    changes[tab_key] = dict(tab, buttons=[new_id if button_id == old_id else button_id
+                                                          for button_id in tab.get("buttons", [])])
+            changes[(kind, new_id)] = record
+        return changes
+
+    def _merge(self, local_changes):
+        """Merge local changes with the records of the file, which already has their changes
+
+        Must be called right after _pull, which records the base of the records it changed.
+
+        Returns:
+            dict: The records to write, None for records to delete
+        """
+        to_write = {}
+        for key, ours in local_changes.items():
+            theirs = self.records.get(key)
+            base = self._pulled_base.get(key, theirs)
+            merged = merge_record(base, ours, theirs)
+            if merged != theirs:
+                to_write[key] = merged
+        return to_write
+
+    def _pull(self):
+        """Read what other sessions appended since the last read, the lock must be held
+
+        Returns:
+            dict: The records they changed
+        """
+        self._pulled_base = {}
+        if not os.path.exists(self.path):
+            changes = {key: None for key in self.records}
+            self._pulled_base = dict(self.records)
+            self.records, self.generation, self.offset, self.line_count = {}, None, 0, 0
+            self.loaded = True
+            return changes
+
+        with open(self.path, 'rb') as f:
+            first_line = f.readline().decode('utf-8')
+            generation = parse_header(first_line)
+            if self.loaded and generation is not None and generation == self.generation:
+                # Only read the lines appended since the last read
+                f.seek(self.offset)
+                appended = f.read().decode('utf-8')
+                complete, _, _ = appended.rpartition('\n')
+                lines = complete.split('\n') if complete else []
+                base = dict(self.records)
+                changes = _apply_lines(self.records, lines)
+                self._pulled_base = {key: base.get(key) for key in changes}
+                self.offset += len(complete.encode('utf-8')) + 1 if complete else 0
+                self.line_count += len(lines)
+                self.lines_read += len(lines)
+                return changes
+
+            # The file is new to this session, was compacted or isn't a log: read it all
+            f.seek(0)
+            content = f.read().decode('utf-8')
+
+        records, self.generation, self.offset, self.line_count = _parse_content(content)
+        self.lines_read += self.line_count
+        changes = {key: record for key, record in records.items() if self.records.get(key) != record}
+        changes.update({key: None for key in self.records if key not in records})
+        self._pulled_base = {key: self.records.get(key) for key in changes}
+        self.records = records
+        self.loaded = True
+        return changes
+
+    def _append(self, to_write):
+        """Append records to the log, the lock must be held"""
+        lines = ''.join(format_line(kind, record_id, record)
+                        for (kind, record_id), record in to_write.items())
+        data = lines.encode('utf-8')
+        with open(self.path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.offset += len(data)
+        self.line_count += len(to_write)
+        self.lines_written += len(to_write)
+
+    def _write_snapshot(self):
+        """Rewrite the log with one line per record under a new generation, the lock must be held"""
+        self.generation = uuid.uuid4().hex
+        lines = [format_header(self.generation)]
+        lines += [format_line(kind, record_id, record)
+                  for (kind, record_id), record in self.records.items()]
+        data = ''.join(lines).encode('utf-8')
+        atomic_write(self.path, data)
+        self.offset = len(data)
+        self.line_count = len(self.records)
+        self.lines_written += len(self.records)
+        self.compactions += 1
+
+
+# path -> SharedLibrary, kept for the session
+_LIBRARIES = {}
+
+
+def get_shared_library(path):
+    """Get this session's SharedLibrary for a file"""
+    path = os.path.abspath(path)
+    if path not in _LIBRARIES:
+        _LIBRARIES[path] = SharedLibrary(path)
+    return _LIBRARIES[path]
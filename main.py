@@ -1,46 +1,110 @@
+import sys
+import importlib
+
 try:
     from PySide6 import QtWidgets, QtCore
-    from shiboken6 import wrapInstance
+    from shiboken6 import wrapInstance, isValid
 except ImportError:
     from PySide2 import QtWidgets, QtCore
-    from shiboken2 import wrapInstance
+    from shiboken2 import wrapInstance, isValid
 
 from . import ui as UI
 from . import utils as UT
 # Global variable to store the window instance
 tool_box_window = None
 
+# Closing the window only hides it, the next show_tool_box shows the same window again
+KEEP_ALIVE = True
+
+# Dynamic property that marks the tool box window, so a window created before the package was
+# imported again is found and reused
+WINDOW_PROPERTY = "ftToolBoxWindow"
+
+
+def _find_window():
+    """Find the live Tool Box window, also one created by an earlier import of the package
+
+    Returns:
+        QtWidgets.QWidget: The window, or None if there is none
+    """
+    if tool_box_window is not None and isValid(tool_box_window):
+        return tool_box_window
+    for widget in QtWidgets.QApplication.topLevelWidgets():
+        if widget.property(WINDOW_PROPERTY) and isValid(widget):
+            return widget
+    return None
+
+
+def _destroy_window(window):
+    """Close and delete a window, even if it's kept alive"""
+    try:
+        window.setProperty(WINDOW_PROPERTY, False)
+        window.keep_alive = False
+        window.close()
+        window.deleteLater()
+    except RuntimeError:
+        # Already deleted
+        pass
+
+
 def show_tool_box():
-    """Show the Tool Box window"""
+    """Show the Tool Box window
+
+    A kept alive window is shown again at the cursor as it was left, otherwise a new window is built.
+    """
     global tool_box_window
-    
+
+    window = _find_window()
+    if window is not None and KEEP_ALIVE:
+        tool_box_window = window
+        tool_box_window.keep_alive = True
+        tool_box_window.show_at_cursor()
+        UT.maya_main_window().activateWindow()
+        return tool_box_window
+
     # Close existing window if it exists
-    if tool_box_window is not None:
-        try:
-            tool_box_window.close()
-            tool_box_window.deleteLater()
-        except:
-            pass
-    
+    if window is not None:
+        _destroy_window(window)
+
     # Create a new window
     tool_box_window = UI.ToolBoxWindow(parent=UT.maya_main_window())
-    
-    # Position the window in the center of the Maya window
-    maya_window_center = UT.maya_main_window().geometry().center()
-    window_width = 300  # Default width
-    window_height = 70  # Default height
-    tool_box_window.setGeometry(
-        maya_window_center.x() - window_width // 2,
-        maya_window_center.y() - window_height // 2,
-        window_width,
-        window_height
-    )
-    
+    tool_box_window.setProperty(WINDOW_PROPERTY, True)
+    tool_box_window.keep_alive = KEEP_ALIVE
+
+    # Without the geometry of the last session, position the window in the center of the Maya window
+    if not tool_box_window.window_state_restored:
+        maya_window_center = UT.maya_main_window().geometry().center()
+        window_width = 300  # Default width
+        window_height = 70  # Default height
+        tool_box_window.setGeometry(
+            maya_window_center.x() - window_width // 2,
+            maya_window_center.y() - window_height // 2,
+            window_width,
+            window_height
+        )
+
     # Show the window
     tool_box_window.show()
     UT.maya_main_window().activateWindow()
     return tool_box_window
 
+
+def hard_reload():
+    """Delete the window, import the package again from disk and build a new window, for development"""
+    global tool_box_window
+
+    window = _find_window()
+    if window is not None:
+        _destroy_window(window)
+    tool_box_window = None
+
+    package_name = __name__.rpartition(".")[0]
+    unload_pkg = importlib.import_module(package_name + ".__unload_pkg")
+    unload_pkg.unload(sys.modules[package_name])
+
+    # Importing main shows the new window
+    return importlib.import_module(package_name + ".main").tool_box_window
+
 # Function to be called from Maya's script editor or shelf button
 def run():
     """Run the Tool Box"""
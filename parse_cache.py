@@ -0,0 +1,104 @@
+"""
+LRU cache of parsed tool box data, bounded by its number of entries, shared by every database
+in the session.
+
+Entries are keyed by the content hash of the stored payload, so an entry never goes stale:
+different content has a different key. Opening a scene whose tabs were already parsed in
+this session, e.g. when switching back and forth between shot scenes, skips reading and
+parsing them. Only loads fill the cache, data that is being edited would only add entries for
+versions that are never loaded.
+
+Cached values are private to the cache. put stores a copy and get returns a copy, so the
+caller can edit what it gets without changing the cached entry.
+"""
+import copy
+from collections import OrderedDict
+
+# Default maximum number of cached entries, parsed tabs without their scripts (those are kept
+# in the script store)
+DEFAULT_MAX_SIZE = 256
+
+
+class LRUCache:
+    """Least recently used cache bounded by its number of entries
+
+    Args:
+        max_size (int): Maximum number of entries, the least recently used entries are evicted
+            to stay under it
+        copy_value (callable): Copies values going in and out of the cache
+    """
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, copy_value=copy.deepcopy):
+        self.max_size = max_size
+        self.copy_value = copy_value
+        self._entries = OrderedDict()  # key -> value, most recently used last
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Get a copy of the value cached for a key, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self.copy_value(entry)
+
+    def put(self, key, value):
+        """Cache a copy of a value
+
+        Args:
+            key: Content hash of the payload the value was parsed from
+            value: The parsed value
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        if self.max_size <= 0:
+            return
+        self._entries[key] = self.copy_value(value)
+        self._evict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set_max_size(self, max_size):
+        """Change the maximum number of entries, evicting the entries that no longer fit"""
+        self.max_size = max_size
+        self._evict()
+
+    def _evict(self):
+        """Evict the least recently used entries until at most max_size are left"""
+        while len(self._entries) > max(self.max_size, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove every entry, the statistics are kept"""
+        self._entries.clear()
+
+    def get_stats(self):
+        """Get the hit and miss counters and the number of entries, for profiling
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions, entries and max_size
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / float(lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_size": self.max_size
+        }
+
+    def reset_stats(self):
+        """Reset the hit, miss and eviction counters"""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
@@ -0,0 +1,78 @@
+"""
+Encoding of the tool box data stored in Maya scene attributes.
+
+Payloads are written as a versioned envelope:
+
+    FTTB1:zlib:<base64 of the zlib compressed JSON text>
+
+Small payloads are left as plain JSON because the envelope would make them larger.
+Plain JSON (as written by older versions of the tool box) is always accepted when decoding.
+"""
+import base64
+import json
+import zlib
+
+ENVELOPE_MAGIC = "FTTB"
+ENVELOPE_VERSION = 1
+ZLIB_CODEC = "zlib"
+
+# Payloads shorter than this are stored as plain JSON
+MIN_COMPRESS_SIZE = 256
+
+
+def is_envelope(stored_text):
+    """Return True if the stored text is a compressed envelope rather than plain JSON"""
+    return bool(stored_text) and stored_text.startswith(ENVELOPE_MAGIC)
+
+
+def encode_text(json_text, compress=True, level=6):
+    """Wrap a JSON string for storage in a scene attribute
+
+    Args:
+        json_text (str): The JSON text to store
+        compress (bool): If False the JSON text is returned unchanged
+        level (int): zlib compression level
+
+    Returns:
+        str: The envelope, or the JSON text itself if compression is disabled or not worth it
+    """
+    if not compress or len(json_text) < MIN_COMPRESS_SIZE:
+        return json_text
+
+    compressed = zlib.compress(json_text.encode('utf-8'), level)
+    encoded = base64.b64encode(compressed).decode('ascii')
+    return f"{ENVELOPE_MAGIC}{ENVELOPE_VERSION}:{ZLIB_CODEC}:{encoded}"
+
+
+def decode_text(stored_text):
+    """Get the JSON text back from a stored payload
+
+    Args:
+        stored_text (str): An envelope written by encode_text or plain JSON
+
+    Returns:
+        str: The JSON text
+
+    Raises:
+        ValueError: If the envelope version or codec is not supported
+    """
+    if not is_envelope(stored_text):
+        return stored_text
+
+    header_version, codec, encoded = stored_text[len(ENVELOPE_MAGIC):].split(':', 2)
+    if int(header_version) > ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported tool box payload version {header_version}")
+    if codec != ZLIB_CODEC:
+        raise ValueError(f"Unsupported tool box payload codec {codec}")
+
+    return zlib.decompress(base64.b64decode(encoded)).decode('utf-8')
+
+
+def encode(data, compress=True, level=6):
+    """Serialize data to JSON and wrap it for storage in a scene attribute"""
+    return encode_text(json.dumps(data), compress=compress, level=level)
+
+
+def decode(stored_text):
+    """Parse a stored payload written by encode, or plain JSON"""
+    return json.loads(decode_text(stored_text))
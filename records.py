@@ -0,0 +1,282 @@
+"""
+Compact record types for tabs and function buttons.
+
+Records keep their known fields in __slots__ instead of a per-record dict, and color strings
+are interned so the thousands of buttons sharing a handful of colors share the strings too.
+Fields a record type doesn't know about are kept in its 'extra' dict, so data written by a
+newer version of the tool box survives a round trip.
+
+Records support the mapping protocol (record["text"], "tooltip" in record, get, setdefault,
+pop, update, items, dict(record)), so code written against the JSON dicts keeps working.
+Unset fields are not part of the mapping, like a missing dict key. Unlike dicts, records
+compare by identity, so finding a record in a list doesn't compare every field of the records
+before it. Compare to_json() to compare contents.
+
+Known fields can also be read as attributes, e.g. button.text, which is as fast as a dict
+lookup and is what hot loops should use. An unset field reads as MISSING.
+
+Use to_json/from_json to convert to and from the plain dicts stored in the scene and in files.
+Each record type compiles them, and copy, from its field list, so they set and read every slot
+in straight-line code instead of a loop over the fields.
+"""
+import sys
+import copy
+from operator import attrgetter
+
+# Value of a slot whose field is not set
+MISSING = object()
+
+
+def _compile_codec(cls):
+    """Compile the functions that build a record of a type from a dict, its dict and its copy,
+    with one statement per field"""
+    lines = ["def load(data):",
+             "    record = new(cls)",
+             "    get = data.get"]
+    for name in cls.FIELDS:
+        if name in cls.INTERNED_FIELDS:
+            lines.append(f"    value = get({name!r}, MISSING)")
+            lines.append(f"    record.{name} = intern(value) if type(value) is str else value")
+        else:
+            lines.append(f"    record.{name} = get({name!r}, MISSING)")
+    lines.append("    record.extra = None")
+    # Keep the fields the record type doesn't know about
+    lines.append("    if not field_set.issuperset(data):")
+    lines.append("        record.extra = {key: value for key, value in data.items() if key not in field_set}")
+    lines.append("    return record")
+    
+    lines.append("def dump_fields(record):")
+    lines.append("    data = {}")
+    for name in cls.FIELDS:
+        lines.append(f"    value = record.{name}")
+        lines.append("    if value is not MISSING:")
+        lines.append(f"        data[{name!r}] = value")
+    lines.append("    return data")
+    
+    lines.append("def copy(record):")
+    lines.append("    other = new(cls)")
+    lines.extend(f"    other.{name} = record.{name}" for name in cls.FIELDS)
+    lines.append("    other.extra = dict(record.extra) if record.extra else None")
+    lines.append("    return other")
+    
+    namespace = {"MISSING": MISSING, "intern": sys.intern, "new": cls.__new__, "cls": cls,
+                 "field_set": cls._FIELD_SET}
+    exec("\n".join(lines), namespace)
+    return namespace["load"], namespace["dump_fields"], namespace["copy"]
+
+
+class _Record:
+    """Base class for records, subclasses list their fields in FIELDS and __slots__"""
+    __slots__ = ("extra",)
+
+    FIELDS = ()
+    # Fields whose string values are interned
+    INTERNED_FIELDS = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+        # Read every slot in one call, much faster than a getattr per field
+        cls._get_values = staticmethod(attrgetter(*cls.FIELDS))
+        load, dump_fields, copy_record = _compile_codec(cls)
+        cls._load = staticmethod(load)
+        cls._dump_fields = staticmethod(dump_fields)
+        cls._copy = staticmethod(copy_record)
+
+    def __init__(self, data=None, **fields):
+        self.extra = None
+        for name in self.FIELDS:
+            setattr(self, name, MISSING)
+        if data:
+            self.update(data)
+        if fields:
+            self.update(fields)
+
+    @classmethod
+    def from_json(cls, data):
+        """Build a record from a plain dict, copying it"""
+        if isinstance(data, cls):
+            return data.copy()
+        return cls._load(data)
+
+    def to_json(self):
+        """Get the record as a plain dict that can be passed to json.dumps"""
+        data = self._dump_fields(self)
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def copy(self):
+        """Get a shallow copy of the record"""
+        return self._copy(self)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        record = self.copy()
+        if record.extra:
+            record.extra = copy.deepcopy(record.extra, memo)
+        return record
+
+    def __getstate__(self):
+        return self.to_json()
+
+    def __setstate__(self, state):
+        self.extra = None
+        for name in self.FIELDS:
+            setattr(self, name, MISSING)
+        self.update(state)
+
+    # Mapping protocol
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            if key in self.INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._FIELD_SET:
+            if getattr(self, key) is MISSING:
+                raise KeyError(key)
+            setattr(self, key, MISSING)
+        elif self.extra and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._FIELD_SET:
+            return getattr(self, key) is not MISSING
+        return bool(self.extra) and key in self.extra
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_json()!r})"
+
+    def keys(self):
+        keys = [name for name, value in zip(self.FIELDS, self._get_values(self)) if value is not MISSING]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def get(self, key, default=None):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            return default if value is MISSING else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def update(self, other=(), **fields):
+        items = other.items() if hasattr(other, "items") else other
+        for key, value in items:
+            self[key] = value
+        for key, value in fields.items():
+            self[key] = value
+
+
+class FunctionButtonRecord(_Record):
+    """A function button
+
+    The 'script', 'python_code' and 'mel_code' fields only hold inline scripts until the
+    database moves them to the script store and references them by their '*_hash' fields.
+    """
+    FIELDS = ("id", "tab_id", "order", "text", "color", "tooltip", "script_type",
+              "script_hash", "python_code_hash", "mel_code_hash",
+              "script", "python_code", "mel_code")
+    __slots__ = FIELDS
+    INTERNED_FIELDS = frozenset(("color", "script_type"))
+
+
+class TabRecord(_Record):
+    """A tab and the function buttons on its page"""
+    FIELDS = ("id", "order", "text", "tooltip", "checked_color", "unchecked_color", "hover_color",
+              "widget_name", "border_radius", "buttons")
+    __slots__ = FIELDS
+    INTERNED_FIELDS = frozenset(("checked_color", "unchecked_color", "hover_color"))
+
+    @classmethod
+    def from_json(cls, data):
+        """Build a tab record and the records of its buttons from a plain dict, copying it"""
+        record = super().from_json(data)
+        if record.buttons is not MISSING:
+            record.buttons = [to_button_record(button) for button in record.buttons]
+        return record
+
+    def to_json(self):
+        """Get the tab and its buttons as a plain dict that can be passed to json.dumps"""
+        data = super().to_json()
+        if "buttons" in data:
+            data["buttons"] = [button.to_json() if isinstance(button, _Record) else button
+                               for button in data["buttons"]]
+        return data
+
+    def __setitem__(self, key, value):
+        if key == "buttons" and isinstance(value, list):
+            value = [to_button_record(button) for button in value]
+        super().__setitem__(key, value)
+
+    def __deepcopy__(self, memo):
+        record = super().__deepcopy__(memo)
+        if record.buttons is not MISSING:
+            record.buttons = [copy.deepcopy(button, memo) for button in record.buttons]
+        return record
+
+
+def to_button_record(data):
+    """Get a function button record for a dict, or the record itself if it already is one"""
+    if isinstance(data, FunctionButtonRecord):
+        return data
+    return FunctionButtonRecord._load(data)
+
+
+def to_tab_record(data):
+    """Get a tab record for a dict, or the record itself if it already is one
+
+    The buttons of a tab record that are still dicts are converted as well.
+    """
+    if isinstance(data, TabRecord):
+        if data.buttons is not MISSING:
+            data.buttons = [to_button_record(button) for button in data.buttons]
+        return data
+    return TabRecord.from_json(data)
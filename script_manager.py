@@ -17,6 +17,8 @@ import re
 
 from . import utils as UT
 from . import custom_button as CB
+from . import script_store as SS
+from . import window_drag as WD
 
 class ScriptSyntaxHighlighter(QtGui.QSyntaxHighlighter):
     def __init__(self, parent=None):
@@ -139,6 +141,9 @@ class ScriptManagerWidget(QtWidgets.QWidget):
         self.resizing = False
         self.resize_edge = None
         self.resize_range = 8  # Pixels from edge where resizing is active
+        self.cursor_edge = None  # Resize edge the cursor was last set for
+        # Moves and resizes done from Python are applied once per display frame
+        self.geometry_throttle = WD.GeometryThrottle(self)
           # Set minimum size
         self.setGeometry(0,0,400,300)
         self.setMinimumSize(305, 300)
@@ -694,11 +699,7 @@ setAttr "@ns.Object.Attribute" Attribute Value;'''
             
     def extract_tooltip_from_script(self, script):
         """Extract the tooltip from a script if it contains @TF.tool_tip"""
-        import re
-        tooltip_match = re.search(r'^\s*@TF\.tool_tip\s*\(\s*[\"\'](.*?)[\"\'](\s*)?\)', script, flags=re.MULTILINE)
-        if tooltip_match:
-            return tooltip_match.group(1)
-        return None
+        return SS.extract_tooltip(script) or None
 
     def execute_code(self):
         """Modified to ensure each button gets its own script data and both Python and MEL scripts are saved"""
@@ -771,18 +772,21 @@ setAttr "@ns.Object.Attribute" Attribute Value;'''
                     if self.is_in_resize_range(pos):
                         self.update_cursor(pos)
                     else:
-                        self.unsetCursor()
+                        self.unset_resize_cursor()
                 return False
             elif event.type() == QtCore.QEvent.Leave:
                 if not self.resizing:
-                    self.unsetCursor()
+                    self.unset_resize_cursor()
                 return True
         return super().eventFilter(obj, event)
 
     def mousePressEvent(self, event):
         if event.button() == QtCore.Qt.LeftButton:
             self.resize_edge = self.get_resize_edge(event.pos())
-            if self.resize_edge:
+            if self.resize_edge and WD.start_system_resize(self, self.resize_edge):
+                # The window manager resizes the window
+                self.resizing = False
+            elif self.resize_edge:
                 self.resizing = True
                 self.resize_start_pos = event.globalPos()
                 self.initial_size = self.size()
@@ -816,19 +820,21 @@ setAttr "@ns.Object.Attribute" Attribute Value;'''
                 new_height = max(self.minimumHeight(), self.initial_size.height() + delta.y())
                 new_geometry.setHeight(new_height)
             
-            self.setGeometry(new_geometry)
+            self.geometry_throttle.set_geometry(new_geometry)
         
         elif not self.resizing:
             if self.is_in_resize_range(event.pos()):
                 self.update_cursor(event.pos())
             else:
-                self.unsetCursor()
+                self.unset_resize_cursor()
 
     def mouseReleaseEvent(self, event):
         if event.button() == QtCore.Qt.LeftButton:
+            if self.resizing:
+                self.geometry_throttle.flush()
             self.resizing = False
             self.resize_edge = None
-            self.unsetCursor()
+            self.unset_resize_cursor()
 
     def closeEvent(self, event):
         super().closeEvent(event)
@@ -866,6 +872,10 @@ setAttr "@ns.Object.Attribute" Attribute Value;'''
 
     def update_cursor(self, pos):
         edge = self.get_resize_edge(pos)
+        # Only change the cursor when the mouse moves onto another edge
+        if edge == self.cursor_edge:
+            return
+        self.cursor_edge = edge
         cursor = QtCore.Qt.ArrowCursor
         
         if edge:
@@ -882,20 +892,30 @@ setAttr "@ns.Object.Attribute" Attribute Value;'''
             cursor = cursor_map.get(edge, QtCore.Qt.ArrowCursor)
         
         self.setCursor(cursor)
+    
+    def unset_resize_cursor(self):
+        if self.cursor_edge is None:
+            return
+        self.cursor_edge = None
+        self.unsetCursor()
     #---------------------------------------------------------------------------------------
     # Window dragging methods
     def title_bar_mouse_press(self, event):
         if event.button() == QtCore.Qt.LeftButton:
-            self.dragging = True
-            self.offset = event.globalPos() - self.pos()
+            # Let the window manager move the window where the platform supports it
+            if not WD.start_system_move(self):
+                self.dragging = True
+                self.offset = event.globalPos() - self.pos()
         UT.maya_main_window().activateWindow()
             
     def title_bar_mouse_move(self, event):
         if self.dragging and event.buttons() == QtCore.Qt.LeftButton:
-            self.move(event.globalPos() - self.offset)
+            self.geometry_throttle.move(event.globalPos() - self.offset)
             
     def title_bar_mouse_release(self, event):
         if event.button() == QtCore.Qt.LeftButton:
+            if self.dragging:
+                self.geometry_throttle.flush()
             self.dragging = False
             
     def set_script(self, script_text):
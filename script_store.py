@@ -0,0 +1,198 @@
+"""
+Content-addressed storage for function button scripts.
+
+Function button records don't embed their scripts. Each script body is stored once, keyed by
+the sha1 of its text, and records reference it through '<field>_hash' keys, e.g.
+'script_hash' for the 'script' field. Identical scripts used by several buttons, or in the
+'script', 'python_code' and 'mel_code' fields of the same button, are stored only once.
+"""
+import re
+import hashlib
+import maya.cmds as cmds
+
+from . import payload_codec as PC
+
+# Button fields that hold script bodies
+SCRIPT_FIELDS = ("script", "python_code", "mel_code")
+
+# @TF.tool_tip("...") directive that sets a function button's tooltip
+TOOLTIP_PATTERN = re.compile(r'^\s*@TF\.tool_tip\s*\(\s*[\"\'](.*?)[\"\'](\s*)?\)', flags=re.MULTILINE)
+
+
+def extract_tooltip(script):
+    """Get the tooltip set by a @TF.tool_tip directive in a script, or an empty string"""
+    if not script:
+        return ""
+    tooltip_match = TOOLTIP_PATTERN.search(script)
+    return tooltip_match.group(1) if tooltip_match else ""
+
+
+def script_hash(script):
+    """Get the key a script body is stored under. Empty scripts use the empty string."""
+    if not script:
+        return ""
+    return hashlib.sha1(script.encode('utf-8')).hexdigest()
+
+
+def hash_field(field):
+    """Get the name of the record key that references the script stored for a field"""
+    return f"{field}_hash"
+
+
+def externalize_scripts(button, put):
+    """Replace the inline script fields of a button record with hash references
+
+    The tooltip directive of the 'script' field is stored in the record's 'tooltip' key, so
+    the button can be built without reading the script.
+
+    Args:
+        button (dict): The button record, modified in place
+        put (callable): Stores a script body and returns its hash
+
+    Returns:
+        bool: True if the record had inline scripts
+    """
+    changed = False
+    if "script" in button:
+        button["tooltip"] = extract_tooltip(button["script"])
+    for field in SCRIPT_FIELDS:
+        if field in button:
+            button[hash_field(field)] = put(button.pop(field) or "")
+            changed = True
+    return changed
+
+
+def inline_scripts(button, get):
+    """Get a copy of a button record with its script fields filled in from their hashes
+
+    Args:
+        button (dict): The button record
+        get (callable): Returns the script body for a hash
+
+    Returns:
+        dict: A new record with 'script', 'python_code' and 'mel_code' where referenced
+    """
+    hydrated = dict(button)
+    for field in SCRIPT_FIELDS:
+        key = hash_field(field)
+        if key in hydrated:
+            hydrated[field] = get(hydrated.pop(key))
+    return hydrated
+
+
+def referenced_hashes(buttons):
+    """Get the set of script hashes referenced by the given button records"""
+    hashes = set()
+    for button in buttons:
+        for field in SCRIPT_FIELDS:
+            script_key = button.get(hash_field(field))
+            if script_key:
+                hashes.add(script_key)
+    return hashes
+
+
+class SceneScriptStore:
+    """Script bodies stored on a scene node, one string attribute per distinct script
+
+    Bodies are only read from the scene when they are first requested, and new bodies are
+    written when the store is flushed.
+    """
+    def __init__(self, node='defaultObjectSet', attribute_prefix='ftToolBoxScript_', compress=True):
+        self.node = node
+        self.attribute_prefix = attribute_prefix
+        self.compress = compress
+        self._bodies = {}           # hash -> script body, for every script read or added
+        self._pending = set()       # hashes added but not written to the scene yet
+        self._stored_hashes = None  # hashes stored in the scene, listed on first use
+        self.read_count = 0
+        self.write_count = 0
+
+    def reset(self):
+        """Forget everything cached, e.g. after another scene was opened"""
+        self._bodies = {}
+        self._pending = set()
+        self._stored_hashes = None
+
+    def put(self, script):
+        """Add a script body and return its hash. Bodies already stored are not written again."""
+        key = script_hash(script)
+        if key and key not in self._bodies:
+            self._bodies[key] = script
+            self._pending.add(key)
+        return key
+
+    def cache(self, script):
+        """Add a script body to memory only and return its hash
+        
+        Used for scripts that come from outside the scene. The body is written to the scene by a
+        flush that lists its hash as referenced.
+        """
+        key = script_hash(script)
+        if key:
+            self._bodies.setdefault(key, script)
+        return key
+    
+    def get(self, key):
+        """Get the script body for a hash, reading it from the scene the first time"""
+        if not key:
+            return ""
+        if key in self._bodies:
+            return self._bodies[key]
+
+        attribute_name = self._attribute_name(key)
+        script = ""
+        if cmds.attributeQuery(attribute_name, node=self.node, exists=True):
+            stored = cmds.getAttr(f'{self.node}.{attribute_name}')
+            script = PC.decode_text(stored) if stored else ""
+            self.read_count += 1
+        else:
+            print(f"Missing tool box script {key}")
+        self._bodies[key] = script
+        return script
+
+    def flush(self, referenced=None):
+        """Write new script bodies to the scene
+
+        Args:
+            referenced (set, optional): Every hash still in use. When given, unused bodies are
+                removed from the scene and used bodies missing from the scene are written back.
+        """
+        to_write = set(self._pending)
+        to_delete = set()
+        if referenced is not None:
+            stored = self._get_stored_hashes()
+            to_write = (to_write | (referenced - stored)) & referenced
+            to_delete = stored - referenced
+
+        for key in to_write:
+            if key not in self._bodies:
+                continue
+            attribute_name = self._attribute_name(key)
+            if not cmds.attributeQuery(attribute_name, node=self.node, exists=True):
+                cmds.addAttr(self.node, longName=attribute_name, dataType='string')
+            cmds.setAttr(f'{self.node}.{attribute_name}',
+                         PC.encode_text(self._bodies[key], compress=self.compress), type='string')
+            self.write_count += 1
+            if self._stored_hashes is not None:
+                self._stored_hashes.add(key)
+
+        for key in to_delete:
+            attribute_name = self._attribute_name(key)
+            if cmds.attributeQuery(attribute_name, node=self.node, exists=True):
+                cmds.deleteAttr(f'{self.node}.{attribute_name}')
+            self._stored_hashes.discard(key)
+
+        self._pending = set()
+
+    def _get_stored_hashes(self):
+        """Get the hashes of the scripts stored in the scene"""
+        if self._stored_hashes is None:
+            attributes = cmds.listAttr(self.node, userDefined=True) or []
+            prefix_length = len(self.attribute_prefix)
+            self._stored_hashes = set(attribute[prefix_length:] for attribute in attributes
+                                      if attribute.startswith(self.attribute_prefix))
+        return self._stored_hashes
+
+    def _attribute_name(self, key):
+        """Get the name of the attribute that stores a script"""
+        return f"{self.attribute_prefix}{key}"
@@ -0,0 +1,372 @@
+"""
+Window-scoped style sheet for the tool box widgets.
+
+Instead of every widget parsing its own style sheet, a widget gets a style variant: the name of
+its rules, stored in the "ftStyle" dynamic property. The rules of every variant are compiled
+into one style sheet that is set once on each window the theme is attached to. Widgets that
+look the same share a variant, so hundreds of function buttons in a handful of colors add a
+handful of rules, and changing a widget's color only repolishes that widget.
+
+A window's style sheet is not set again when variants are added after it was attached, that
+would repolish every widget in it. A widget whose variant isn't in its window's style sheet
+gets the variant's rules as its own style sheet. Windows create the variants they expect to
+use, e.g. a function button in every palette color, before they are attached.
+
+Rules are written with $self in place of the selector, e.g.
+    "$self { background-color: #5285A6; } $self:hover { background-color: #6aa0c4; }"
+and compiled to "QPushButton[ftStyle="v3"] { ... }".
+
+Widgets that are shown outside of an attached window get their variant's rules as their own
+style sheet as well, see ensure_styled.
+
+This module doesn't use Maya, so it can be used from benchmarks.
+"""
+try:
+    from PySide6 import QtCore, QtGui
+except ImportError:
+    from PySide2 import QtCore, QtGui
+
+# Dynamic property that holds the variant name of a widget
+STYLE_PROPERTY = "ftStyle"
+# Dynamic property set on the windows the theme is attached to
+THEMED_PROPERTY = "ftThemed"
+# Placeholder for the selector in variant rules
+SELF = "$self"
+
+#-----------------------------------------------------------------------------------------------------------------------------
+# Rules of the tool box widgets
+#-----------------------------------------------------------------------------------------------------------------------------
+# Transparent tab pages with thin scroll bars
+SCROLL_AREA_RULES = """
+    $self {
+        background-color: transparent;
+        border: none;
+    }
+    $self QScrollBar:horizontal {
+        border: none;
+        background: transparent;
+        height: 8px;
+        margin: 0px 0px 0px 0px;
+    }
+    $self QScrollBar::handle:horizontal {
+        background: rgba(100, 100, 100, 0.5);
+        min-width: 20px;
+        border-radius: 0px;
+    }
+    $self QScrollBar::add-line:horizontal, $self QScrollBar::sub-line:horizontal {
+        width: 0px;
+    }
+    $self QScrollBar:vertical {
+        border: none;
+        background: transparent;
+        width: 8px;
+        margin: 0px 0px 0px 0px;
+    }
+    $self QScrollBar::handle:vertical {
+        background: rgba(100, 100, 100, 0.5);
+        min-height: 20px;
+        border-radius: 0px;
+    }
+    $self QScrollBar::add-line:vertical, $self QScrollBar::sub-line:vertical {
+        width: 0px;
+    }
+"""
+
+# The widget inside a tab page's scroll area
+PAGE_CONTENT_RULES = "$self { background-color: rgba(36, 36, 36, 0); border: none; border-radius: 4px; }"
+
+# The stacked widget that holds the tab pages
+PAGE_STACK_RULES = "$self { background-color: rgba(36, 36, 36, 0); border: none; border-radius: 0px; }"
+
+# The frame around the tab pages, and its highlight while resizing
+FRAME_RULES = "$self { background-color: rgba(36, 36, 36, .7); border: 1px solid #444444; border-radius: 4px; }"
+RESIZE_FRAME_RULES = "$self { background-color: rgba(36, 36, 36, .7); border: 1px solid #2f8cad; border-radius: 4px; }"
+
+
+def rgba_value(hex_color, factor, alpha=None):
+    """Scale the RGB values of a color by factor, like utils.rgba_value"""
+    color = QtGui.QColor(hex_color)
+    r, g, b, a = color.getRgbF()
+    color.setRgbF(min(max(r * factor, 0), 1), min(max(g * factor, 0), 1), min(max(b * factor, 0), 1),
+                  alpha if alpha is not None else a)
+    return color.name(QtGui.QColor.HexArgb)
+
+
+# The orient tools of the modeling page: their frame, the axis dropdown and the angle field
+ORIENT_FRAME_RULES = "$self { background-color: #444444; }"
+ORIENT_DROPDOWN_RULES = f"""
+    $self {{
+        background-color: {rgba_value('#222222', 1, .9)};
+        color: #dddddd;
+        border: 1px solid #2f2f2f;
+        padding: 0px 0px 0px 5px;
+    }}
+    $self:hover {{
+        background-color: {rgba_value('#222222', .8, 1)};
+    }}
+    $self::drop-down {{
+        border: 0px;
+    }}
+    $self::down-arrow {{
+        background-color: transparent;
+    }}
+    $self QToolTip {{
+        background-color: #222222;
+        color: white;
+        border: 0px;
+    }}
+"""
+ORIENT_INPUT_RULES = "$self { border: 1px solid #2c83be; background-color: #222222; }"
+
+# The list of library tabs in the import dialog
+IMPORT_TAB_LIST_RULES = "$self { background-color: #2d2d2d; color: white; border: none; }"
+
+
+def lighten_color(color, factor):
+    """Scale the lightness of a color by factor"""
+    c = QtGui.QColor(color)
+    h, s, l, _ = c.getHslF()
+    return QtGui.QColor.fromHslF(h, s, min(1.0, l * factor), 1.0).name()
+
+
+def button_rules(color, text_color='white', text_size=12, radius=3, flat=False, icon_text=False):
+    """Rules of a CustomButton
+
+    Args:
+        color (str): Background color
+        text_color (str): Text color
+        text_size (int): Font size in pixels
+        radius (int): Border radius in pixels
+        flat (bool): Transparent background, only the text changes color on hover
+        icon_text (bool): The button has an icon and a text, the text is aligned right
+    """
+    if flat:
+        rules = f"""
+            $self {{
+                background-color: transparent;
+                color: {text_color};
+                border: none;
+                padding: 1px;
+                border-radius: {radius}px;
+                font-size: {text_size}px;
+            }}
+            $self:hover {{
+                color: {rgba_value(text_color, 1.2)};
+            }}
+        """
+    else:
+        rules = f"""
+            $self {{
+                background-color: {rgba_value(color, 1.0)};
+                color: {text_color};
+                border: none;
+                padding: 1px;
+                border-radius: {radius}px;
+                font-size: {text_size}px;
+            }}
+            $self:hover {{
+                background-color: {rgba_value(color, 1.2)};
+            }}
+            $self:pressed {{
+                background-color: {rgba_value(color, 0.8)};
+            }}
+            $self QToolTip {{
+                background-color: {color};
+                color: white;
+                border: 0px;
+            }}
+        """
+    if icon_text:
+        rules += " $self { text-align: right; padding-right: 10px; }"
+    return rules
+
+
+def toggle_button_rules(checked_color, hover_color, unchecked_color, radius, font_size):
+    """Rules of a CustomToggleButton"""
+    return f"""
+        $self {{
+            background-color: {unchecked_color};
+            border: none;
+            color: rgba(250, 250, 250, .6);
+            padding: 0px;
+            text-align: center;
+            border-radius: {radius};
+            font-size: {font_size}px;
+        }}
+        $self:hover {{
+            background-color: {hover_color};
+        }}
+        $self:checked {{
+            background-color: {checked_color};
+            color: white;
+        }}
+        $self QToolTip {{
+            background-color: {checked_color};
+            color: white;
+            border: 0px;
+        }}
+    """
+
+
+def radio_button_rules(color, fill=False, radius=3, width=None, height=None):
+    """Rules of a CustomRadioButton"""
+    rules = f"""
+        $self {{
+            background-color: {'transparent' if not fill else '#555555'};
+            color: white;
+            padding: 5px;
+            border-radius: {radius}px;
+        }}
+    """
+    if width is not None:
+        rules += f"$self {{ min-width: {width}px; max-width: {width}px; }}"
+    if height is not None:
+        rules += f"$self {{ min-height: {height}px; max-height: {height}px; }}"
+    if fill:
+        return rules + f"""
+            $self::indicator {{
+                width: 0px;
+                height: 0px;
+            }}
+            $self:checked {{
+                background-color: {color};
+            }}
+            $self:hover {{
+                background-color: #6a6a6a;
+            }}
+            $self:checked:hover {{
+                background-color: {lighten_color(color, 1.2)};
+            }}
+        """
+    return rules + f"""
+        $self::indicator {{
+            width: 13px;
+            height: 13px;
+        }}
+        $self::indicator:unchecked {{
+            background-color: #555555;
+            border: 0px solid #555555;
+            border-radius: {radius}px;
+        }}
+        $self::indicator:checked {{
+            background-color: {color};
+            border: 0px solid {color};
+            border-radius: 3px;
+        }}
+        $self::indicator:hover {{
+            background-color: #6a6a6a;
+        }}
+        $self::indicator:checked:hover {{
+            background-color: {lighten_color(color, 1.2)};
+        }}
+    """
+
+
+class Theme:
+    """Compiles the rules of every style variant into one style sheet shared by the attached windows"""
+    def __init__(self):
+        self._variants = {}          # (widget class, rules) -> variant name
+        self._compiled_rules = {}    # variant name -> rules with the selector filled in
+        self._variant_indexes = {}   # variant name -> number of variants added before it
+        self._style_sheet = None     # Compiled style sheet, None after a variant was added
+        self._windows = {}           # Attached window -> number of variants in its style sheet
+        self.compiles = 0
+
+    def variant(self, widget_class, rules):
+        """Get the variant name for rules, adding the variant to the style sheet if it's new
+
+        Args:
+            widget_class (str): Qt class name used in the selector, e.g. "QPushButton"
+            rules (str): The rules, with $self in place of the selector
+        """
+        key = (widget_class, rules)
+        name = self._variants.get(key)
+        if name is None:
+            name = f"v{len(self._variants)}"
+            self._variant_indexes[name] = len(self._variants)
+            self._variants[key] = name
+            self._compiled_rules[name] = rules.replace(SELF, f'{widget_class}[{STYLE_PROPERTY}="{name}"]')
+            self._style_sheet = None
+        return name
+
+    def rules(self, name):
+        """Get the compiled rules of a variant"""
+        return self._compiled_rules[name]
+
+    def style_sheet(self):
+        """Get the style sheet with the rules of every variant"""
+        if self._style_sheet is None:
+            self._style_sheet = "\n".join(self._compiled_rules.values())
+            self.compiles += 1
+        return self._style_sheet
+
+    def covers(self, window, name):
+        """Check if the style sheet of an attached window has the rules of a variant"""
+        count = self._windows.get(window)
+        return count is not None and self._variant_indexes[name] < count
+
+    def attach(self, window):
+        """Set the style sheet with the rules of every variant added so far on a window"""
+        if window in self._windows:
+            return
+        self._windows[window] = len(self._variants)
+        window.setProperty(THEMED_PROPERTY, True)
+        window.setStyleSheet(self.style_sheet())
+        window.destroyed.connect(lambda *args, window=window: self.detach(window))
+
+    def detach(self, window):
+        """Forget a window, e.g. when it's deleted"""
+        self._windows.pop(window, None)
+
+
+# Theme shared by the tool box windows
+THEME = Theme()
+
+
+def apply_style(widget, rules, widget_class="QPushButton"):
+    """Give a widget the style variant of rules
+
+    Only the widget is repolished, and only if its variant changed. If the variant isn't in
+    the style sheet of the widget's window, the widget gets its rules as its own style sheet.
+
+    Args:
+        widget (QWidget): The widget
+        rules (str): The widget's rules, with $self in place of the selector
+        widget_class (str): Qt class name used in the selector
+    """
+    name = THEME.variant(widget_class, rules)
+    if widget.property(STYLE_PROPERTY) == name:
+        return
+    widget.setProperty(STYLE_PROPERTY, name)
+    if widget.styleSheet() or (is_themed(widget) and not THEME.covers(widget.window(), name)):
+        # A widget outside of an attached window (see ensure_styled), or a variant added after
+        # the window's style sheet was set
+        widget.setStyleSheet(THEME.rules(name))
+    elif widget.testAttribute(QtCore.Qt.WA_WState_Polished):
+        widget.style().unpolish(widget)
+        widget.style().polish(widget)
+        widget.update()
+
+
+def is_themed(widget):
+    """Check if a widget is inside a window the theme is attached to
+    
+    Child windows, like the script manager, have their own style sheets and are not themed.
+    """
+    return bool(widget.window().property(THEMED_PROPERTY))
+
+
+def ensure_styled(widget):
+    """Give a widget its variant's rules as its own style sheet if its window doesn't have them
+
+    Called when the widget is shown, for widgets outside of an attached window and widgets whose
+    variant was added after their window was attached. Style sheets set on the widget's other
+    ancestors take precedence over the window's, so widgets in other windows keep styling
+    themselves.
+    """
+    name = widget.property(STYLE_PROPERTY)
+    if not name or widget.styleSheet():
+        return
+    if is_themed(widget) and THEME.covers(widget.window(), name):
+        return
+    widget.setStyleSheet(THEME.rules(name))
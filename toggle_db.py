@@ -1,15 +1,255 @@
 import json
+import copy
+import hashlib
+from collections import deque
+from contextlib import contextmanager
 import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+try:
+    from PySide6 import QtCore
+except ImportError:
+    from PySide2 import QtCore
+
+from . import payload_codec as PC
+from . import records as RC
+from . import parse_cache as PCH
+from . import script_store as SS
+from . import user_library as UL
+
+# Version of the data layout written by this version of the tool box:
+#   0 - separate toolBoxToggleButtons / toolBoxFunctionButtons attributes
+#   1 - all custom tabs in the single ftToolBoxData attribute
+#   2 - one attribute per tab plus the ftToolBoxManifest attribute
+#   3 - script bodies stored once per distinct script, buttons reference them by hash
+SCHEMA_VERSION = 3
+
+# Migration functions, keyed by the schema version they upgrade from
+_MIGRATIONS = {}
+
+# Parsed tabs keyed by the hash of their shard, kept across scenes and database instances
+PARSED_TAB_CACHE = PCH.LRUCache()
+
+# Gap between the order keys of neighbouring custom tabs or function buttons. Moving or inserting
+# an item gives it a key between its new neighbours, so only the moved record changes. A list
+# is only renumbered when two neighbours have no room left between their keys.
+ORDER_GAP = 1024.0
+# Smallest gap left between two keys before a list is renumbered, about 20 moves into one gap
+MIN_ORDER_GAP = 1.0 / ORDER_GAP
+
+def order_key_between(items, index):
+    """Get the order key that puts a new item at index in a list sorted by order keys
+    
+    Returns:
+        float or None: The key, or None if there is no room between the neighbours at index
+    """
+    before = items[index - 1]["order"] if index > 0 else None
+    after = items[index]["order"] if index < len(items) else None
+    if before is None:
+        return ORDER_GAP if after is None else after - ORDER_GAP
+    if after is None:
+        return before + ORDER_GAP
+    if after - before < 2 * MIN_ORDER_GAP:
+        return None
+    return (before + after) / 2.0
+
+def renumber_order(items):
+    """Give the items of a list evenly spaced order keys in their current order"""
+    for position, item in enumerate(items):
+        item["order"] = (position + 1) * ORDER_GAP
+
+def normalize_order(items):
+    """Give items without an order key one after the item before them and sort the list by key
+    
+    Returns:
+        list: The items that got a key
+    """
+    assigned = []
+    previous_key = 0.0
+    for item in items:
+        if not isinstance(item.get("order"), (int, float)):
+            item["order"] = previous_key + ORDER_GAP
+            assigned.append(item)
+        previous_key = item["order"]
+    items.sort(key=lambda item: item["order"])
+    return assigned
+
+def bisect_order(items, key, start=0, right=False):
+    """Find where an order key goes in a list sorted by order keys from start on
+    
+    Args:
+        right (bool): Return the index after items with the same key instead of before them
+    """
+    low, high = start, len(items)
+    while low < high:
+        middle = (low + high) // 2
+        other_key = items[middle].order
+        if other_key < key or (right and other_key == key):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+def insert_by_order(items, item, start=0):
+    """Insert an item into a list sorted by order keys from start on, after items with the same key
+    
+    Returns:
+        int: The index the item was inserted at
+    """
+    index = bisect_order(items, item.order, start, right=True)
+    items.insert(index, item)
+    return index
+
+def index_by_order(items, item, start=0):
+    """Get the index of an item in a list sorted by order keys from start on
+    
+    Returns:
+        int or None: The index, or None if the item is not in the list
+    """
+    index = bisect_order(items, item.order, start)
+    while index < len(items) and items[index].order == item.order:
+        if items[index] is item:
+            return index
+        index += 1
+    return None
+
+# Value of a field that a journal operation removes from a record
+_DELETED = object()
+
+def field_changes(before, after, skip=("buttons",)):
+    """Get the fields that differ between two versions of a tab or function button
+    
+    Returns:
+        tuple: (fields that turn after back into before, fields that turn before into after),
+            _DELETED for the fields the other version doesn't have
+    """
+    undo_fields = {}
+    redo_fields = {}
+    for key in set(before.keys()) | set(after.keys()):
+        if key in skip:
+            continue
+        old_value = before.get(key, _DELETED)
+        new_value = after.get(key, _DELETED)
+        if old_value != new_value:
+            undo_fields[key] = old_value
+            redo_fields[key] = new_value
+    return undo_fields, redo_fields
+
+def set_fields(record, fields):
+    """Apply fields from field_changes to a record"""
+    for key, value in fields.items():
+        if value is _DELETED:
+            record.pop(key, None)
+        else:
+            record[key] = copy.deepcopy(value)
+
+def register_migration(from_version):
+    """Register a function that upgrades tool box data from one schema version to the next
+    
+    The function receives the data in the layout of from_version and returns it in the
+    layout of from_version + 1.
+    """
+    def decorator(func):
+        _MIGRATIONS[from_version] = func
+        return func
+    return decorator
+
+def migrate_data(data, from_version, to_version=SCHEMA_VERSION):
+    """Run the registered migrations to bring data from from_version up to to_version"""
+    version = from_version
+    while version < to_version:
+        migration = _MIGRATIONS.get(version)
+        if migration is None:
+            raise ValueError(f"No tool box data migration from schema version {version}")
+        data = migration(data)
+        version += 1
+    return data
+
+@register_migration(0)
+def _migrate_legacy_buttons_to_tabs(data):
+    """Combine the separate legacy toggle and function button lists into tabs"""
+    tabs = []
+    tabs_by_id = {}
+    for btn in data.get("toggle_buttons", []):
+        # Default tabs (IDs 0, 1, 2) are not stored
+        if btn["id"] <= 2 or btn["id"] in tabs_by_id:
+            continue
+        # Convert legacy button to new tab format
+        tab = dict(btn)
+        tab["buttons"] = []
+        tabs.append(tab)
+        tabs_by_id[tab["id"]] = tab
+    
+    # Associate function buttons with their tabs
+    for btn in data.get("function_buttons", []):
+        tab = tabs_by_id.get(btn.get("tab_id"))
+        if tab is not None:
+            tab["buttons"].append(btn)
+    
+    return {"tabs": tabs}
+
+@register_migration(1)
+def _migrate_consolidated_to_sharded(data):
+    """Version 2 only changes how tabs are stored in the scene, the data is unchanged"""
+    return data
+
+@register_migration(2)
+def _migrate_inline_scripts_to_store(data):
+    """Move inline script bodies into a table keyed by hash, shared by all buttons
+    
+    The bodies are returned under data["scripts"] for the database to add to its script store.
+    """
+    scripts = data.setdefault("scripts", {})
+    
+    def put(script):
+        script_key = SS.script_hash(script)
+        if script_key:
+            scripts[script_key] = script
+        return script_key
+    
+    for tab in data["tabs"]:
+        for button in tab.get("buttons", []):
+            SS.externalize_scripts(button, put)
+    return data
+
+class DatabaseSignals(QtCore.QObject):
+    """Change notifications of a ToggleButtonDatabase
+    
+    Events of edits made in a transaction are emitted when it commits, after changes to the
+    same tab or button were combined, e.g. a button removed and added again is 'updated'.
+    """
+    # Tab ID
+    tab_added = QtCore.Signal(int)
+    tab_removed = QtCore.Signal(int)
+    tab_updated = QtCore.Signal(int)
+    # Function button ID and the ID of its tab (the tab it was removed from for button_removed)
+    button_added = QtCore.Signal(int, int)
+    button_removed = QtCore.Signal(int, int)
+    button_updated = QtCore.Signal(int, int)
+    # All data was reloaded, e.g. from another scene
+    data_reset = QtCore.Signal()
 
 class ToggleButtonDatabase:
-    def __init__(self):
+    def __init__(self, write_behind=True, flush_interval=250, journal_length=100, use_user_library=True):
         self.tool_box_data = {}
         self.data_attribute_name = 'ftToolBoxData'
+        # Custom tabs are stored one attribute per tab, listed by a small manifest
+        self.manifest_attribute_name = 'ftToolBoxManifest'
+        self.shard_attribute_prefix = 'ftToolBoxTab'
+        # Store payloads in the compressed envelope (plain JSON is always readable)
+        self.compress_payloads = True
+        # Script bodies are stored once per distinct script and loaded on demand
+        self.script_store = SS.SceneScriptStore(compress=self.compress_payloads)
+        self._script_refs_changed = False  # Set when a script reference may have been dropped
+        # Tabs of the user library are shown under the scene's own tabs (see _overlay_user_library)
+        self.use_user_library = use_user_library
+        self._library_tab_ids = set()         # Library tabs shown but not edited, not saved in the scene
+        self._hidden_library_tab_ids = set()  # Library tabs removed in this scene
         # For backward compatibility
         self.toggle_attribute_name = 'toolBoxToggleButtons'
         self.function_attribute_name = 'toolBoxFunctionButtons'
         # Define default tabs that will not be stored in the database
-        self.default_tabs = [
+        self.default_tabs = [RC.TabRecord.from_json(tab) for tab in [
             {
                 "id": 0,
                 "text": "1",
@@ -43,202 +283,1051 @@ class ToggleButtonDatabase:
                 "border_radius": 6,
                 "buttons": []
             }
-        ]
+        ]]
         
         # Initialize the tool box data structure with default tabs
         self.tool_box_data = {
             "tabs": list(self.default_tabs)  # Create a copy to avoid modifying the original
         }
         
+        # Write-behind persistence: mutations only mark the store dirty and a single
+        # coalesced flush runs on the timer, before scene save or on window close
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval  # Milliseconds to wait before flushing
+        self._dirty = False
+        self._dirty_tab_ids = set()  # Tabs changed since the last flush, None means all tabs
+        self.mutation_count = 0
+        self.flush_count = 0
+        self.shard_write_count = 0
+        self._scene_callback_ids = []
+        self._transaction_depth = 0
+        
+        self._flush_timer = QtCore.QTimer()
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self.flush)
+        
+        # In-memory indexes over tool_box_data so lookups never scan every tab
+        self._tabs_by_id = {}       # tab id -> tab dict
+        self._buttons_by_id = {}    # function button id -> button dict
+        self._button_tab_ids = {}   # function button id -> tab id
+        self.next_function_id = 0   # Monotonic counter, persisted with the data
+        
+        # What is currently stored in the scene: tab id -> shard hash
+        self._shard_hashes = {}
+        self._manifest_json = None
+        
+        # Change journal for undo/redo. Each entry holds the compact operations that undo and
+        # redo one edit. The live data is the snapshot the journal works back from, so entries
+        # that fall off the end are simply folded into it.
+        self.journal_length = journal_length
+        self._undo_journal = deque(maxlen=journal_length)
+        self._redo_journal = deque(maxlen=journal_length)
+        self._journal_group = None  # Entry collecting the edits of an open transaction
+        
+        # Change events, queued while a transaction is open: (item, id) -> (change, tab id)
+        self.signals = DatabaseSignals()
+        self._pending_events = {}
+        
         self.load_database()
     
     def load_database(self):
-        """Load the tool box data from Maya's defaultObjectSet"""
-        # First try to load the consolidated data structure
-        if self._load_consolidated_data_from_maya():
-            # Successfully loaded consolidated data
+        """Load the tool box data from Maya's defaultObjectSet
+        
+        Scenes already in the current schema are read straight from the manifest. Older
+        scenes go through the migration pipeline once, after which the manifest marks them
+        as migrated.
+        """
+        self._flush_timer.stop()
+        self._dirty = False
+        self._dirty_tab_ids = set()
+        self.script_store.reset()
+        self._script_refs_changed = False
+        # Edits of the previous scene can't be undone in this one
+        self.clear_journal()
+        self._library_tab_ids = set()
+        self._hidden_library_tab_ids = set()
+        
+        # Start with default tabs
+        self.tool_box_data = {"tabs": list(self.default_tabs)}
+        
+        try:
+            # Check if defaultObjectSet exists
+            if cmds.objExists('defaultObjectSet'):
+                manifest_json = self._get_string_attribute(self.manifest_attribute_name)
+                if manifest_json:
+                    self._load_consolidated_data_from_maya(manifest_json)
+                else:
+                    self._migrate_stored_data()
+        except Exception as e:
+            print(f"Error loading tool box data from Maya: {e}")
+            self.tool_box_data = {"tabs": list(self.default_tabs)}
+        
+        self._overlay_user_library()
+        self._rebuild_index()
+        self._backfill_order()
+        self._backfill_tooltips()
+        self._pending_events = {}
+        self.signals.data_reset.emit()
+    
+    def _overlay_user_library(self):
+        """Add the user library tabs that the scene doesn't store itself
+        
+        Library tabs are not written to the scene until they're edited in it, after which the
+        scene's copy overrides the library. Library button IDs already used by the scene are
+        renumbered.
+        """
+        self._hidden_library_tab_ids = set(self.tool_box_data.get("hidden_library_tabs", []))
+        if not self.use_user_library:
+            return
+        
+        try:
+            library_tabs = UL.load_library()
+        except Exception as e:
+            print(f"Error loading tool box library: {e}")
             return
+        
+        tabs = self.tool_box_data["tabs"]
+        existing_tab_ids = set(tab["id"] for tab in tabs)
+        used_button_ids = set(button["id"] for tab in tabs for button in tab.get("buttons", []))
+        next_button_id = max([self.tool_box_data.get("next_function_id", 0)] +
+                             [button_id + 1 for button_id in used_button_ids])
+        
+        for library_tab in library_tabs:
+            tab_id = library_tab.get("id")
+            if (not isinstance(tab_id, int) or tab_id <= 2 or tab_id in existing_tab_ids
+                    or tab_id in self._hidden_library_tab_ids):
+                continue
+            
+            # Copy the records, the parsed library is shared by every scene
+            tab = RC.TabRecord.from_json(library_tab)
+            tab["buttons"] = []
+            for library_button in library_tab.get("buttons", []):
+                button = RC.FunctionButtonRecord.from_json(library_button)
+                if button["id"] in used_button_ids:
+                    button["id"] = next_button_id
+                next_button_id = max(next_button_id, button["id"] + 1)
+                used_button_ids.add(button["id"])
+                button["tab_id"] = tab_id
+                SS.externalize_scripts(button, self.script_store.cache)
+                tab["buttons"].append(button)
             
-        # If consolidated data doesn't exist, try to load from legacy format
-        # and convert to the new format
-        self._load_legacy_data_and_convert()
+            tabs.append(tab)
+            existing_tab_ids.add(tab_id)
+            self._library_tab_ids.add(tab_id)
+    
+    def save_user_library(self):
+        """Write the custom tabs to the user library, so every new scene starts with them
+        
+        Returns:
+            bool: True if the library was written
+        """
+        try:
+            UL.save_library([tab for tab in self.export_tabs() if tab["id"] > 2])
+            return True
+        except Exception as e:
+            print(f"Error saving tool box library: {e}")
+            return False
+    
+    def _get_user_library_tab_ids(self):
+        """Get the IDs of the custom tabs in the user library"""
+        if not self.use_user_library:
+            return set()
+        return set(tab.get("id") for tab in UL.load_library()) - {0, 1, 2}
+    
+    def is_library_tab(self, tab_id):
+        """Return True if a tab comes from the user library and hasn't been changed in this scene"""
+        return tab_id in self._library_tab_ids
+    
+    def _backfill_order(self):
+        """Give tabs and function buttons saved before order keys existed their keys
+        
+        The keys follow the stored order, so nothing moves. Scene tabs that got keys are saved again.
+        """
+        custom_tabs = self.tool_box_data["tabs"][len(self.default_tabs):]
+        changed_tab_ids = set(tab["id"] for tab in normalize_order(custom_tabs))
+        self.tool_box_data["tabs"][len(self.default_tabs):] = custom_tabs
+        for tab in custom_tabs:
+            if normalize_order(tab.setdefault("buttons", [])):
+                changed_tab_ids.add(tab["id"])
+        
+        # Library tabs get their keys again on every load, they're only saved once edited
+        changed_tab_ids -= self._library_tab_ids
+        if changed_tab_ids:
+            self._mark_dirty(*changed_tab_ids)
+    
+    def _backfill_tooltips(self):
+        """Store the tooltip of buttons saved before tooltips were kept with the button metadata
+        
+        This reads the scripts of those buttons once. After the next save the tooltips are
+        part of the stored records and startup doesn't need the scripts.
+        """
+        for button_id, button in self._buttons_by_id.items():
+            if "tooltip" not in button:
+                script = self.script_store.get(button.get(SS.hash_field("script"), ""))
+                button["tooltip"] = SS.extract_tooltip(script)
+                self._mark_dirty(self._button_tab_ids[button_id])
+    
+    def _rebuild_index(self):
+        """Rebuild the id lookup tables from tool_box_data"""
+        self._tabs_by_id = {}
+        self._buttons_by_id = {}
+        self._button_tab_ids = {}
+        
+        max_button_id = -1
+        for tab in self.tool_box_data["tabs"]:
+            self._tabs_by_id[tab.id] = tab
+            for button in tab.get("buttons", []):
+                self._buttons_by_id[button.id] = button
+                self._button_tab_ids[button.id] = tab.id
+                max_button_id = max(max_button_id, button.id)
+        
+        # Never hand out an id lower than one already in use, even if the stored counter is stale
+        stored_next_id = self.tool_box_data.get("next_function_id", 0)
+        self.next_function_id = max(stored_next_id, max_button_id + 1)
     
 
     
     def save_database(self):
-        """Save the tool box data to Maya's defaultObjectSet"""
-        # Save the consolidated data structure
-        self._save_consolidated_data_to_maya()
+        """Request a save of the tool box data to Maya's defaultObjectSet
+        
+        In write-behind mode the save is deferred and coalesced with any other pending
+        changes. Otherwise the data is written immediately.
+        """
+        self._mark_dirty()
     
-    def _save_consolidated_data_to_maya(self):
-        """Save the consolidated tool box data to Maya's defaultObjectSet"""
-        try:
-            # Create a copy of the data to avoid modifying the original
-            data_to_save = {"tabs": []}
-            
-            # Only save custom tabs (IDs > 2)
-            for tab in self.tool_box_data["tabs"]:
-                if tab["id"] > 2:
-                    data_to_save["tabs"].append(tab)
-            
-            # Convert to JSON string
-            data_json = json.dumps(data_to_save)
-            
-            # Check if defaultObjectSet exists
-            if not cmds.objExists('defaultObjectSet'):
-                return False
-                
-            # Check if the attribute exists, create it if it doesn't
-            if not cmds.attributeQuery(self.data_attribute_name, node='defaultObjectSet', exists=True):
-                cmds.addAttr('defaultObjectSet', longName=self.data_attribute_name, dataType='string')
-            
-            # Set the attribute value
-            cmds.setAttr(f'defaultObjectSet.{self.data_attribute_name}', data_json, type='string')
-            return True
-        except Exception as e:
-            print(f"Error saving tool box data to Maya: {e}")
+    def flush(self):
+        """Write pending changes to Maya's defaultObjectSet
+        
+        Returns:
+            bool: True if data was written, False if there was nothing to write or saving failed
+        """
+        self._flush_timer.stop()
+        # Uncommitted changes are written when the transaction commits
+        if not self._dirty or self._transaction_depth:
             return False
+        
+        tab_ids = self._dirty_tab_ids
+        self.flush_count += 1
+        if not self._save_consolidated_data_to_maya(tab_ids):
+            # The changes stay pending, the next flush writes them
+            return False
+        self._dirty = False
+        self._dirty_tab_ids = set()
+        return True
+    
+    def is_dirty(self):
+        """Return True if there are changes that have not been written to the scene yet"""
+        return self._dirty
+    
+    def get_persistence_stats(self):
+        """Get counters describing how mutations were coalesced into flushes
+        
+        Returns:
+            dict: Number of mutations, number of flushes, whether changes are pending and the
+                hit and miss statistics of PARSED_TAB_CACHE
+        """
+        return {
+            "mutations": self.mutation_count,
+            "flushes": self.flush_count,
+            "shard_writes": self.shard_write_count,
+            "pending": self._dirty,
+            "parse_cache": PARSED_TAB_CACHE.get_stats()
+        }
+    
+    def _mark_dirty(self, *tab_ids):
+        """Record a mutation and schedule a flush
+        
+        Args:
+            *tab_ids: IDs of the tabs whose content changed. If none are given, every tab is
+                treated as changed.
+        """
+        self.mutation_count += 1
+        self._dirty = True
+        
+        # Library tabs edited in this scene are stored in the scene from now on
+        adopted_tab_ids = self._library_tab_ids.intersection(tab_ids) if tab_ids else self._library_tab_ids
+        if adopted_tab_ids:
+            self._library_tab_ids = self._library_tab_ids - adopted_tab_ids
+            # Their scripts are only in memory so far
+            self._script_refs_changed = True
+        
+        if not tab_ids:
+            self._dirty_tab_ids = None
+        elif self._dirty_tab_ids is not None:
+            self._dirty_tab_ids.update(tab_ids)
+        
+        # Inside a transaction the changes are written once, on commit
+        if self._transaction_depth:
+            return
+        
+        self._emit_events()
+        
+        if not self.write_behind:
+            self.flush()
+            return
+        
+        # Restart the timer so bursts of edits are written once
+        self._flush_timer.start(self.flush_interval)
+    
+    @contextmanager
+    def transaction(self, label=None):
+        """Group several edits into one save
+        
+        Changes made inside the block are written with a single flush when the outermost
+        transaction commits, and are undone as a single step. If the block raises, the edits made
+        so far are undone from the transaction's journal entry and nothing is written.
+        
+        Args:
+            label (str, optional): Name of the undo step, defaults to the name of the first edit
+        
+        Usage:
+            with db.transaction():
+                for button_data in buttons:
+                    db.add_function_button(button_data)
+        """
+        if self._transaction_depth:
+            # Nested transactions join the outer one
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+        
+        # The edits themselves are rolled back from the journal, only the counters are kept
+        state = (
+            self.next_function_id,
+            self._dirty,
+            None if self._dirty_tab_ids is None else set(self._dirty_tab_ids),
+            self.mutation_count,
+            set(self._library_tab_ids),
+            set(self._hidden_library_tab_ids)
+        )
+        self._transaction_depth = 1
+        self._journal_group = {"label": label, "undo": [], "redo": []}
+        try:
+            yield self
+        except Exception:
+            group, self._journal_group = self._journal_group, None
+            self._rollback(group, state)
+            self._transaction_depth = 0
+            raise
+        
+        self._transaction_depth = 0
+        group, self._journal_group = self._journal_group, None
+        if group["redo"]:
+            self._push_journal_entry(group)
+        self._emit_events()
+        if self._dirty:
+            self.flush()
+    
+    def in_transaction(self):
+        """Return True while a transaction is open"""
+        return self._transaction_depth > 0
+    
+    def _rollback(self, group, state):
+        """Undo the edits journaled by a failed transaction and restore the state saved when it started"""
+        self._apply_journal_ops(group["undo"])
+        (next_function_id, self._dirty, self._dirty_tab_ids, self.mutation_count,
+         self._library_tab_ids, self._hidden_library_tab_ids) = state
+        # Nothing was emitted for the discarded edits
+        self._pending_events = {}
+        self.next_function_id = max(self.next_function_id, next_function_id)
+    
+    def can_undo(self):
+        """Return True if there is an edit to undo"""
+        return bool(self._undo_journal)
+    
+    def can_redo(self):
+        """Return True if there is an undone edit to redo"""
+        return bool(self._redo_journal)
+    
+    def undo(self):
+        """Undo the last edit
+        
+        Returns:
+            str or None: The name of the undone edit, or None if there was nothing to undo
+        """
+        if self._transaction_depth:
+            print("Cannot undo while a tool box transaction is open")
+            return None
+        if not self._undo_journal:
+            return None
+        
+        entry = self._undo_journal.pop()
+        self._apply_journal_ops(entry["undo"])
+        self._redo_journal.append(entry)
+        return entry["label"]
+    
+    def redo(self):
+        """Redo the last undone edit
+        
+        Returns:
+            str or None: The name of the redone edit, or None if there was nothing to redo
+        """
+        if self._transaction_depth:
+            print("Cannot redo while a tool box transaction is open")
+            return None
+        if not self._redo_journal:
+            return None
+        
+        entry = self._redo_journal.pop()
+        self._apply_journal_ops(entry["redo"])
+        self._undo_journal.append(entry)
+        return entry["label"]
+    
+    def clear_journal(self):
+        """Forget all undo and redo steps"""
+        self._undo_journal.clear()
+        self._redo_journal.clear()
+    
+    def set_journal_length(self, journal_length):
+        """Change how many edits can be undone, dropping the oldest steps if there are too many"""
+        self.journal_length = journal_length
+        self._undo_journal = deque(self._undo_journal, maxlen=journal_length)
+        self._redo_journal = deque(self._redo_journal, maxlen=journal_length)
     
-    def _load_consolidated_data_from_maya(self):
-        """Load the consolidated tool box data from Maya's defaultObjectSet"""
+    def _record_edit(self, label, undo_ops, redo_ops):
+        """Add an edit to the journal, or to the open transaction's journal entry"""
+        if self._journal_group is not None:
+            group = self._journal_group
+            if group["label"] is None:
+                group["label"] = label
+            # Undo the edits of a transaction in reverse order
+            group["undo"][0:0] = undo_ops
+            group["redo"].extend(redo_ops)
+            return
+        self._push_journal_entry({"label": label, "undo": undo_ops, "redo": redo_ops})
+    
+    def _push_journal_entry(self, entry):
+        """Add an entry to the undo journal. A new edit makes the undone edits unreachable."""
+        self._undo_journal.append(entry)
+        self._redo_journal.clear()
+    
+    def _record_fields_edit(self, label, item, record_id, before, after, tab_ids=None):
+        """Journal the fields of a tab or function button that changed between two versions of it
+        
+        Args:
+            item (str): 'tab' or 'button'
+            before: The record before the edit, a copy if the record was edited in place
+            after: The record after the edit
+            tab_ids (tuple, optional): For buttons, the IDs of the tab before and after the edit
+        """
+        undo_fields, redo_fields = field_changes(before, after)
+        if tab_ids is not None and tab_ids[0] != tab_ids[1]:
+            undo_fields["tab_id"], redo_fields["tab_id"] = tab_ids
+        if redo_fields:
+            self._record_edit(label, [(f"set_{item}_fields", record_id, undo_fields)],
+                              [(f"set_{item}_fields", record_id, redo_fields)])
+    
+    def _record_tabs_edit(self, label, old_tabs, new_tabs):
+        """Journal the difference between two versions of a set of tabs, see _tab_changes
+        
+        The records in old_tabs must not be live anymore, they are kept by the journal as they are.
+        """
+        self._record_edit(label, self._tab_changes(new_tabs, old_tabs, copy_inserted=False),
+                          self._tab_changes(old_tabs, new_tabs, copy_inserted=True))
+    
+    def _renumber_order(self, label, item, items):
+        """Renumber the order keys of tabs or of the buttons of a tab and journal their old keys
+        
+        Args:
+            item (str): 'tab' or 'button'
+            items (list): The tabs or buttons, in order
+        """
+        old_keys = [other["order"] for other in items]
+        renumber_order(items)
+        self._record_edit(label, [(f"set_{item}_fields", other["id"], {"order": old_key})
+                                  for other, old_key in zip(items, old_keys)],
+                          [(f"set_{item}_fields", other["id"], {"order": other["order"]}) for other in items])
+    
+    def _tab_changes(self, old_tabs, new_tabs, copy_inserted):
+        """Get the journal operations that turn old_tabs into new_tabs
+        
+        Added and removed tabs are journaled whole. Of the tabs in both lists only the fields that
+        changed are journaled, and their buttons are added, removed or changed one by one.
+        
+        Args:
+            copy_inserted (bool): Copy the tabs and buttons the operations insert, needed when they
+                are live records that can still change
+        
+        Returns:
+            list: The operations, for _apply_journal_ops
+        """
+        old_tabs_by_id = {tab["id"]: tab for tab in old_tabs}
+        new_tabs_by_id = {tab["id"]: tab for tab in new_tabs}
+        kept_tab_ids = [tab["id"] for tab in new_tabs if tab["id"] in old_tabs_by_id]
+        
+        # Buttons of added and removed tabs come and go with their tab
+        def kept_buttons(tabs_by_id):
+            return {button["id"]: (tab_id, button)
+                    for tab_id in kept_tab_ids for button in tabs_by_id[tab_id].get("buttons", [])}
+        old_buttons = kept_buttons(old_tabs_by_id)
+        new_buttons = kept_buttons(new_tabs_by_id)
+        copy_record = copy.deepcopy if copy_inserted else (lambda record: record)
+        
+        ops = [("remove_tab", tab["id"]) for tab in old_tabs if tab["id"] not in new_tabs_by_id]
+        ops += [("remove_button", button_id) for button_id in old_buttons if button_id not in new_buttons]
+        for tab_id in kept_tab_ids:
+            changes = field_changes(old_tabs_by_id[tab_id], new_tabs_by_id[tab_id])[1]
+            if changes:
+                ops.append(("set_tab_fields", tab_id, changes))
+        for button_id, (tab_id, button) in new_buttons.items():
+            old_tab_id, old_button = old_buttons.get(button_id, (None, None))
+            if old_button is None or old_button is button:
+                continue
+            changes = field_changes(old_button, button)[1]
+            if old_tab_id != tab_id:
+                changes["tab_id"] = tab_id
+            if changes:
+                ops.append(("set_button_fields", button_id, changes))
+        ops += [("insert_button", tab_id, copy_record(button))
+                for button_id, (tab_id, button) in new_buttons.items() if button_id not in old_buttons]
+        ops += [("insert_tab", copy_record(tab)) for tab in new_tabs if tab["id"] not in old_tabs_by_id]
+        return ops
+    
+    def _apply_journal_ops(self, ops):
+        """Apply journal operations to the data and schedule a save of the tabs they touched
+        
+        Tabs and buttons are put back at the position of their order key.
+        """
+        tabs = self.tool_box_data["tabs"]
+        changed_tab_ids = set()
+        resort_tabs = False
+        resort_tab_ids = set()
+        for op in ops:
+            kind = op[0]
+            if kind == "remove_tab":
+                tab = self._tabs_by_id.get(op[1])
+                if tab is not None:
+                    tabs.remove(tab)
+                    self._unindex_tab(tab)
+                    changed_tab_ids.add(op[1])
+                    self._queue_event("tab", op[1], "removed")
+            elif kind == "insert_tab":
+                tab = copy.deepcopy(op[1])
+                insert_by_order(tabs, tab, len(self.default_tabs))
+                self._index_tab(tab)
+                changed_tab_ids.add(tab["id"])
+                self._queue_event("tab", tab["id"], "added")
+            elif kind == "set_tab_fields":
+                tab = self._tabs_by_id.get(op[1])
+                if tab is None:
+                    print(f"Could not find tab with ID {op[1]}")
+                    continue
+                set_fields(tab, op[2])
+                resort_tabs = resort_tabs or "order" in op[2]
+                changed_tab_ids.add(op[1])
+                self._queue_event("tab", op[1], "updated")
+            elif kind == "remove_button":
+                button = self._buttons_by_id.pop(op[1], None)
+                if button is not None:
+                    tab_id = self._button_tab_ids.pop(op[1])
+                    self._tabs_by_id[tab_id]["buttons"].remove(button)
+                    changed_tab_ids.add(tab_id)
+                    self._queue_event("button", op[1], "removed", tab_id)
+            elif kind == "insert_button":
+                tab_id, button = op[1], op[2].copy()
+                tab = self._tabs_by_id.get(tab_id)
+                if tab is None:
+                    print(f"Could not find tab with ID {tab_id}")
+                    continue
+                insert_by_order(tab.setdefault("buttons", []), button)
+                self._buttons_by_id[button["id"]] = button
+                self._button_tab_ids[button["id"]] = tab_id
+                self.next_function_id = max(self.next_function_id, button["id"] + 1)
+                changed_tab_ids.add(tab_id)
+                self._queue_event("button", button["id"], "added", tab_id)
+            elif kind == "set_button_fields":
+                button = self._buttons_by_id.get(op[1])
+                if button is None:
+                    print(f"Could not find function button with ID {op[1]}")
+                    continue
+                source_tab_id = self._button_tab_ids[op[1]]
+                tab_id = op[2].get("tab_id", source_tab_id)
+                if tab_id is _DELETED:
+                    tab_id = source_tab_id
+                if tab_id not in self._tabs_by_id:
+                    print(f"Could not find tab with ID {tab_id}")
+                    continue
+                set_fields(button, op[2])
+                if tab_id != source_tab_id:
+                    self._tabs_by_id[source_tab_id]["buttons"].remove(button)
+                    insert_by_order(self._tabs_by_id[tab_id].setdefault("buttons", []), button)
+                    self._button_tab_ids[op[1]] = tab_id
+                elif "order" in op[2]:
+                    resort_tab_ids.add(tab_id)
+                changed_tab_ids.update((tab_id, source_tab_id))
+                self._queue_event("button", op[1], "updated", tab_id)
+        
+        # Records whose order keys changed one by one may have passed each other
+        key = lambda item: item["order"]
+        if resort_tabs:
+            tabs[len(self.default_tabs):] = sorted(tabs[len(self.default_tabs):], key=key)
+        for tab_id in resort_tab_ids:
+            if tab_id in self._tabs_by_id:
+                self._tabs_by_id[tab_id]["buttons"].sort(key=key)
+        
+        # Restored buttons may reference scripts that are no longer stored in the scene
+        self._script_refs_changed = True
+        if changed_tab_ids:
+            self._mark_dirty(*changed_tab_ids)
+    
+    def _journal_referenced_hashes(self):
+        """Get the hashes of the scripts referenced by buttons in the journal"""
+        buttons = []
+        for journal in (self._undo_journal, self._redo_journal):
+            for entry in journal:
+                for op in entry["undo"] + entry["redo"]:
+                    if op[0] == "insert_button":
+                        buttons.append(op[2])
+                    elif op[0] == "insert_tab":
+                        buttons.extend(op[1].get("buttons", []))
+                    elif op[0] == "set_button_fields":
+                        buttons.append({key: value for key, value in op[2].items() if value is not _DELETED})
+        return SS.referenced_hashes(buttons)
+    
+    def _queue_event(self, item, item_id, change, tab_id=None):
+        """Queue a change event, combining it with a pending event for the same tab or button
+        
+        Args:
+            item (str): 'tab' or 'button'
+            item_id (int): ID of the tab or function button
+            change (str): 'added', 'removed' or 'updated'
+            tab_id (int, optional): For buttons, the ID of the tab that holds the button
+        """
+        key = (item, item_id)
+        pending = self._pending_events.get(key)
+        if pending is None:
+            self._pending_events[key] = (change, tab_id)
+        elif pending[0] == "added":
+            # Something added and removed again never existed as far as listeners know
+            if change == "removed":
+                del self._pending_events[key]
+            else:
+                self._pending_events[key] = ("added", tab_id)
+        elif pending[0] == "removed" and change == "added":
+            self._pending_events[key] = ("updated", tab_id)
+        else:
+            self._pending_events[key] = (change, tab_id)
+    
+    def _queue_tab_diff(self, old_tabs, new_tabs):
+        """Queue the events that turn old_tabs into new_tabs
+        
+        Buttons of added or removed tabs don't get their own events, they come and go with their tab.
+        """
+        old_tabs_by_id = {tab["id"]: tab for tab in old_tabs}
+        new_tabs_by_id = {tab["id"]: tab for tab in new_tabs}
+        
+        for tab_id in old_tabs_by_id:
+            if tab_id not in new_tabs_by_id:
+                self._queue_event("tab", tab_id, "removed")
+        for tab_id, tab in new_tabs_by_id.items():
+            old_tab = old_tabs_by_id.get(tab_id)
+            if old_tab is None:
+                self._queue_event("tab", tab_id, "added")
+                continue
+            old_fields = {key: value for key, value in old_tab.items() if key != "buttons"}
+            new_fields = {key: value for key, value in tab.items() if key != "buttons"}
+            # A tab whose buttons were reordered is updated as a whole
+            old_button_ids = [button["id"] for button in old_tab.get("buttons", [])]
+            new_button_ids = [button["id"] for button in tab.get("buttons", [])]
+            kept_button_ids = set(old_button_ids) & set(new_button_ids)
+            reordered = ([button_id for button_id in old_button_ids if button_id in kept_button_ids] !=
+                         [button_id for button_id in new_button_ids if button_id in kept_button_ids])
+            if old_fields != new_fields or reordered:
+                self._queue_event("tab", tab_id, "updated")
+        
+        old_buttons = {button["id"]: (tab["id"], button) for tab in old_tabs for button in tab.get("buttons", [])}
+        new_buttons = {button["id"]: (tab["id"], button) for tab in new_tabs for button in tab.get("buttons", [])}
+        for button_id, (tab_id, button) in old_buttons.items():
+            if button_id not in new_buttons and tab_id in new_tabs_by_id:
+                self._queue_event("button", button_id, "removed", tab_id)
+        for button_id, (tab_id, button) in new_buttons.items():
+            old_button = old_buttons.get(button_id)
+            if old_button is None:
+                if tab_id in old_tabs_by_id:
+                    self._queue_event("button", button_id, "added", tab_id)
+            elif old_button[0] != tab_id or old_button[1].to_json() != button.to_json():
+                if tab_id in old_tabs_by_id or old_button[0] in new_tabs_by_id:
+                    self._queue_event("button", button_id, "updated", tab_id)
+    
+    def _emit_events(self):
+        """Emit the queued change events, unless a transaction is open"""
+        if self._transaction_depth or not self._pending_events:
+            return
+        events, self._pending_events = self._pending_events, {}
+        for (item, item_id), (change, tab_id) in events.items():
+            signal = getattr(self.signals, f"{item}_{change}")
+            if item == "tab":
+                signal.emit(item_id)
+            else:
+                signal.emit(item_id, tab_id)
+    
+    def install_scene_callbacks(self):
+        """Flush pending changes before Maya saves the scene or replaces it, and load the new scene's data after"""
+        if self._scene_callback_ids:
+            return
+        
+        self._scene_callback_ids.extend([
+            om.MSceneMessage.addCallback(om.MSceneMessage.kBeforeSave, self._on_before_scene_save),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kBeforeOpen, self._on_before_scene_change),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kBeforeNew, self._on_before_scene_change),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self._on_after_scene_change),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew, self._on_after_scene_change)
+        ])
+    
+    def remove_scene_callbacks(self):
+        """Remove the scene callbacks installed by install_scene_callbacks"""
+        for callback_id in self._scene_callback_ids:
+            try:
+                om.MMessage.removeCallback(callback_id)
+            except Exception as e:
+                print(f"Error removing tool box scene callback: {e}")
+        self._scene_callback_ids = []
+    
+    def _on_before_scene_save(self, *args):
+        """Scene callback that writes pending changes so they end up in the saved file"""
+        self.flush()
+    
+    def _on_before_scene_change(self, *args):
+        """Scene callback that writes pending changes to the current scene before it's replaced
+        
+        The flush timer is stopped, so it can't write this scene's data into the next one.
+        """
+        self.flush()
+        self._flush_timer.stop()
+        if self._dirty:
+            print("Error saving tool box data to Maya: changes made before the scene changed were not saved")
+            self._dirty = False
+            self._dirty_tab_ids = set()
+    
+    def _on_after_scene_change(self, *args):
+        """Scene callback that loads the data of the opened or new scene
+        
+        A window that stays alive between scenes would otherwise keep editing the previous
+        scene's data. load_database emits data_reset, so the UI follows.
+        """
+        self.load_database()
+    
+    def _save_consolidated_data_to_maya(self, tab_ids=None):
+        """Save the custom tabs to Maya's defaultObjectSet, one attribute per tab
+        
+        Only shards whose content hash changed are rewritten. A manifest attribute stores
+        the tab order and the hash of every shard.
+        
+        Args:
+            tab_ids (set, optional): IDs of the tabs that may have changed. If None, every tab is checked.
+        """
         try:
             # Check if defaultObjectSet exists
             if not cmds.objExists('defaultObjectSet'):
                 return False
-                
-            # Check if the attribute exists
-            if not cmds.attributeQuery(self.data_attribute_name, node='defaultObjectSet', exists=True):
-                return False
             
-            # Get the attribute value
-            data_json = cmds.getAttr(f'defaultObjectSet.{self.data_attribute_name}')
+            # Write new script bodies first so shards never reference a missing script
+            if self._script_refs_changed:
+                # Scripts of buttons that can be restored by undo or redo are kept too
+                library_buttons = [button for button_id, button in self._buttons_by_id.items()
+                                   if self._button_tab_ids[button_id] in self._library_tab_ids]
+                library_referenced = SS.referenced_hashes(library_buttons)
+                referenced = SS.referenced_hashes(self._buttons_by_id.values()) - library_referenced
+                self.script_store.flush(referenced | (self._journal_referenced_hashes() - library_referenced))
+                self._script_refs_changed = False
+            else:
+                self.script_store.flush()
             
-            # Check if the JSON string is empty or invalid
-            if not data_json or data_json.strip() == '':
-                return False
-                
-            # Convert the JSON string to a Python object
-            loaded_data = json.loads(data_json)
-            
-            # Validate the loaded data
-            if not isinstance(loaded_data, dict) or "tabs" not in loaded_data:
-                print("Invalid tool box data format in Maya")
-                return False
+            shard_hashes = dict(self._shard_hashes)
+            order = []
             
-            # Start with default tabs
-            self.tool_box_data = {"tabs": list(self.default_tabs)}
+            # Only save custom tabs (IDs > 2) that aren't unchanged user library tabs
+            for tab in self.tool_box_data["tabs"]:
+                if tab["id"] <= 2 or tab["id"] in self._library_tab_ids:
+                    continue
+                order.append(tab["id"])
+                
+                # Unchanged tabs that are already stored don't need to be serialized again
+                if tab_ids is not None and tab["id"] not in tab_ids and tab["id"] in shard_hashes:
+                    continue
+                
+                shard_json = json.dumps(tab.to_json())
+                shard_hash = hashlib.sha1(shard_json.encode('utf-8')).hexdigest()
+                if shard_hashes.get(tab["id"]) != shard_hash:
+                    self._set_string_attribute(self._shard_attribute_name(tab["id"]),
+                                               PC.encode_text(shard_json, compress=self.compress_payloads))
+                    self.shard_write_count += 1
+                shard_hashes[tab["id"]] = shard_hash
             
-            # Add custom tabs to the data structure
-            existing_ids = [tab["id"] for tab in self.tool_box_data["tabs"]]
-            for tab in loaded_data["tabs"]:
-                if tab["id"] not in existing_ids:
-                    self.tool_box_data["tabs"].append(tab)
+            # Remove the shards of deleted tabs
+            for tab_id in set(shard_hashes) - set(order):
+                self._delete_attribute(self._shard_attribute_name(tab_id))
+                del shard_hashes[tab_id]
             
+            manifest = {
+                "schema_version": SCHEMA_VERSION,
+                "order": order,
+                "shards": {str(tab_id): shard_hashes[tab_id] for tab_id in order},
+                "next_function_id": self.next_function_id
+            }
+            if self._hidden_library_tab_ids:
+                manifest["hidden_library_tabs"] = sorted(self._hidden_library_tab_ids)
+            manifest_json = json.dumps(manifest)
+            if manifest_json != self._manifest_json:
+                self._set_string_attribute(self.manifest_attribute_name,
+                                           PC.encode_text(manifest_json, compress=self.compress_payloads))
+                self._manifest_json = manifest_json
+            self._shard_hashes = shard_hashes
             return True
         except Exception as e:
-            print(f"Error loading tool box data from Maya: {e}")
+            print(f"Error saving tool box data to Maya: {e}")
             return False
-            
-    def _load_legacy_data_and_convert(self):
-        """Load legacy data format and convert to the new consolidated format"""
-        # Start with default tabs
-        self.tool_box_data = {"tabs": list(self.default_tabs)}
+    
+    def _load_consolidated_data_from_maya(self, manifest_json):
+        """Load custom tabs from the shards listed in the manifest
         
-        # Try to load custom toggle buttons
-        self._load_legacy_toggle_buttons()
+        Shards whose hash is in PARSED_TAB_CACHE, because they were parsed earlier in the
+        session, are neither read from the scene nor parsed again.
+        """
+        manifest_json = PC.decode_text(manifest_json)
+        manifest = json.loads(manifest_json)
         
-        # Try to load function buttons and associate them with tabs
-        self._load_legacy_function_buttons()
+        # Validate the manifest
+        if not isinstance(manifest, dict) or "order" not in manifest or "shards" not in manifest:
+            print("Invalid tool box manifest format in Maya")
+            return False
         
-        # Save in the new format
-        self._save_consolidated_data_to_maya()
+        if "next_function_id" in manifest:
+            self.tool_box_data["next_function_id"] = manifest["next_function_id"]
+        if "hidden_library_tabs" in manifest:
+            self.tool_box_data["hidden_library_tabs"] = manifest["hidden_library_tabs"]
         
-    def _load_legacy_toggle_buttons(self):
-        """Load custom toggle buttons from Maya's defaultObjectSet using legacy format"""
-        try:
-            # Check if defaultObjectSet exists
-            if not cmds.objExists('defaultObjectSet'):
-                return False
-                
-            # Check if the attribute exists
-            if not cmds.attributeQuery(self.toggle_attribute_name, node='defaultObjectSet', exists=True):
-                return False
-            
-            # Get the attribute value
-            toggle_buttons_json = cmds.getAttr(f'defaultObjectSet.{self.toggle_attribute_name}')
-            
-            # Check if the JSON string is empty or invalid
-            if not toggle_buttons_json or toggle_buttons_json.strip() == '':
-                return False
-                
-            # Convert the JSON string to a Python object
-            custom_buttons = json.loads(toggle_buttons_json)
-            
-            # Validate the loaded data
-            if not isinstance(custom_buttons, list):
-                print("Invalid toggle button data format in Maya")
-                return False
+        shard_hashes = {}
+        existing_ids = set(tab["id"] for tab in self.tool_box_data["tabs"])
+        for tab_id in manifest["order"]:
+            shard_hash = manifest["shards"].get(str(tab_id))
+            tab = PARSED_TAB_CACHE.get(shard_hash) if shard_hash else None
+            if tab is None:
+                shard_json = self._get_string_attribute(self._shard_attribute_name(tab_id))
+                if not shard_json:
+                    print(f"Missing tool box data for tab {tab_id}")
+                    continue
+                shard_json = PC.decode_text(shard_json)
+                shard = json.loads(shard_json)
+                if not isinstance(shard, dict) or not isinstance(shard.get("id"), int):
+                    print(f"Invalid tool box data for tab {tab_id}")
+                    continue
+                tab = RC.TabRecord.from_json(shard)
+                if shard_hash:
+                    PARSED_TAB_CACHE.put(shard_hash, tab)
             
-            # Add custom tabs to the data structure
-            existing_ids = [tab["id"] for tab in self.tool_box_data["tabs"]]
-            for btn in custom_buttons:
-                if btn["id"] not in existing_ids:
-                    # Convert legacy button to new tab format
-                    tab = dict(btn)
-                    tab["buttons"] = []  # Add empty buttons array
-                    self.tool_box_data["tabs"].append(tab)
+            if tab["id"] in existing_ids:
+                continue
+            self.tool_box_data["tabs"].append(tab)
+            existing_ids.add(tab["id"])
+            shard_hashes[tab_id] = shard_hash
+        
+        self._shard_hashes = shard_hashes
+        self._manifest_json = manifest_json
+        
+        # Scenes written by an older version of the sharded layout still need migrating
+        schema_version = manifest.get("schema_version", 2)
+        if schema_version > SCHEMA_VERSION:
+            print(f"Tool box data was saved with a newer schema version ({schema_version})")
+        elif schema_version < SCHEMA_VERSION:
+            custom_tabs = [tab for tab in self.tool_box_data["tabs"] if tab["id"] > 2]
+            migrated = migrate_data({"tabs": custom_tabs}, schema_version)
+            self._adopt_migrated_scripts(migrated)
+            self.tool_box_data["tabs"] = (list(self.default_tabs) +
+                                          [RC.TabRecord.from_json(tab) for tab in migrated["tabs"]])
+            self._mark_dirty()
+        return True
+    
+    def _migrate_stored_data(self):
+        """Load data saved before the sharded layout, migrate it and save it in the current schema
+        
+        The manifest written at the end marks the scene as migrated, so this only ever runs once
+        per scene, including for empty scenes and scenes whose old data can't be read.
+        """
+        from_version = None
+        data = None
+        migration_error = None
+        try:
+            data = self._read_consolidated_data()
+            if data is not None:
+                from_version = 1
+            else:
+                data = self._read_legacy_data()
+                if data is not None:
+                    from_version = 0
             
-            return True
+            if data is not None:
+                data = migrate_data(data, from_version)
         except Exception as e:
-            print(f"Error loading legacy toggle button data from Maya: {e}")
+            # Leave the unreadable attributes in place so the data can still be recovered by hand
+            print(f"Error migrating tool box data in Maya: {e}")
+            migration_error = str(e)
+            data = None
+        
+        if data is not None:
+            self._adopt_migrated_scripts(data)
+            if "next_function_id" in data:
+                self.tool_box_data["next_function_id"] = data["next_function_id"]
+            existing_ids = [tab["id"] for tab in self.tool_box_data["tabs"]]
+            for tab in data["tabs"]:
+                if tab["id"] not in existing_ids:
+                    self.tool_box_data["tabs"].append(RC.TabRecord.from_json(tab))
+        
+        # Nothing is stored as shards yet, the save writes all of them along with the manifest
+        self._shard_hashes = {}
+        self._manifest_json = None
+        self._rebuild_index()
+        if not self._save_consolidated_data_to_maya():
             return False
+        
+        if migration_error is not None:
+            # Record the failure in the manifest so it is visible when inspecting the scene
+            manifest = json.loads(self._manifest_json)
+            manifest["migration_error"] = migration_error
+            self._set_string_attribute(self.manifest_attribute_name, json.dumps(manifest))
+        elif from_version == 1:
+            # The consolidated attribute is superseded by the shards, don't leave a stale copy behind
+            self._delete_attribute(self.data_attribute_name)
+        return True
     
-    def _load_legacy_function_buttons(self):
-        """Load function buttons from Maya's defaultObjectSet using legacy format and associate with tabs"""
-        try:
-            # Check if defaultObjectSet exists
-            if not cmds.objExists('defaultObjectSet'):
-                return False
-                
-            # Check if the attribute exists
-            if not cmds.attributeQuery(self.function_attribute_name, node='defaultObjectSet', exists=True):
-                return False
+    def _adopt_migrated_scripts(self, data):
+        """Add the script bodies collected by the migrations to the script store"""
+        for script in data.pop("scripts", {}).values():
+            self.script_store.put(script)
+    
+    def _read_consolidated_data(self):
+        """Read the single consolidated attribute used before sharding (schema version 1)
+        
+        Returns:
+            dict or None: The stored data, or None if the attribute doesn't exist or is empty
+        
+        Raises:
+            ValueError: If the attribute can't be parsed
+        """
+        # Get the attribute value
+        data_json = self._get_string_attribute(self.data_attribute_name)
+        
+        # Check if the JSON string is empty
+        if not data_json or data_json.strip() == '':
+            return None
             
-            # Get the attribute value
-            function_buttons_json = cmds.getAttr(f'defaultObjectSet.{self.function_attribute_name}')
+        # Convert the stored payload (compressed envelope or plain JSON) to a Python object
+        loaded_data = PC.decode(data_json)
+        
+        # Validate the loaded data
+        if not isinstance(loaded_data, dict) or "tabs" not in loaded_data:
+            raise ValueError("Invalid tool box data format in Maya")
+        return loaded_data
+    
+    def _read_legacy_data(self):
+        """Read the separate toggle and function button attributes (schema version 0)
+        
+        Returns:
+            dict or None: The stored button lists, or None if neither attribute has data
+        
+        Raises:
+            ValueError: If an attribute can't be parsed
+        """
+        data = {}
+        for key, attribute_name in (("toggle_buttons", self.toggle_attribute_name),
+                                    ("function_buttons", self.function_attribute_name)):
+            buttons_json = self._get_string_attribute(attribute_name)
+            
+            # Check if the JSON string is empty
+            if not buttons_json or buttons_json.strip() == '':
+                continue
             
-            # Check if the JSON string is empty or invalid
-            if not function_buttons_json or function_buttons_json.strip() == '':
-                return False
-                
             # Convert the JSON string to a Python object
-            function_buttons = json.loads(function_buttons_json)
+            buttons = json.loads(buttons_json)
             
             # Validate the loaded data
-            if not isinstance(function_buttons, list):
-                print("Invalid function button data format in Maya")
-                return False
-            
-            # Associate function buttons with their tabs
-            for btn in function_buttons:
-                if "tab_id" in btn:
-                    tab_id = btn["tab_id"]
-                    # Find the tab with this ID
-                    for tab in self.tool_box_data["tabs"]:
-                        if tab["id"] == tab_id:
-                            # Add the function button to the tab
-                            tab["buttons"].append(btn)
-                            break
-            
-            return True
-        except Exception as e:
-            print(f"Error loading legacy function button data from Maya: {e}")
-            return False
+            if not isinstance(buttons, list):
+                raise ValueError(f"Invalid {attribute_name} data format in Maya")
+            data[key] = buttons
+        
+        return data or None
     
+    def _shard_attribute_name(self, tab_id):
+        """Get the name of the attribute that stores a tab's shard"""
+        return f"{self.shard_attribute_prefix}{tab_id}"
+    
+    def _get_string_attribute(self, attribute_name):
+        """Get a string attribute from defaultObjectSet, or None if it doesn't exist"""
+        if not cmds.attributeQuery(attribute_name, node='defaultObjectSet', exists=True):
+            return None
+        return cmds.getAttr(f'defaultObjectSet.{attribute_name}')
+    
+    def _set_string_attribute(self, attribute_name, value):
+        """Set a string attribute on defaultObjectSet, creating it if it doesn't exist"""
+        if not cmds.attributeQuery(attribute_name, node='defaultObjectSet', exists=True):
+            cmds.addAttr('defaultObjectSet', longName=attribute_name, dataType='string')
+        cmds.setAttr(f'defaultObjectSet.{attribute_name}', value, type='string')
+    
+    def _delete_attribute(self, attribute_name):
+        """Delete an attribute from defaultObjectSet if it exists"""
+        if cmds.attributeQuery(attribute_name, node='defaultObjectSet', exists=True):
+            cmds.deleteAttr(f'defaultObjectSet.{attribute_name}')
+            
     def get_toggle_buttons(self):
         """Get all toggle buttons (tabs)"""
         return self.tool_box_data["tabs"]
     
+    def get_tab(self, tab_id):
+        """Get a tab by its ID, or None if it doesn't exist"""
+        return self._tabs_by_id.get(tab_id)
+    
+    def get_function_button(self, button_id):
+        """Get a function button by its ID, or None if it doesn't exist"""
+        return self._buttons_by_id.get(button_id)
+    
+    def get_tab_id_for_function_button(self, button_id):
+        """Get the ID of the tab that holds a function button, or None if it doesn't exist"""
+        return self._button_tab_ids.get(button_id)
+    
+    def get_script(self, script_key):
+        """Get a script body by its hash"""
+        return self.script_store.get(script_key)
+    
+    def get_function_button_script(self, button_id):
+        """Get the script a function button runs"""
+        button = self._buttons_by_id.get(button_id)
+        if button is None:
+            return ""
+        return self.script_store.get(button.get(SS.hash_field("script"), ""))
+    
+    def get_hydrated_function_button(self, button_id):
+        """Get a copy of a function button with its script bodies filled in, or None
+        
+        The copy has the 'script', 'python_code' and 'mel_code' fields the Script Manager edits.
+        Pass it back to update_function_button to save changes.
+        """
+        button = self._buttons_by_id.get(button_id)
+        if button is None:
+            return None
+        return SS.inline_scripts(button, self.script_store.get)
+    
+    def export_tabs(self):
+        """Get copies of all tabs with the script bodies inlined, for writing to a file"""
+        return list(self.iter_export_tabs())
+    
+    def iter_export_tabs(self, tab_ids=None):
+        """Get copies of tabs with the script bodies inlined one at a time, for streaming to a file
+        
+        Args:
+            tab_ids (iterable, optional): IDs of the tabs to export, all tabs if None
+        """
+        selected = None if tab_ids is None else set(tab_ids)
+        for tab in list(self.tool_box_data["tabs"]):
+            if selected is not None and tab["id"] not in selected:
+                continue
+            tab_copy = dict(tab)
+            tab_copy["buttons"] = [SS.inline_scripts(button, self.script_store.get)
+                                   for button in tab.get("buttons", [])]
+            yield tab_copy
+    
     def get_function_buttons(self):
         """Get all function buttons (flattened list from all tabs)"""
         all_buttons = []
@@ -249,29 +1338,108 @@ class ToggleButtonDatabase:
     
     def get_function_buttons_for_tab(self, tab_id):
         """Get function buttons for a specific tab"""
-        for tab in self.tool_box_data["tabs"]:
-            if tab["id"] == tab_id and "buttons" in tab:
-                return tab["buttons"]
-        return []
+        tab = self._tabs_by_id.get(tab_id)
+        if tab is None:
+            return []
+        return tab.get("buttons", [])
+    
+    def get_function_button_index(self, button_id):
+        """Get the position of a function button in its tab
+        
+        Returns:
+            int or None: The index, or None if the button does not exist
+        """
+        button = self._buttons_by_id.get(button_id)
+        if button is None:
+            return None
+        return index_by_order(self._tabs_by_id[self._button_tab_ids[button_id]]["buttons"], button)
     
     def get_next_id(self):
         """Get the next available ID for toggle buttons (tabs)"""
-        if not self.tool_box_data["tabs"]:
+        if not self._tabs_by_id:
             return 0
         
         # Find the highest ID and add 1
-        max_id = max(tab["id"] for tab in self.tool_box_data["tabs"])
-        return max_id + 1
+        return max(self._tabs_by_id) + 1
     
     def get_next_function_id(self):
-        """Get the next available ID for function buttons"""
-        all_buttons = self.get_function_buttons()
-        if not all_buttons:
-            return 0
+        """Get the next available ID for function buttons
         
-        # Find the highest ID and add 1
-        max_id = max(btn["id"] for btn in all_buttons) if all_buttons else -1
-        return max_id + 1  
+        IDs come from a monotonic counter, so an ID is never reused after its button is removed.
+        """
+        return self.next_function_id
+    
+    def set_custom_tabs(self, tabs):
+        """Replace all custom tabs (IDs > 2) with the given tabs, keeping the default tabs"""
+        old_tabs = [tab for tab in self.tool_box_data["tabs"] if tab["id"] > 2]
+        # Library tabs that aren't replaced must not come back when the scene is opened again
+        self._hidden_library_tab_ids.update(self._get_user_library_tab_ids() -
+                                            set(tab["id"] for tab in tabs))
+        self.tool_box_data["tabs"] = list(self.default_tabs)
+        existing_ids = set(tab["id"] for tab in self.tool_box_data["tabs"])
+        for tab in tabs:
+            if tab["id"] > 2 and tab["id"] not in existing_ids:
+                tab = RC.to_tab_record(tab)
+                normalize_order(tab.setdefault("buttons", []))
+                self._externalize_tab_scripts(tab)
+                self.tool_box_data["tabs"].append(tab)
+                existing_ids.add(tab["id"])
+        custom_tabs = self.tool_box_data["tabs"][len(self.default_tabs):]
+        normalize_order(custom_tabs)
+        self.tool_box_data["tabs"][len(self.default_tabs):] = custom_tabs
+        
+        self._script_refs_changed = True
+        self._rebuild_index()
+        current_tabs = [tab for tab in self.tool_box_data["tabs"] if tab["id"] > 2]
+        self._queue_tab_diff(old_tabs, current_tabs)
+        self._record_tabs_edit("Replace Tabs", old_tabs, current_tabs)
+        self._mark_dirty()
+    
+    def import_tabs(self, tabs, replace=False):
+        """Add tabs read from a library file, as a single undo step
+        
+        Tabs are added as they are read, so the file never has to be in memory as a whole.
+        Imported tabs and buttons whose ID is already in use get a new ID instead of being
+        dropped.
+        
+        Args:
+            tabs (iterable): Tabs with their buttons and inlined scripts, e.g. from
+                library_io.LibraryReader.iter_tabs
+            replace (bool): Remove all custom tabs before importing
+        
+        Returns:
+            dict: Imported tab ID -> the ID the tab was added under
+        """
+        tab_id_map = {}
+        with self.transaction("Import Tabs"):
+            if replace:
+                for tab in [tab for tab in self.tool_box_data["tabs"] if tab["id"] > 2]:
+                    self.remove_toggle_button(tab["id"])
+            
+            widget_names = set(tab.get("widget_name") for tab in self.tool_box_data["tabs"])
+            for tab in tabs:
+                tab = RC.TabRecord.from_json(tab)
+                imported_id = tab["id"]
+                if imported_id <= 2 or imported_id in self._tabs_by_id:
+                    tab["id"] = self.get_next_id()
+                # The UI finds tab pages by their widget name
+                if tab.get("widget_name") in widget_names or "widget_name" not in tab:
+                    tab["widget_name"] = f"custom_widget_{tab['id']}"
+                widget_names.add(tab["widget_name"])
+                
+                button_ids = set()
+                # Imported tabs go after the existing ones, their buttons keep their order
+                tab["order"] = self._next_tab_order()
+                for button in tab.setdefault("buttons", []):
+                    if button["id"] in self._buttons_by_id or button["id"] in button_ids:
+                        button["id"] = self.next_function_id
+                    self.next_function_id = max(self.next_function_id, button["id"] + 1)
+                    button_ids.add(button["id"])
+                    button["tab_id"] = tab["id"]
+                
+                self.add_toggle_button(tab)
+                tab_id_map[imported_id] = tab["id"]
+        return tab_id_map
     
     def add_toggle_button(self, button_data):
         """Add a toggle button (tab) to the database"""
@@ -279,25 +1447,43 @@ class ToggleButtonDatabase:
         if button_data["id"] <= 2:
             print(f"Cannot modify default button with ID {button_data['id']}")
             return False
-            
-        # Make sure the button data has a 'buttons' field
+        
+        button_data = RC.to_tab_record(button_data)
+        existing_tab = self._tabs_by_id.get(button_data["id"])
+        
+        # Preserve existing buttons if not provided in the new data
         if "buttons" not in button_data:
-            button_data["buttons"] = []
-            
-        # Check if a button with this ID already exists
-        for i, tab in enumerate(self.tool_box_data["tabs"]):
-            if tab["id"] == button_data["id"]:
-                # Preserve existing buttons if not provided in the new data
-                if "buttons" not in button_data and "buttons" in tab:
-                    button_data["buttons"] = tab["buttons"]
-                # Replace the existing tab
-                self.tool_box_data["tabs"][i] = button_data
-                self.save_database()
-                return True
-        
-        # Add the new tab
-        self.tool_box_data["tabs"].append(button_data)
-        self.save_database()
+            button_data["buttons"] = existing_tab.get("buttons", []) if existing_tab else []
+        normalize_order(button_data["buttons"])
+        self._externalize_tab_scripts(button_data)
+        
+        # Keep the position of an existing tab, new tabs go last
+        if "order" not in button_data:
+            button_data["order"] = existing_tab["order"] if existing_tab else self._next_tab_order()
+        
+        tabs = self.tool_box_data["tabs"]
+        if existing_tab is not None:
+            self._script_refs_changed = True
+            # Replace the existing tab
+            index = tabs.index(existing_tab)
+            if existing_tab.get("order") == button_data["order"]:
+                tabs[index] = button_data
+            else:
+                del tabs[index]
+                insert_by_order(tabs, button_data, len(self.default_tabs))
+            self._unindex_tab(existing_tab)
+        else:
+            # Add the new tab
+            insert_by_order(tabs, button_data, len(self.default_tabs))
+        
+        self._index_tab(button_data)
+        if existing_tab is not None:
+            self._queue_tab_diff([existing_tab], [button_data])
+        else:
+            self._queue_event("tab", button_data["id"], "added")
+        self._record_tabs_edit("Edit Tab" if existing_tab else "Add Tab",
+                               [existing_tab] if existing_tab else [], [button_data])
+        self._mark_dirty(button_data["id"])
         return True
         
     def add_function_button(self, button_data):
@@ -306,63 +1492,31 @@ class ToggleButtonDatabase:
         if "tab_id" not in button_data:
             print("Function button must have a tab_id")
             return False
-            
-        tab_id = button_data["tab_id"]
         
-        # Find the tab for this button
-        tab_found = False
-        for tab in self.tool_box_data["tabs"]:
-            if tab["id"] == tab_id:
-                # Check if a button with this ID already exists in this tab
-                if "buttons" not in tab:
-                    tab["buttons"] = []
-                    
-                for i, btn in enumerate(tab["buttons"]):
-                    if btn["id"] == button_data["id"]:
-                        # Replace the existing button
-                        tab["buttons"][i] = button_data
-                        self.save_database()
-                        return True
-                
-                # Add the new button to this tab
-                tab["buttons"].append(button_data)
-                tab_found = True
-                break
-        
-        if not tab_found:
-            print(f"Could not find tab with ID {tab_id}")
-            return False
-            
-        self.save_database()
-        return True
+        return self._store_function_button(button_data)
     
     def update_function_button(self, button_data):
         """Update a function button in the database"""
-        button_id = button_data["id"]
-        tab_id = button_data["tab_id"]
+        return self._store_function_button(button_data)
+    
+    def update_function_button_fields(self, button_id, **fields):
+        """Update individual fields of a function button, e.g. text or color
         
-        # Find the tab for this button
-        for tab in self.tool_box_data["tabs"]:
-            if tab["id"] == tab_id:
-                if "buttons" not in tab:
-                    tab["buttons"] = []
-                    
-                # Find the button with this ID
-                for i, btn in enumerate(tab["buttons"]):
-                    if btn["id"] == button_id:
-                        # Update the button data
-                        tab["buttons"][i] = button_data
-                        self.save_database()
-                        return True
-                
-                # Button not found in this tab, add it
-                tab["buttons"].append(button_data)
-                self.save_database()
-                return True
-                
-        # Tab not found
-        print(f"Could not find tab with ID {tab_id}")
-        return False
+        Returns:
+            bool: True if the button exists and was updated
+        """
+        button = self._buttons_by_id.get(button_id)
+        if button is None:
+            return False
+        
+        before = button.copy()
+        button.update(fields)
+        if SS.externalize_scripts(button, self.script_store.put):
+            self._script_refs_changed = True
+        self._record_fields_edit("Edit Button", "button", button_id, before, button)
+        self._queue_event("button", button_id, "updated", self._button_tab_ids[button_id])
+        self._mark_dirty(self._button_tab_ids[button_id])
+        return True
     
     def remove_toggle_button(self, button_id):
         """Remove a toggle button (tab) from the database"""
@@ -370,22 +1524,209 @@ class ToggleButtonDatabase:
         if button_id <= 2:
             print(f"Cannot remove default button with ID {button_id}")
             return False
-            
-        for i, tab in enumerate(self.tool_box_data["tabs"]):
-            if tab["id"] == button_id:
-                del self.tool_box_data["tabs"][i]
-                self.save_database()
-                return True
-        return False
+        
+        tab = self._tabs_by_id.get(button_id)
+        if tab is None:
+            return False
+        
+        if button_id in self._get_user_library_tab_ids():
+            # Don't bring the library tab back when the scene is opened again
+            self._hidden_library_tab_ids.add(button_id)
+        self.tool_box_data["tabs"].remove(tab)
+        self._unindex_tab(tab)
+        self._script_refs_changed = True
+        self._record_tabs_edit("Remove Tab", [tab], [])
+        self._queue_event("tab", button_id, "removed")
+        self._mark_dirty(button_id)
+        return True
 
     def remove_function_button(self, button_id):
         """Remove a function button from the database"""
-        # Find the button in all tabs
-        for tab in self.tool_box_data["tabs"]:
-            if "buttons" in tab:
-                for i, button in enumerate(tab["buttons"]):
-                    if button["id"] == button_id:
-                        del tab["buttons"][i]
-                        self.save_database()
-                        return True
-        return False
+        button = self._buttons_by_id.pop(button_id, None)
+        if button is None:
+            return False
+        
+        tab_id = self._button_tab_ids.pop(button_id)
+        self._tabs_by_id[tab_id]["buttons"].remove(button)
+        self._script_refs_changed = True
+        self._record_edit("Remove Button", [("insert_button", tab_id, button)], [("remove_button", button_id)])
+        self._queue_event("button", button_id, "removed", tab_id)
+        self._mark_dirty(tab_id)
+        return True
+    
+    def _store_function_button(self, button_data):
+        """Insert or replace a function button in its tab and keep the indexes in sync
+        
+        The database stores its own copy of button_data, with the scripts moved to the script store.
+        """
+        button_data = RC.FunctionButtonRecord.from_json(button_data)
+        SS.externalize_scripts(button_data, self.script_store.put)
+        button_id = button_data["id"]
+        tab_id = button_data["tab_id"]
+        
+        tab = self._tabs_by_id.get(tab_id)
+        if tab is None:
+            print(f"Could not find tab with ID {tab_id}")
+            return False
+        
+        if "buttons" not in tab:
+            tab["buttons"] = []
+        
+        existing_button = self._buttons_by_id.get(button_id)
+        existing_tab_id = self._button_tab_ids.get(button_id)
+        
+        if existing_button is not None:
+            self._script_refs_changed = True
+        
+        # Keep the position of an existing button, new buttons and buttons moved to another tab go last
+        if "order" not in button_data:
+            if existing_button is not None and existing_tab_id == tab_id:
+                button_data["order"] = existing_button["order"]
+            else:
+                button_data["order"] = self._next_button_order(tab)
+        
+        if (existing_button is not None and existing_tab_id == tab_id and
+                existing_button.get("order") == button_data["order"]):
+            # Replace the existing button in place
+            index = tab["buttons"].index(existing_button)
+            tab["buttons"][index] = button_data
+        else:
+            if existing_button is not None:
+                # The button moved to another tab or position
+                self._tabs_by_id[existing_tab_id]["buttons"].remove(existing_button)
+            insert_by_order(tab["buttons"], button_data)
+        
+        self._buttons_by_id[button_id] = button_data
+        self._button_tab_ids[button_id] = tab_id
+        self.next_function_id = max(self.next_function_id, button_id + 1)
+        if existing_button is None:
+            self._record_edit("Add Button", [("remove_button", button_id)],
+                              [("insert_button", tab_id, button_data.copy())])
+        else:
+            self._record_fields_edit("Edit Button", "button", button_id, existing_button, button_data,
+                                     (existing_tab_id, tab_id))
+        self._queue_event("button", button_id, "updated" if existing_button else "added", tab_id)
+        if existing_tab_id is not None and existing_tab_id != tab_id:
+            self._mark_dirty(tab_id, existing_tab_id)
+        else:
+            self._mark_dirty(tab_id)
+        return True
+    
+    def move_tab(self, tab_id, index):
+        """Move a custom tab to another position among the custom tabs
+        
+        Only the moved tab's order key changes, unless its new neighbours have no room left
+        between their keys and the custom tabs are renumbered.
+        
+        Args:
+            tab_id (int): ID of the tab
+            index (int): Position among the other custom tabs
+        
+        Returns:
+            bool: True if the tab exists and was moved
+        """
+        tab = self._tabs_by_id.get(tab_id)
+        if tab is None or tab_id <= 2:
+            return False
+        
+        tabs = self.tool_box_data["tabs"]
+        custom_tabs = tabs[len(self.default_tabs):]
+        siblings = [other for other in custom_tabs if other is not tab]
+        index = max(0, min(index, len(siblings)))
+        key = order_key_between(siblings, index)
+        if key is None:
+            # Renumber the custom tabs and move the tab as a single undo step
+            with self.transaction("Move Tab"):
+                self._renumber_order("Move Tab", "tab", siblings)
+                for other in siblings:
+                    self._queue_event("tab", other["id"], "updated")
+                self._mark_dirty(*[other["id"] for other in siblings])
+                return self.move_tab(tab_id, index)
+        
+        self._record_edit("Move Tab", [("set_tab_fields", tab_id, {"order": tab["order"]})],
+                          [("set_tab_fields", tab_id, {"order": key})])
+        tabs.remove(tab)
+        tab["order"] = key
+        insert_by_order(tabs, tab, len(self.default_tabs))
+        self._queue_event("tab", tab_id, "updated")
+        self._mark_dirty(tab_id)
+        return True
+    
+    def move_function_button(self, button_id, index, tab_id=None):
+        """Move a function button to another position, in its tab or in another tab
+        
+        Only the moved button's order key changes, unless its new neighbours have no room left
+        between their keys and the buttons of the tab are renumbered.
+        
+        Args:
+            button_id (int): ID of the function button
+            index (int): Position among the other buttons of the tab
+            tab_id (int, optional): Tab to move the button to, defaults to its current tab
+        
+        Returns:
+            bool: True if the button and the tab exist and the button was moved
+        """
+        button = self._buttons_by_id.get(button_id)
+        if button is None:
+            return False
+        source_tab_id = self._button_tab_ids[button_id]
+        tab_id = source_tab_id if tab_id is None else tab_id
+        tab = self._tabs_by_id.get(tab_id)
+        if tab is None:
+            print(f"Could not find tab with ID {tab_id}")
+            return False
+        
+        siblings = [other for other in tab.setdefault("buttons", []) if other is not button]
+        index = max(0, min(index, len(siblings)))
+        key = order_key_between(siblings, index)
+        if key is None:
+            # Renumber the buttons of the tab and move the button as a single undo step
+            with self.transaction("Move Button"):
+                self._renumber_order("Move Button", "button", siblings)
+                self._queue_event("tab", tab_id, "updated")
+                self._mark_dirty(tab_id)
+                return self.move_function_button(button_id, index, tab_id)
+        
+        self._record_edit("Move Button",
+                          [("set_button_fields", button_id, {"order": button["order"], "tab_id": source_tab_id})],
+                          [("set_button_fields", button_id, {"order": key, "tab_id": tab_id})])
+        self._tabs_by_id[source_tab_id]["buttons"].remove(button)
+        button["order"] = key
+        button["tab_id"] = tab_id
+        insert_by_order(tab["buttons"], button)
+        self._button_tab_ids[button_id] = tab_id
+        self._queue_event("button", button_id, "updated", tab_id)
+        self._mark_dirty(tab_id, source_tab_id)
+        return True
+    
+    def _next_tab_order(self):
+        """Get the order key that puts a new custom tab after all the others"""
+        custom_tabs = self.tool_box_data["tabs"][len(self.default_tabs):]
+        return custom_tabs[-1]["order"] + ORDER_GAP if custom_tabs else ORDER_GAP
+    
+    def _next_button_order(self, tab):
+        """Get the order key that puts a new function button after the other buttons of a tab"""
+        buttons = tab.get("buttons", [])
+        return buttons[-1]["order"] + ORDER_GAP if buttons else ORDER_GAP
+    
+    def _externalize_tab_scripts(self, tab):
+        """Move the inline scripts of a tab's buttons to the script store"""
+        for button in tab.get("buttons", []):
+            SS.externalize_scripts(button, self.script_store.put)
+    
+    def _index_tab(self, tab):
+        """Add a tab and its function buttons to the indexes"""
+        self._tabs_by_id[tab["id"]] = tab
+        for button in tab.get("buttons", []):
+            self._buttons_by_id[button["id"]] = button
+            self._button_tab_ids[button["id"]] = tab["id"]
+            self.next_function_id = max(self.next_function_id, button["id"] + 1)
+    
+    def _unindex_tab(self, tab):
+        """Remove a tab and its function buttons from the indexes"""
+        if self._tabs_by_id.get(tab["id"]) is tab:
+            del self._tabs_by_id[tab["id"]]
+        for button in tab.get("buttons", []):
+            if self._button_tab_ids.get(button["id"]) == tab["id"]:
+                del self._buttons_by_id[button["id"]]
+                del self._button_tab_ids[button["id"]]
@@ -3,7 +3,7 @@ from functools import partial
 import maya.cmds as cmds
 from pathlib import Path
 import uuid
-import json
+from contextlib import contextmanager
 
 try:
     from PySide6 import QtWidgets, QtCore, QtGui
@@ -28,6 +28,13 @@ from . import create_shape as CSP
 from . import fade_away_logic as FA
 from . import custom_line_edit as CLE
 from . import toggle_db
+from . import library_sync as LS
+from . import records as RC
+from . import library_io as LIO
+from . import widget_pool as WP
+from . import window_drag as WD
+from . import window_state as WS
+from . import theme as TH
 
 class ToolBoxWindow(QtWidgets.QWidget):
     def __init__(self, parent=None, title="Tool Box"):
@@ -38,6 +45,7 @@ class ToolBoxWindow(QtWidgets.QWidget):
         # Setup dragging parameters
         self.dragging = False
         self.offset = None
+        self._system_move_tried = False
         
         # Setup resizing parameters
         self.resizing = False
@@ -47,6 +55,23 @@ class ToolBoxWindow(QtWidgets.QWidget):
         
         # Height threshold for determining layout orientation (in pixels)
         self.HEIGHT_THRESHOLD = 90
+        
+        # Resize work is coalesced: the window takes the latest requested geometry and lays out its
+        # pages at most once per display frame, and the orientation only changes once the size has
+        # stayed past the height threshold for ORIENTATION_SETTLE_DELAY milliseconds
+        self.RESIZE_FRAME_INTERVAL = 16
+        self.ORIENTATION_SETTLE_DELAY = 150
+        self.geometry_throttle = WD.GeometryThrottle(self, self.RESIZE_FRAME_INTERVAL)
+        # True while the window manager resizes the window, see window_drag.py
+        self._system_resizing = False
+        self._resize_layout_timer = QtCore.QTimer(self)
+        self._resize_layout_timer.setSingleShot(True)
+        self._resize_layout_timer.setInterval(self.RESIZE_FRAME_INTERVAL)
+        self._resize_layout_timer.timeout.connect(self._update_resize_layouts)
+        self._orientation_timer = QtCore.QTimer(self)
+        self._orientation_timer.setSingleShot(True)
+        self._orientation_timer.setInterval(self.ORIENTATION_SETTLE_DELAY)
+        self._orientation_timer.timeout.connect(self._settle_orientation)
 
         # Set minimum size to 70x30 as requested
         self.setMinimumSize(100, 70)
@@ -54,11 +79,53 @@ class ToolBoxWindow(QtWidgets.QWidget):
         
         # Initialize toggle button database
         self.toggle_db = toggle_db.ToggleButtonDatabase()
+        self.toggle_db.install_scene_callbacks()
         self.toggle_buttons = {}
         self.custom_widgets = {}
+        self.tab_pages = {}         # tab id -> its page in the stacked widget
+        self._header_tab_ids = []   # tab ids in the order of the header's toggle buttons
+        
+        # Pages are built the first time their tab is shown, until then the stacked widget
+        # holds an empty placeholder for them
+        self._placeholder_pages = {}  # tab id -> placeholder page
+        self.page_builders = {
+            "modeling_scroll_area": self._build_modeling_page,
+            "animation_scroll_area": self._build_animation_page,
+            "graph_scroll_area": self._build_graph_page
+        }
+        
+        # Build the page of the next tab while the tool box is idle, set to False to only build
+        # pages when they are shown
+        self.prefetch_pages = True
+        self._prefetch_timer = QtCore.QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(250)
+        self._prefetch_timer.timeout.connect(self._prefetch_next_page)
+        
+        # Batch mode state (see batch_mode)
+        self._batch_depth = 0
+        self._ui_rebuild_pending = False
+        
+        # Widgets created, destroyed and updated by the last reload, see _reconcile_ui
+        self.last_reconcile_stats = None
+        
+        # Function buttons taken out of a page are kept here and rebound when a page needs one
+        self.function_button_pool = WP.WidgetPool()
+        
+        # Hide the window instead of closing it, so it can be shown again without building it again (see main.py)
+        self.keep_alive = False
+        
+        # Restore the window state of the last session before the pages are built, so they are built
+        # once in its orientation
+        self.restore_window_state()
         
         self.setup_ui()
         self.setup_connections()
+        self._connect_database_signals()
+        
+        # One style sheet for every widget in the window, see theme.py
+        self._create_style_variants()
+        TH.THEME.attach(self)
 
         self.fade_manager = FA.FadeAway(self)
         self.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
@@ -98,17 +165,13 @@ class ToolBoxWindow(QtWidgets.QWidget):
         # Create main frame
         self.frame = QtWidgets.QFrame()
         # Define default frame style
-        self.default_frame_style = """
-            QFrame {background-color: rgba(36, 36, 36, .7);border: 1px solid #444444;border-radius: 4px;}
-        """
+        self.default_frame_style = TH.FRAME_RULES
         
         # Define resize frame style 
-        self.resize_frame_style = """
-            QFrame {background-color: rgba(36, 36, 36, .7);border: 1px solid #2f8cad;border-radius: 4px;}
-        """
+        self.resize_frame_style = TH.RESIZE_FRAME_RULES
         
         # Apply default style initially
-        self.frame.setStyleSheet(self.default_frame_style)
+        TH.apply_style(self.frame, self.default_frame_style, "QFrame")
         self.frame_layout = QtWidgets.QVBoxLayout(self.frame)
         self.frame_layout.setContentsMargins(6, 6, 6, 6)
         self.frame_layout.setSpacing(2)
@@ -120,6 +183,19 @@ class ToolBoxWindow(QtWidgets.QWidget):
         #self.util_button.addToMenu('Vertical', self.vertical_window, icon="loadToolBox.png", position=(2,0))
         self.util_button.addToMenu('Add Tab', self.add_toggle_button, icon="loadToolBox.png", position=(1,0))
         self.util_button.addToMenu('Remove Tab', self.remove_toggle_button, icon="loadToolBox.png", position=(2,0),color='#cc3333')
+        self.util_button.addToMenu('Undo', self.undo, icon="undo.png", position=(3,0))
+        self.util_button.addToMenu('Redo', self.redo, icon="redo.png", position=(4,0))
+        self.util_button.addToMenu('Save to Library', self.save_user_library, icon="loadToolBox.png", position=(5,0))
+        self.util_button.addToMenu('Import Data', self.import_data, icon="loadToolBox.png", position=(6,0))
+        self.util_button.addToMenu('Export Data', self.export_data, icon="loadToolBox.png", position=(7,0))
+        
+        # Undo/redo tool box edits while the tool box has focus
+        self.undo_shortcut = QShortcut(QtGui.QKeySequence("Ctrl+Z"), self)
+        self.undo_shortcut.setContext(QtCore.Qt.WidgetWithChildrenShortcut)
+        self.undo_shortcut.activated.connect(self.undo)
+        self.redo_shortcut = QShortcut(QtGui.QKeySequence("Ctrl+Shift+Z"), self)
+        self.redo_shortcut.setContext(QtCore.Qt.WidgetWithChildrenShortcut)
+        self.redo_shortcut.activated.connect(self.redo)
         
         # Track current layout orientation
         self.is_horizontal_layout = True
@@ -144,70 +220,60 @@ class ToolBoxWindow(QtWidgets.QWidget):
 
         self.body_header_layout.addStretch()
         
-        # Add toggle buttons to layout
-        for button_id in sorted(self.toggle_buttons.keys()):
+        # Add toggle buttons to layout in the database's tab order
+        self._header_tab_ids = self._ordered_tab_ids()
+        for button_id in self._header_tab_ids:
             self.body_header_layout.addWidget(self.toggle_buttons[button_id])
             
         self.body_header_layout.addSpacing(10)
         self.body_header_layout.addWidget(self.close_button)
 
-        # Initially check the first button to show the first widget
-        if 0 in self.toggle_buttons:
-            self.toggle_buttons[0].setChecked(True)
+        # Initially check the button of the tab shown in the last session, or the first button
+        initial_id = self._initial_tab_id if self._initial_tab_id in self.toggle_buttons else 0
+        if initial_id in self.toggle_buttons:
+            self.toggle_buttons[initial_id].setChecked(True)
         #-----------------------------------------------------------------------------------------------------------------------------
-        # Scrollbar style
-        def apply_transparent_scroll_style(widget):
-            widget.setStyleSheet("""
-                QScrollArea {
-                    background-color: transparent;
-                    border: none;
-                }
-                QScrollBar:horizontal {
-                    border: none;
-                    background: transparent;
-                    height: 8px;
-                    margin: 0px 0px 0px 0px;
-                }
-                QScrollBar::handle:horizontal {
-                    background: rgba(100, 100, 100, 0.5);
-                    min-width: 20px;
-                    border-radius: 0px;
-                }
-                QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {
-                    width: 0px;
-                }
-                QScrollBar:vertical {
-                    border: none;
-                    background: transparent;
-                    width: 8px;
-                    margin: 0px 0px 0px 0px;
-                }
-                QScrollBar::handle:vertical {
-                    background: rgba(100, 100, 100, 0.5);
-                    min-height: 20px;
-                    border-radius: 0px;
-                }
-                QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                    width: 0px;
-                }
-            """)
-        
-        def mrs(col):
-            self.reset_transform_button = CB.CustomButton(text='Reset', icon=':delete.png', color='#222222', size=14, tooltip="Resets the object transform to Origin.",
-                                                ContextMenu=True, onlyContext=True,cmColor='#444444',cmHeight=22)
-            self.reset_transform_button.addToMenu("All", TF.reset_all, icon='delete.png', position=(0,0))
-            self.reset_transform_button.addToMenu("Move", TF.reset_move, icon='delete.png', position=(1,0))
-            self.reset_transform_button.addToMenu("Rotate", TF.reset_rotate, icon='delete.png', position=(2,0))
-            self.reset_transform_button.addToMenu("Scale", TF.reset_scale, icon='delete.png', position=(3,0))
-            
-            self.reset_transform_button.doubleClicked.connect(TF.reset_all)
-            col.addWidget(self.reset_transform_button)
-            return col
+        # Stacked Widget
+        self.content_widget = QtWidgets.QStackedWidget()
+        TH.apply_style(self.content_widget, TH.PAGE_STACK_RULES, "QStackedWidget")
+        
+        # Add a placeholder page for every tab, pages are built when their tab is first shown
+        self.update_content_widget()
+        
+        # Add the content widget to the frame layout
+        self.frame_layout.addWidget(self.content_widget)
         #-----------------------------------------------------------------------------------------------------------------------------
-        # Modeling Widget
+        # Add the frame to the main layout
+        self.body_content_layout.addWidget(self.frame)
         #-----------------------------------------------------------------------------------------------------------------------------
+        # Enable mouse tracking for cursor changes during resize
+        self.setMouseTracking(True)
+        self.frame.setMouseTracking(True)
+        self.frame.installEventFilter(self)
+        
+        # Store the last height to detect changes that cross the threshold
+        self.last_height = self.height()
+    
+    #----------------------------------------------------------------------------------
+    # Default tab pages, built the first time their tab is shown
+    #----------------------------------------------------------------------------------
+    def _add_reset_transform_button(self, col):
+        """Add the Reset button shared by the default pages to a layout"""
+        self.reset_transform_button = CB.CustomButton(text='Reset', icon=':delete.png', color='#222222', size=14, tooltip="Resets the object transform to Origin.",
+                                            ContextMenu=True, onlyContext=True,cmColor='#444444',cmHeight=22)
+        self.reset_transform_button.addToMenu("All", TF.reset_all, icon='delete.png', position=(0,0))
+        self.reset_transform_button.addToMenu("Move", TF.reset_move, icon='delete.png', position=(1,0))
+        self.reset_transform_button.addToMenu("Rotate", TF.reset_rotate, icon='delete.png', position=(2,0))
+        self.reset_transform_button.addToMenu("Scale", TF.reset_scale, icon='delete.png', position=(3,0))
+        
+        self.reset_transform_button.doubleClicked.connect(TF.reset_all)
+        col.addWidget(self.reset_transform_button)
+        return col
+
+    def _build_modeling_page(self):
+        """Build the Modeling page and return its scroll area"""
         self.modeling_widget = QtWidgets.QWidget()
-        self.modeling_widget.setStyleSheet("background-color: rgba(36, 36, 36, 0);border:none;border-radius: 4px;")
+        TH.apply_style(self.modeling_widget, TH.PAGE_CONTENT_RULES, "QWidget")
         self.modeling_widget.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         # Initialize with dynamic horizontal priority based on height
         
@@ -234,6 +300,9 @@ class ToolBoxWindow(QtWidgets.QWidget):
         self.modeling_layout_04 = CL.CustomGridLayout(rows=1, cols=0)  
         self.modeling_layout.addLayout(self.modeling_layout_04)
         
+        # Arrange the layouts for the orientation before the buttons are added
+        self._orient_modeling_layouts(self.last_orientation)
+        
         # Create a custom scroll area for the modeling buttons with inverted wheel scrolling (vertical wheel = horizontal scroll)
         self.modeling_scroll_area = CS.CustomScrollArea(invert_primary=True)
         self.modeling_scroll_area.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
@@ -241,10 +310,10 @@ class ToolBoxWindow(QtWidgets.QWidget):
         self.modeling_scroll_area.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
         self.modeling_scroll_area.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
 
-        apply_transparent_scroll_style(self.modeling_scroll_area)
+        self._apply_transparent_scroll_style(self.modeling_scroll_area)
         self.modeling_scroll_area.setWidget(self.modeling_widget)
         #-----------------------------------------------------------------------------------------------------------------------------
-        mrs(self.modeling_layout_01)
+        self._add_reset_transform_button(self.modeling_layout_01)
         self.store_pos_button = CB.CustomButton(text='Store Pos', color='#16AAA6', tooltip="Store Position: Stores the position of selected Vertices, Edges or Faces. Double Click to make locator visible")
         self.move_to_pos_button = CB.CustomButton(text='Move to Pos', color='#D58C09', tooltip="Move to Position: Move selected object(s) to the stored position.")
 
@@ -319,7 +388,7 @@ class ToolBoxWindow(QtWidgets.QWidget):
         self.color_override_button = CB.ColorPickerButton()
         
         self.orient_frame = QtWidgets.QFrame()
-        self.orient_frame.setStyleSheet("background-color: #444444;")
+        TH.apply_style(self.orient_frame, TH.ORIENT_FRAME_RULES, "QFrame")
         self.orient_frame.setFixedHeight(24)
         self.orient_frame_layout = QtWidgets.QHBoxLayout(self.orient_frame)
         self.orient_frame_layout.setContentsMargins(2, 2, 2, 2)
@@ -329,15 +398,13 @@ class ToolBoxWindow(QtWidgets.QWidget):
         self.orient_dropdown.addItems(["X", "Y", "Z"])
         self.orient_dropdown.setCurrentText("X")
         #self.orient_dropdown.setFixedSize(20, 20)
-        self.orient_dropdown.setStyleSheet(f'''QComboBox{{background-color: {UT.rgba_value('#222222', 1,.9)}; color: #dddddd;border: 1px solid #2f2f2f; padding: 0px 0px 0px 5px;}}
-                                    QComboBox:hover {{background-color: {UT.rgba_value('#222222', .8,1)};}}
-                                    QComboBox::drop-down {{border: 0px;}}
-                                    QComboBox::down-arrow {{background-color: transparent;}} 
-                                    QToolTip {{background-color: #222222; color: white; border:0px;}} ''')
+        TH.apply_style(self.orient_dropdown, TH.ORIENT_DROPDOWN_RULES, "QComboBox")
 
         self.orient_input = CLE.IntegerLineEdit(width=30, height=20)
         self.orient_input.setValue(45)
-        self.orient_input.setStyleSheet(f'''QLineEdit{{border: 1px solid #2c83be;background-color: #222222;}}''')
+        # Drop the line edit's own style sheet, it would take precedence over the window's
+        self.orient_input.setStyleSheet("")
+        TH.apply_style(self.orient_input, TH.ORIENT_INPUT_RULES, "QLineEdit")
 
         self.orient_add_button = CB.CustomButton(text='+', color='#222222', tooltip="Add Orientation", width=20, height=20)
         self.orient_sub_button = CB.CustomButton(text='-', color='#222222', tooltip="Subtract Orientation", width=20, height=20)
@@ -394,13 +461,15 @@ class ToolBoxWindow(QtWidgets.QWidget):
         self.modeling_layout_04.addWidget(self.create_shape_button)
         self.modeling_layout_04.addWidget(self.color_override_button)
         self.modeling_layout_04.addWidget(self.orient_frame)
-        #-----------------------------------------------------------------------------------------------------------------------------
-        # Animation Widget
-        #-----------------------------------------------------------------------------------------------------------------------------
+        return self.modeling_scroll_area
+
+    def _build_animation_page(self):
+        """Build the Animation page and return its scroll area"""
         self.animation_widget = QtWidgets.QWidget()
-        self.animation_widget.setStyleSheet("background-color: rgba(36, 36, 36, 0);border:none;border-radius: 4px;")
+        TH.apply_style(self.animation_widget, TH.PAGE_CONTENT_RULES, "QWidget")
 
         self.animation_layout = QtWidgets.QHBoxLayout(self.animation_widget)
+        self.animation_layout.setDirection(self._box_direction(self.last_orientation))
         self.animation_layout.setSpacing(4)
         self.animation_layout.setContentsMargins(0, 0, 0, 0)
 
@@ -410,10 +479,10 @@ class ToolBoxWindow(QtWidgets.QWidget):
         self.animation_scroll_area.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
         self.animation_scroll_area.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
         
-        apply_transparent_scroll_style(self.animation_scroll_area)
+        self._apply_transparent_scroll_style(self.animation_scroll_area)
         self.animation_scroll_area.setWidget(self.animation_widget)
         #-----------------------------------------------------------------------------------------------------------------------------
-        mrs(self.animation_layout)
+        self._add_reset_transform_button(self.animation_layout)
 
         self.key_frame_button = CB.CustomButton(text='Key', color='#d62e22', tooltip="Sets key frame.")
         self.key_breakdown_button = CB.CustomButton(text='Key', color='#3fb07f', tooltip="Sets breakdown frame.")
@@ -433,48 +502,25 @@ class ToolBoxWindow(QtWidgets.QWidget):
         self.animation_layout.addWidget(self.remove_inbetween_button)
         self.animation_layout.addWidget(self.add_inbetween_button)
         self.animation_layout.addWidget(self.delete_key_button)
-        #-----------------------------------------------------------------------------------------------------------------------------
-        # Graph Widget
-        #-----------------------------------------------------------------------------------------------------------------------------
+        return self.animation_scroll_area
+
+    def _build_graph_page(self):
+        """Build the Graph page and return its scroll area"""
         self.graph_widget = QtWidgets.QWidget()
-        self.graph_widget.setStyleSheet("background-color: rgba(36, 36, 36, 0);border:none;border-radius: 4px;")
+        TH.apply_style(self.graph_widget, TH.PAGE_CONTENT_RULES, "QWidget")
         self.graph_widget.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
         self.graph_layout = QtWidgets.QHBoxLayout(self.graph_widget)
+        self.graph_layout.setDirection(self._box_direction(self.last_orientation))
         self.graph_layout.setSpacing(4)
         self.graph_layout.setContentsMargins(0, 0, 0, 0)
 
         self.graph_scroll_area = CS.CustomScrollArea(invert_primary=True)
         self.graph_scroll_area.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
-        apply_transparent_scroll_style(self.graph_scroll_area)
+        self._apply_transparent_scroll_style(self.graph_scroll_area)
         self.graph_scroll_area.setWidget(self.graph_widget)
         #-----------------------------------------------------------------------------------------------------------------------------
-        mrs(self.graph_layout)
-        #-----------------------------------------------------------------------------------------------------------------------------
-        # Stacked Widget
-        self.content_widget = QtWidgets.QStackedWidget()
-        self.content_widget.setStyleSheet("background-color: rgba(36, 36, 36, 0);border:none;border-radius: 0px;")
-        
-        # Store references to default widgets
-        self.custom_widgets["modeling_scroll_area"] = self.modeling_scroll_area
-        self.custom_widgets["animation_scroll_area"] = self.animation_scroll_area
-        self.custom_widgets["graph_scroll_area"] = self.graph_scroll_area
-        
-        # Add widgets to stacked widget based on database order
-        self.update_content_widget()
-        
-        # Add the content widget to the frame layout
-        self.frame_layout.addWidget(self.content_widget)
-        #-----------------------------------------------------------------------------------------------------------------------------
-        # Add the frame to the main layout
-        self.body_content_layout.addWidget(self.frame)
-        #-----------------------------------------------------------------------------------------------------------------------------
-        # Enable mouse tracking for cursor changes during resize
-        self.setMouseTracking(True)
-        self.frame.setMouseTracking(True)
-        self.frame.installEventFilter(self)
-        
-        # Store the last height to detect changes that cross the threshold
-        self.last_height = self.height()
+        self._add_reset_transform_button(self.graph_layout)
+        return self.graph_scroll_area
     
     def setup_connections(self):
         # Disconnect any existing connections first to avoid duplicates
@@ -488,14 +534,112 @@ class ToolBoxWindow(QtWidgets.QWidget):
         for button_id, button in self.toggle_buttons.items():
             button.toggled_with_id.connect(self.switch_widget)
         
-        # Set initial content widget
-        if self.toggle_buttons and 0 in self.toggle_buttons:
-            self.content_widget.setCurrentIndex(0)
+        # Set initial content widget, the page of the checked button
+        for button_id, button in self.toggle_buttons.items():
+            if button.isChecked():
+                self.switch_widget(True, button_id)
+                break
         
     def switch_widget(self, checked, button_id):
-        """Switch the current widget based on the toggle button ID"""
+        """Switch the current widget based on the toggle button ID, building its page if needed"""
         if checked:
-            self.content_widget.setCurrentIndex(button_id)
+            page = self._build_tab_page(button_id)
+            if page is not None:
+                self.content_widget.setCurrentWidget(page)
+            if self.prefetch_pages:
+                self._prefetch_timer.start()
+    
+    def _build_tab_page(self, tab_id):
+        """Replace the placeholder page of a tab with its real page
+        
+        Args:
+            tab_id (int): ID of the tab
+        
+        Returns:
+            QWidget: The page of the tab, or None if the tab has no page
+        """
+        placeholder = self._placeholder_pages.pop(tab_id, None)
+        if placeholder is None:
+            return self.tab_pages.get(tab_id)
+        
+        tab = self.toggle_db.get_tab(tab_id)
+        if tab is None:
+            self.content_widget.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.tab_pages.pop(tab_id, None)
+            return None
+        
+        widget_name = tab["widget_name"]
+        if widget_name not in self.custom_widgets:
+            builder = self.page_builders.get(widget_name)
+            if builder is not None:
+                # The builders lay the page out in the current orientation
+                self.custom_widgets[widget_name] = builder()
+            else:
+                self._create_empty_widget(tab_id, widget_name)
+        page = self.custom_widgets[widget_name]
+        
+        # Put the page where the placeholder was
+        was_current = self.content_widget.currentWidget() is placeholder
+        self.content_widget.insertWidget(self.content_widget.indexOf(placeholder), page)
+        if was_current:
+            self.content_widget.setCurrentWidget(page)
+        self.content_widget.removeWidget(placeholder)
+        placeholder.deleteLater()
+        self.tab_pages[tab_id] = page
+        
+        # Scroll to where the page was left in the last session
+        offset = self._saved_scroll_offsets.pop(tab_id, None)
+        if offset is not None and isinstance(page, QtWidgets.QAbstractScrollArea):
+            self._restore_scroll_offset(page, offset)
+        return page
+    
+    def _restore_scroll_offset(self, scroll_area, offset):
+        """Scroll a page to an offset once its scroll bars have a range
+        
+        The offset is clamped to the range of the page's first layout pass, as the tab may hold
+        fewer buttons than when the offset was saved.
+        
+        Args:
+            scroll_area (QAbstractScrollArea): The page
+            offset (tuple): (x, y) scroll bar values
+        """
+        for bar, value in ((scroll_area.horizontalScrollBar(), offset[0]), (scroll_area.verticalScrollBar(), offset[1])):
+            if value <= 0:
+                continue
+            if bar.maximum() > 0:
+                bar.setValue(min(value, bar.maximum()))
+                continue
+            
+            # The range is only known once the page is laid out
+            def apply_offset(minimum, maximum, bar=bar, value=value):
+                bar.rangeChanged.disconnect(apply_offset)
+                bar.setValue(min(value, maximum))
+            bar.rangeChanged.connect(apply_offset)
+    
+    def _prefetch_next_page(self):
+        """Build the page of the tab after the shown one, the tab most likely to be shown next"""
+        tab_ids = self._ordered_tab_ids()
+        current_id = self._get_current_tab_id()
+        if current_id not in tab_ids:
+            return
+        index = tab_ids.index(current_id)
+        for tab_id in tab_ids[index + 1:index + 2] + tab_ids[max(index - 1, 0):index]:
+            if tab_id in self._placeholder_pages:
+                self._build_tab_page(tab_id)
+                return
+    
+    def _get_current_tab_id(self):
+        """Get the ID of the tab whose page is shown, or None"""
+        current_page = self.content_widget.currentWidget()
+        for tab_id, page in self.tab_pages.items():
+            if page is current_page:
+                return tab_id
+        return None
+    
+    def _ordered_tab_ids(self):
+        """Get the IDs of the tabs that have a toggle button, in the database's tab order"""
+        return [tab["id"] for tab in self.toggle_db.get_toggle_buttons() if tab["id"] in self.toggle_buttons]
     
     def clear_layout(self, layout):
         """Remove all widgets from the given layout."""
@@ -514,50 +658,8 @@ class ToolBoxWindow(QtWidgets.QWidget):
         self.setGeometry(x, y, window_width, window_height)
         self.last_height = window_height
         
-        # Set all layouts to horizontal direction
-        self.modeling_layout.setDirection(QtWidgets.QBoxLayout.LeftToRight)
-        self.modeling_layout.setAlignment(QtCore.Qt.AlignCenter)
-        self.modeling_layout_01.setDirection(QtWidgets.QBoxLayout.LeftToRight)
-        self.animation_layout.setDirection(QtWidgets.QBoxLayout.LeftToRight)
-        self.graph_layout.setDirection(QtWidgets.QBoxLayout.LeftToRight)
-        
-        # Rearrange grid to horizontal pattern (all in one row)
-        
-        # Configure grid layouts for horizontal arrangement
-        self.modeling_layout_02.grid(1, 0)  
-        self.modeling_layout_03.grid(1, 0)  
-        self.modeling_layout_04.grid(1, 0)  
-        
-        # Clear existing layouts
-        self.modeling_layout_02.clear()
-        self.modeling_layout_03.clear()
-        self.modeling_layout_04.clear()
-                
-        # Add widgets to the layouts - positions are automatically calculated
-        self.modeling_layout_02.addWidget(self.store_pos_button)
-        self.modeling_layout_02.addWidget(self.move_to_pos_button)
-        self.modeling_layout_02.addWidget(self.parent_constraint_button)
-        self.modeling_layout_02.addWidget(self.adjustment_grp_button)
-        
-
-        self.modeling_layout_03.addWidget(self.centerPivot_button)
-        self.modeling_layout_03.addWidget(self.deleteHistory_button)
-        self.modeling_layout_03.addWidget(self.freezeTransform_button)
-        self.modeling_layout_03.addWidget(self.anim_extra)
-        self.modeling_layout_03.addWidget(self.active_to_selected_button)
-        self.modeling_layout_03.addWidget(self.pivot_to_world_button)
-        self.modeling_layout_03.addWidget(self.pivot_to_selected_button)
-        self.modeling_layout_03.addWidget(self.object_to_world_button)
-        
-        self.modeling_layout_04.addWidget(self.create_shape_button)
-        self.modeling_layout_04.addWidget(self.color_override_button)
-        # Force layout update
-        self.modeling_widget.updateGeometry()
-        self.modeling_scroll_area.updateGeometry()
-        self.animation_widget.updateGeometry()
-        self.animation_scroll_area.updateGeometry()
-        self.graph_widget.updateGeometry()
-        self.graph_scroll_area.updateGeometry()
+        # Set the layouts of the built default pages to horizontal direction
+        self._update_default_page_layouts(True)
 
         #UT.maya_main_window().activateWindow()
         
@@ -570,53 +672,55 @@ class ToolBoxWindow(QtWidgets.QWidget):
         self.setGeometry(x, y, window_width, window_height)
         self.last_height = window_height
         
-        # Set layouts to vertical direction
-        self.modeling_layout.setDirection(QtWidgets.QBoxLayout.TopToBottom)
-        self.modeling_layout.setAlignment(QtCore.Qt.AlignCenter | QtCore.Qt.AlignTop)
-        self.modeling_layout_01.setDirection(QtWidgets.QBoxLayout.TopToBottom)
-        self.animation_layout.setDirection(QtWidgets.QBoxLayout.TopToBottom)
-        self.graph_layout.setDirection(QtWidgets.QBoxLayout.TopToBottom)
-        
-        # Rearrange grid to vertical pattern
-        
-        # Configure grid layouts for vertical arrangement
-        self.modeling_layout_02.grid(0, 1)  # 5 rows, 1 column
-        self.modeling_layout_03.grid(0, 4)  # 2 rows, 4 columns
-        self.modeling_layout_04.grid(0, 1)  # 2 rows, 4 columns
-        
-        # Clear existing layouts
-        self.modeling_layout_02.clear()
-        self.modeling_layout_03.clear()
-        self.modeling_layout_04.clear()
-        
-        # Add widgets to the layouts - positions are automatically calculated
-        self.modeling_layout_02.addWidget(self.store_pos_button)
-        self.modeling_layout_02.addWidget(self.move_to_pos_button)
-        self.modeling_layout_02.addWidget(self.parent_constraint_button)
-        self.modeling_layout_02.addWidget(self.adjustment_grp_button)
-        
-        self.modeling_layout_03.addWidget(self.centerPivot_button)
-        self.modeling_layout_03.addWidget(self.deleteHistory_button)
-        self.modeling_layout_03.addWidget(self.freezeTransform_button)
-        self.modeling_layout_03.addWidget(self.anim_extra)
-        self.modeling_layout_03.addWidget(self.active_to_selected_button)
-        self.modeling_layout_03.addWidget(self.pivot_to_world_button)
-        self.modeling_layout_03.addWidget(self.pivot_to_selected_button)
-        self.modeling_layout_03.addWidget(self.object_to_world_button)
-        
-        self.modeling_layout_04.addWidget(self.create_shape_button)
-        self.modeling_layout_04.addWidget(self.color_override_button)
-
-        # Force layout update
-        self.modeling_widget.updateGeometry()
-        self.modeling_scroll_area.updateGeometry()
-        self.animation_widget.updateGeometry()
-        self.animation_scroll_area.updateGeometry()
-        self.graph_widget.updateGeometry()
-        self.graph_scroll_area.updateGeometry()
+        # Set the layouts of the built default pages to vertical direction
+        self._update_default_page_layouts(False)
 
         #UT.maya_main_window().activateWindow()
     
+    def _update_default_page_layouts(self, is_horizontal, widget_names=None):
+        """Lay out the default pages horizontally or vertically
+        
+        Args:
+            is_horizontal (bool): Lay out the pages in a row instead of a column
+            widget_names (list, optional): Widget names of the pages to update, all built default pages if None
+        """
+        built = [name for name in (widget_names or self.page_builders) if name in self.custom_widgets]
+        direction = self._box_direction(is_horizontal)
+        
+        if "modeling_scroll_area" in built:
+            self._orient_modeling_layouts(is_horizontal)
+            self.modeling_widget.updateGeometry()
+            self.modeling_scroll_area.updateGeometry()
+        if "animation_scroll_area" in built:
+            self.animation_layout.setDirection(direction)
+            self.animation_widget.updateGeometry()
+            self.animation_scroll_area.updateGeometry()
+        if "graph_scroll_area" in built:
+            self.graph_layout.setDirection(direction)
+            self.graph_widget.updateGeometry()
+            self.graph_scroll_area.updateGeometry()
+    
+    def _box_direction(self, is_horizontal):
+        """Get the box layout direction of the pages for an orientation"""
+        return QtWidgets.QBoxLayout.LeftToRight if is_horizontal else QtWidgets.QBoxLayout.TopToBottom
+    
+    def _orient_modeling_layouts(self, is_horizontal):
+        """Arrange the Modeling page's layouts in a row or a column"""
+        direction = self._box_direction(is_horizontal)
+        self.modeling_layout.setDirection(direction)
+        self.modeling_layout_01.setDirection(direction)
+        if is_horizontal:
+            self.modeling_layout.setAlignment(QtCore.Qt.AlignCenter)
+            # All buttons in one row
+            self.modeling_layout_02.grid(1, 0)
+            self.modeling_layout_03.grid(1, 0)
+            self.modeling_layout_04.grid(1, 0)
+        else:
+            self.modeling_layout.setAlignment(QtCore.Qt.AlignCenter | QtCore.Qt.AlignTop)
+            self.modeling_layout_02.grid(0, 1)
+            self.modeling_layout_03.grid(0, 4)
+            self.modeling_layout_04.grid(0, 1)
+    
     def rotate_object(self, increment):
         orient_input = float(self.orient_input.text())
         orient_direction = self.orient_dropdown.currentText()
@@ -640,43 +744,26 @@ class ToolBoxWindow(QtWidgets.QWidget):
     def add_function_button(self, tab_id, text="Function", script="", color="#5285A6"):
         """Add a function button to a custom tab"""
         # Get the content widget for this tab
-        widget_name = None
-        for tab in self.toggle_db.get_toggle_buttons():
-            if tab["id"] == tab_id:
-                widget_name = tab["widget_name"]
-                break
-        
-        if not widget_name or widget_name not in self.custom_widgets:
+        if self._get_tab_content_widget(tab_id) is None:
             print(f"Error: Could not find widget for tab ID {tab_id}")
             return
         
-        # Get the content widget from the scroll area
-        scroll_area = self.custom_widgets[widget_name]
-        content_widget = scroll_area.widget()
-        
-        if not hasattr(content_widget, "button_layout"):
-            print(f"Error: Content widget does not have a button layout")
-            return
-        
         # Get the next available function button ID
         button_id = self.toggle_db.get_next_function_id()
         
         # Create button data
-        button_data = {
-            "id": button_id,
-            "tab_id": tab_id,
-            "text": text,
-            "script": script,
-            "script_type": "python",
-            "color": color
-        }
+        button_data = RC.FunctionButtonRecord(
+            id=button_id,
+            tab_id=tab_id,
+            text=text,
+            script=script,
+            script_type="python",
+            color=color
+        )
         
-        # Add to database
+        # Add to database, the button widget is created when the database reports the new button
         self.toggle_db.add_function_button(button_data)
         
-        # Create the button
-        self._create_function_button(content_widget, button_data)
-        
         # Open the script manager to edit the script
         '''from . import script_manager
         script_widget = script_manager.ScriptManagerWidget(self)
@@ -688,31 +775,59 @@ class ToolBoxWindow(QtWidgets.QWidget):
         pos = QtGui.QCursor.pos()
         script_widget.move(pos.x() + 20, pos.y())'''
     
-    def _create_function_button(self, content_widget, button_data):
-        """Create a function button and add it to the content widget"""
-        # Create the button
-        button = CB.CustomFunctionButton(
-            text=button_data["text"],
-            button_id=button_data["id"],
-            script=button_data["script"],
-            color=button_data["color"],
-            parent=content_widget
-        )
+    def _create_function_button(self, content_widget, button_data, index=None):
+        """Create a function button and add it to the content widget
         
-        if "script_type" in button_data:
-            button.script_type = button_data["script_type"]
+        Args:
+            content_widget: The content widget of the tab
+            button_data (FunctionButtonRecord): The button record from the database
+            index (int, optional): Position of the button in its tab, appended to the end if None
+        """
+        # The script is only read when the button is first run
+        script_loader = partial(self.toggle_db.get_function_button_script, button_data.id)
+        
+        # Reuse a pooled button, it is still connected to this window
+        button = self.function_button_pool.acquire()
+        if button is not None:
+            button.rebind(
+                text=button_data.text,
+                button_id=button_data.id,
+                color=button_data.color,
+                tooltip=button_data.get("tooltip", ""),
+                script_type=button_data.get("script_type", "python"),
+                script_loader=script_loader
+            )
+            button.setParent(content_widget)
+            button.show()
+        else:
+            # Create the button from its metadata
+            button = CB.CustomFunctionButton(
+                text=button_data.text,
+                button_id=button_data.id,
+                script_loader=script_loader,
+                tooltip=button_data.get("tooltip", ""),
+                color=button_data.color,
+                parent=content_widget
+            )
             
-        # Connect signals
-        button.script_manager_requested.connect(self.open_script_manager_for_button_id)
-        button.delete_requested.connect(self.remove_function_button)
-        button.renamed.connect(self.update_function_button_name)
-        button.color_changed.connect(self.update_function_button_color)
+            if "script_type" in button_data:
+                button.script_type = button_data["script_type"]
+                
+            # Connect signals
+            button.script_manager_requested.connect(self.open_script_manager_for_button_id)
+            button.delete_requested.connect(self.remove_function_button)
+            button.renamed.connect(self.update_function_button_name)
+            button.color_changed.connect(self.update_function_button_color)
         
         # Get the button layout
         button_layout = content_widget.button_layout
         
         # Simply add the button to the layout - QHBoxLayout/QVBoxLayout handle positioning automatically
-        button_layout.addWidget(button)
+        # (the add button comes first in the layout)
+        if index is None:
+            button_layout.addWidget(button)
+        else:
+            button_layout.insertWidget(min(index + 1, button_layout.count()), button)
     
     def load_function_buttons(self, tab_id, content_widget):
         """Load function buttons for a specific tab"""
@@ -724,19 +839,12 @@ class ToolBoxWindow(QtWidgets.QWidget):
             self._create_function_button(content_widget, button_data)
     
     def store_data(self):
-        """Save the Ft ToolBox data to a JSON file"""
+        """Save the Ft ToolBox data to a shared library file
+        
+        Changes other Maya sessions saved to the same file are merged with the local tabs
+        instead of being overwritten, and the merged result is applied to this session too.
+        """
         try:
-            # Create a copy of the data to avoid modifying the original
-            data_to_save = {"tabs": []}
-            
-            # Save all tabs including default tabs for completeness
-            for tab in self.toggle_db.tool_box_data["tabs"]:
-                tab_copy = dict(tab)
-                data_to_save["tabs"].append(tab_copy)
-            
-            # Convert to JSON string with pretty formatting
-            data_json = json.dumps(data_to_save, indent=4)
-            
             # Prompt user for save location using Maya's file dialog
             file_path = cmds.fileDialog2(
                 fileFilter=f"Ft ToolBox Data (*.{self.data_file_extension});;All Files (*.*)",
@@ -755,17 +863,15 @@ class ToolBoxWindow(QtWidgets.QWidget):
             # Ensure the file has the correct extension
             if not file_path.endswith(f".{self.data_file_extension}"):
                 file_path += f".{self.data_file_extension}"
-                
-            # Get the directory path
-            directory = os.path.dirname(file_path)
             
-            # Create directory if it doesn't exist
-            if not os.path.exists(directory):
-                os.makedirs(directory)
-                
-            # Write to file
-            with open(file_path, 'w') as f:
-                f.write(data_json)
+            # Scripts are written inline so the file doesn't depend on the scene's script store
+            library = LS.get_shared_library(file_path)
+            merged_tabs, others_changed = library.save(self.toggle_db.export_tabs())
+            
+            # Pick up what other sessions saved
+            if others_changed:
+                with self.batch_mode():
+                    self.toggle_db.set_custom_tabs(merged_tabs)
                 
             # Show success message
             cmds.inViewMessage(message=f"Ft ToolBox data saved to {file_path}", pos='midCenter', fade=True, fadeOutTime=1.0)
@@ -774,8 +880,15 @@ class ToolBoxWindow(QtWidgets.QWidget):
             cmds.warning(f"Error saving Ft ToolBox data to file: {e}")
             return False
     
+    def save_user_library(self):
+        """Save the custom tabs to the user library that every new scene starts with"""
+        if self.toggle_db.save_user_library():
+            cmds.inViewMessage(message="Ft ToolBox tabs saved to the user library", pos='midCenter', fade=True, fadeOutTime=1.0)
+        else:
+            cmds.warning("Error saving the Ft ToolBox user library")
+    
     def load_data(self):
-        """Load the Ft ToolBox data from a JSON file"""
+        """Load the Ft ToolBox data from a library file written by store_data or an older JSON export"""
         try:
             # Prompt user for file location using Maya's file dialog
             file_path = cmds.fileDialog2(
@@ -797,38 +910,20 @@ class ToolBoxWindow(QtWidgets.QWidget):
                 cmds.warning(f"Ft ToolBox data file not found: {file_path}")
                 return False
                 
-            # Read from file
-            with open(file_path, 'r') as f:
-                data_json = f.read()
-                
-            # Check if the JSON string is empty or invalid
-            if not data_json or data_json.strip() == '':
+            # Check if the file is empty
+            if os.path.getsize(file_path) == 0:
                 cmds.warning("Ft ToolBox data file is empty or invalid")
                 return False
-                
-            # Convert the JSON string to a Python object
-            loaded_data = json.loads(data_json)
-            
-            # Validate the loaded data
-            if not isinstance(loaded_data, dict) or "tabs" not in loaded_data:
-                cmds.warning("Invalid Ft ToolBox data format in file")
-                return False
             
-            # Start with default tabs
-            self.toggle_db.tool_box_data = {"tabs": list(self.toggle_db.default_tabs)}
+            # Merge the file with the local changes made since this session last loaded or saved it
+            library = LS.get_shared_library(file_path)
+            loaded_tabs = library.load(self.toggle_db.export_tabs())
             
-            # Add custom tabs to the data structure (tabs with ID > 2)
-            existing_ids = [tab["id"] for tab in self.toggle_db.tool_box_data["tabs"]]
-            for tab in loaded_data["tabs"]:
-                if tab["id"] > 2:  # Only add custom tabs from the file
-                    if tab["id"] not in existing_ids:
-                        self.toggle_db.tool_box_data["tabs"].append(tab)
-            
-            # Save to Maya's defaultObjectSet
-            self.toggle_db.save_database()
-            
-            # Recreate UI elements to reflect the loaded data
-            self._rebuild_ui_from_loaded_data()
+            with self.batch_mode():
+                # Replace the custom tabs (tabs with ID > 2) with the merged ones
+                # The database keeps the default tabs and saves once when the batch ends,
+                # then reports the tabs and buttons that actually changed
+                self.toggle_db.set_custom_tabs(loaded_tabs)
             
             # Show success message
             cmds.inViewMessage(message=f"Ft ToolBox data loaded from {file_path}", pos='midCenter', fade=True, fadeOutTime=1.0)
@@ -837,70 +932,368 @@ class ToolBoxWindow(QtWidgets.QWidget):
             cmds.warning(f"Error loading Ft ToolBox data from file: {e}")
             return False
     
-    def _rebuild_ui_from_loaded_data(self):
-        """Rebuild UI elements after loading data"""
-        # First, remove the close button from the layout to reposition it later
-        self.body_header_layout.removeWidget(self.close_button)
-        
-        # Clear existing toggle buttons
-        for button_id in list(self.toggle_buttons.keys()):
-            if button_id > 2:  # Only remove custom tabs
-                self.remove_toggle_button_by_id(button_id)
-        
-        # Recreate toggle buttons from database
-        tbw = 12  # Default toggle button width
-        tbh = 12  # Default toggle button height
-        tbr = 6   # Default toggle button border radius
-        
-        # Create toggle buttons from database
-        self.create_toggle_buttons(tbw, tbh, tbr)
+    def export_data(self):
+        """Export the custom tabs to a library file, streaming one record per line"""
+        try:
+            file_path = cmds.fileDialog2(
+                fileFilter=f"Ft ToolBox Data (*.{self.data_file_extension});;All Files (*.*)",
+                dialogStyle=2,
+                fileMode=0,
+                caption="Export Ft ToolBox Data"
+            )
+            if not file_path:
+                return False
+            file_path = file_path[0]
+            if not file_path.endswith(f".{self.data_file_extension}"):
+                file_path += f".{self.data_file_extension}"
+            
+            tab_count = LIO.export_library(file_path, self.toggle_db.iter_export_tabs())
+            cmds.inViewMessage(message=f"Exported {tab_count} tabs to {file_path}", pos='midCenter', fade=True, fadeOutTime=1.0)
+            return True
+        except Exception as e:
+            cmds.warning(f"Error exporting Ft ToolBox data to file: {e}")
+            return False
+    
+    def import_data(self):
+        """Import tabs from a library file, merging them with the custom tabs or replacing them
         
-        # Connect toggle buttons to switch_widget method
-        for button_id, button in self.toggle_buttons.items():
-            try:
-                # First disconnect any existing connections to avoid duplicates
-                button.toggled.disconnect()
-            except:
-                pass  # It's okay if it wasn't connected
+        The file is read one tab at a time. Imported tabs and buttons whose ID is already in use
+        get a new ID, and the whole import is a single undo step.
+        """
+        try:
+            file_path = cmds.fileDialog2(
+                fileFilter=f"Ft ToolBox Data (*.{self.data_file_extension});;All Files (*.*)",
+                dialogStyle=2,
+                fileMode=1,
+                caption="Import Ft ToolBox Data"
+            )
+            if not file_path:
+                return False
+            file_path = file_path[0]
+            if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+                cmds.warning(f"Ft ToolBox data file not found or empty: {file_path}")
+                return False
+            
+            # Don't keep the file locked while the dialog is open
+            with LIO.LibraryReader(file_path) as reader:
+                library_tabs = reader.list_tabs()
             
-            # Connect the button's toggled signal to the switch_widget method
-            button.toggled.connect(lambda checked, bid=button_id: self.switch_widget(checked, bid))
+            from . import custom_dialog as CD
+            options = CD.ImportDialog(parent=self, tabs=library_tabs).get_options()
+            if options is None:
+                return False
+            replace, tab_ids = options
+            
+            with LIO.LibraryReader(file_path) as reader:
+                with self.batch_mode():
+                    tab_id_map = self.toggle_db.import_tabs(reader.iter_tabs(tab_ids), replace=replace)
+            
+            cmds.inViewMessage(message=f"Imported {len(tab_id_map)} tabs from {file_path}", pos='midCenter', fade=True, fadeOutTime=1.0)
+            return True
+        except Exception as e:
+            cmds.warning(f"Error importing Ft ToolBox data from file: {e}")
+            return False
+    
+    @contextmanager
+    def batch_mode(self):
+        """Apply a group of edits as one batch
+        
+        Database changes made inside the block are saved once when it ends and their change
+        events update the widgets then. UI rebuilds requested inside it are deferred and run once
+        at the end. If the block raises, the database rolls back and no widget is touched.
+        
+        Usage:
+            with window.batch_mode():
+                for button_data in buttons:
+                    window.toggle_db.add_function_button(button_data)
+        """
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self.setUpdatesEnabled(False)
+        try:
+            with self.toggle_db.transaction():
+                yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.setUpdatesEnabled(True)
+                if self._ui_rebuild_pending:
+                    self._ui_rebuild_pending = False
+                    self._rebuild_ui_from_loaded_data()
+    
+    def _rebuild_ui_from_loaded_data(self):
+        """Bring the UI in line with the database after data was loaded, see _reconcile_ui"""
+        # Inside a batch the rebuild runs once, when the batch ends
+        if self._batch_depth:
+            self._ui_rebuild_pending = True
+            return
         
-        # Add toggle buttons to layout in the correct order
-        for button_id in sorted(self.toggle_buttons.keys()):
-            if button_id > 2:  # Only add custom tabs
-                self.body_header_layout.addWidget(self.toggle_buttons[button_id])
+        self.last_reconcile_stats = self._reconcile_ui()
+    
+    def _reconcile_ui(self):
+        """Diff the widgets against the database and only add, remove, update or move what changed
         
-        # Re-add spacing and close button at the end
-        #self.body_header_layout.addSpacing(10)
-        self.body_header_layout.addWidget(self.close_button)
+        Toggle buttons, pages and function buttons whose records didn't change are kept as they
+        are, so reloading the same data creates and destroys no widgets.
         
-        # Update the content widget
+        Returns:
+            dict: Number of widgets 'created', 'destroyed' and 'updated'. Function buttons taken
+                from or released to function_button_pool are counted as created and destroyed.
+        """
+        stats = {"created": 0, "destroyed": 0, "updated": 0}
+        tabs = self.toggle_db.get_toggle_buttons()
+        tab_ids = set(tab["id"] for tab in tabs)
+        tab_ids_by_widget_name = {tab["widget_name"]: tab["id"] for tab in tabs}
+        current_id = self._get_current_tab_id()
+        
+        # Remove the toggle buttons of tabs that are gone
+        for tab_id in [tab_id for tab_id in self.toggle_buttons if tab_id not in tab_ids]:
+            button = self.toggle_buttons.pop(tab_id)
+            self.body_header_layout.removeWidget(button)
+            button.deleteLater()
+            stats["destroyed"] += 1
+        
+        # Remove the pages that no tab uses any more or that now belong to another tab
+        for widget_name, page in list(self.custom_widgets.items()):
+            if widget_name in self.page_builders:
+                continue
+            content_widget = self._get_page_content_widget(page)
+            owner_id = getattr(content_widget, "button_id", None)
+            if widget_name in tab_ids_by_widget_name and owner_id in (None, tab_ids_by_widget_name[widget_name]):
+                continue
+            if content_widget is not None:
+                stats["destroyed"] += len(self._get_function_button_widgets(content_widget))
+            self._discard_page(widget_name)
+            stats["destroyed"] += 1
+        
+        # Add or update the toggle buttons and the function buttons of built pages
+        for tab in tabs:
+            toggle_button = self.toggle_buttons.get(tab["id"])
+            if toggle_button is None:
+                self.toggle_buttons[tab["id"]] = self._create_toggle_button(tab)
+                stats["created"] += 1
+            elif self._update_toggle_button(toggle_button, tab):
+                stats["updated"] += 1
+            
+            content_widget = self._get_page_content_widget(self.custom_widgets.get(tab["widget_name"]))
+            if content_widget is not None:
+                self._reconcile_function_buttons(content_widget, tab, stats)
+        
+        # Lay out the header again only if tabs were added, removed or moved
+        if self._ordered_tab_ids() != self._header_tab_ids:
+            self._rebuild_tab_header()
         self.update_content_widget()
         
-        # Switch to the first tab
-        if 0 in self.toggle_buttons:
-            self.toggle_buttons[0].setChecked(True)
-            self.switch_widget(True, 0)
+        # Stay on the shown tab if it still exists
+        if current_id not in self.toggle_buttons:
+            current_id = 0 if 0 in self.toggle_buttons else next(iter(self._ordered_tab_ids()), None)
+        if current_id is not None:
+            if not self.toggle_buttons[current_id].isChecked():
+                self.toggle_buttons[current_id].setChecked(True)
+            self.switch_widget(True, current_id)
+        return stats
+    
+    def _reconcile_function_buttons(self, content_widget, tab, stats):
+        """Add, remove, update or move the function button widgets of a page to match its tab
+        
+        Args:
+            content_widget: The content widget of the tab's page
+            tab (dict): The tab record from the database
+            stats (dict): Counters of _reconcile_ui, updated in place
+        """
+        widgets = {widget.button_id: widget for widget in self._get_function_button_widgets(content_widget)}
+        buttons = tab.get("buttons", [])
+        button_ids = set(button.id for button in buttons)
+        for button_id, widget in widgets.items():
+            if button_id not in button_ids:
+                self._discard_function_button_widget(widget)
+                stats["destroyed"] += 1
+        
+        for index, button_data in enumerate(buttons):
+            widget = widgets.get(button_data.id)
+            if widget is None:
+                self._create_function_button(content_widget, button_data, index)
+                stats["created"] += 1
+            elif self._update_function_button_widget(widget, button_data, content_widget, index):
+                stats["updated"] += 1
+    
+    def undo(self):
+        """Undo the last tool box edit and update the UI"""
+        label = self.toggle_db.undo()
+        if label is None:
+            cmds.inViewMessage(message="Nothing to undo in Ft ToolBox", pos='midCenter', fade=True, fadeOutTime=1.0)
+            return
+        cmds.inViewMessage(message=f"Undo: {label}", pos='midCenter', fade=True, fadeOutTime=1.0)
+    
+    def redo(self):
+        """Redo the last undone tool box edit and update the UI"""
+        label = self.toggle_db.redo()
+        if label is None:
+            cmds.inViewMessage(message="Nothing to redo in Ft ToolBox", pos='midCenter', fade=True, fadeOutTime=1.0)
+            return
+        cmds.inViewMessage(message=f"Redo: {label}", pos='midCenter', fade=True, fadeOutTime=1.0)
     
     def remove_function_button(self, button_id):
         """Remove a function button"""
-        # Remove from database
+        # Remove from database (the database schedules its own save)
         self.toggle_db.remove_function_button(button_id)
-        # Save the database to ensure changes are persisted
-        self.toggle_db.save_database()
         
-        # Find and remove the button from UI
-        # (The button will remove itself from the layout when deleted)
+        # The button widget is removed when the database reports the removal
+        
+    #----------------------------------------------------------------------------------
+    # Database change events
+    #----------------------------------------------------------------------------------
+    def _connect_database_signals(self):
+        """Keep the widgets in sync with the database through its change events"""
+        signals = self.toggle_db.signals
+        signals.tab_added.connect(self._sync_tab)
+        signals.tab_removed.connect(self._sync_tab)
+        signals.tab_updated.connect(self._sync_tab)
+        signals.button_added.connect(self._sync_function_button)
+        signals.button_removed.connect(self._sync_function_button)
+        signals.button_updated.connect(self._sync_function_button)
+        signals.data_reset.connect(self._rebuild_ui_from_loaded_data)
+    
+    def _sync_tab(self, tab_id):
+        """Create, update or remove the toggle button and page of a tab to match the database"""
+        # Default tabs never change
+        if tab_id <= 2:
+            return
+        
+        tab = self.toggle_db.get_tab(tab_id)
+        toggle_button = self.toggle_buttons.get(tab_id)
+        if tab is None:
+            if toggle_button is not None:
+                self._remove_tab_widgets(tab_id)
+            return
+        if toggle_button is None:
+            self._add_tab_widgets(tab)
+            return
+        
+        # Update the existing toggle button and the buttons of its page
+        self._update_toggle_button(toggle_button, tab)
+        # The tab may have moved
+        if self._ordered_tab_ids() != self._header_tab_ids:
+            self._rebuild_tab_header()
+        
+        content_widget = self._get_tab_content_widget(tab_id)
+        if content_widget is None:
+            return
+        button_ids = set(button.id for button in tab.get("buttons", []))
+        for widget in self._get_function_button_widgets(content_widget):
+            if widget.button_id not in button_ids:
+                self._discard_function_button_widget(widget)
+        for button_data in tab.get("buttons", []):
+            self._sync_function_button(button_data.id, tab_id)
+    
+    def _sync_function_button(self, button_id, tab_id=None):
+        """Create, update or remove the widget of a function button to match the database"""
+        button_data = self.toggle_db.get_function_button(button_id)
+        widget = self._find_function_button(button_id)
+        content_widget = None
+        if button_data is not None:
+            content_widget = self._get_tab_content_widget(self.toggle_db.get_tab_id_for_function_button(button_id))
+        
+        if content_widget is None:
+            if widget is not None:
+                self._discard_function_button_widget(widget)
+            return
+        
+        # A button moved to another tab is recreated there
+        if widget is not None and widget.parent() is not content_widget:
+            self._discard_function_button_widget(widget)
+            widget = None
+        
+        index = self.toggle_db.get_function_button_index(button_id)
+        if widget is None:
+            self._create_function_button(content_widget, button_data, index)
+            return
+        self._update_function_button_widget(widget, button_data, content_widget, index)
+    
+    def _update_function_button_widget(self, widget, button_data, content_widget, index):
+        """Update a function button widget from its record and move it to its position in the tab
+        
+        Returns:
+            bool: True if the widget's text, color, tooltip or position changed
+        """
+        changed = False
+        text_changed = widget.text() != button_data.text
+        if text_changed:
+            widget.setText(button_data.text)
+            widget.setMinimumWidth(widget.calculate_button_width(button_data.text))
+            changed = True
+        if widget.base_color != button_data.color:
+            widget.update_color(button_data.color)
+            changed = True
+        widget.script_type = button_data.get("script_type", "python")
+        # The script is read again the next time the button runs
+        widget.set_script_loader(partial(self.toggle_db.get_function_button_script, button_data.id))
+        if text_changed or widget.script_tooltip != button_data.get("tooltip", ""):
+            widget.set_script_tooltip(button_data.get("tooltip", ""))
+            changed = True
+        
+        # Keep the layout in the database order (the add button comes first)
+        layout = content_widget.button_layout
+        if layout.indexOf(widget) != index + 1:
+            layout.removeWidget(widget)
+            layout.insertWidget(min(index + 1, layout.count()), widget)
+            changed = True
+        return changed
+    
+    def _get_tab_content_widget(self, tab_id):
+        """Get the content widget that holds the function buttons of a tab, or None"""
+        tab = self.toggle_db.get_tab(tab_id)
+        if tab is None:
+            return None
+        return self._get_page_content_widget(self.custom_widgets.get(tab["widget_name"]))
+    
+    def _get_page_content_widget(self, page):
+        """Get the content widget with the function buttons of a tab page, or None for other pages"""
+        if not isinstance(page, QtWidgets.QScrollArea):
+            return None
+        content_widget = page.widget()
+        if not hasattr(content_widget, "button_layout"):
+            return None
+        return content_widget
+    
+    def _get_function_button_widgets(self, content_widget):
+        """Get the function button widgets in a tab's content widget"""
+        layout = content_widget.button_layout
+        widgets = []
+        for i in range(layout.count()):
+            item = layout.itemAt(i)
+            if item and isinstance(item.widget(), CB.CustomFunctionButton):
+                widgets.append(item.widget())
+        return widgets
+    
+    def _discard_function_button_widget(self, widget):
+        """Remove a function button widget from its layout and pool it for reuse
+        
+        Buttons that are being renamed are deleted instead.
+        """
+        parent_widget = widget.parent()
+        if parent_widget is not None and hasattr(parent_widget, "button_layout"):
+            parent_widget.button_layout.removeWidget(widget)
+        if widget.rename_line_edit is None:
+            self.function_button_pool.release(widget)
+            return
+        widget.setParent(None)
+        widget.deleteLater()
+    
+    def _discard_page(self, widget_name):
+        """Remove a tab page from the stacked widget and delete it, pooling its function buttons"""
+        page = self.custom_widgets.pop(widget_name)
+        content_widget = self._get_page_content_widget(page)
+        if content_widget is not None:
+            for widget in self._get_function_button_widgets(content_widget):
+                self._discard_function_button_widget(widget)
+        self.content_widget.removeWidget(page)
+        page.deleteLater()
         
     def open_script_manager_for_button_id(self, button_id):
         """Open script manager for an existing function button"""
-        # Get the button data from the database
-        button_data = None
-        for btn in self.toggle_db.get_function_buttons():
-            if btn["id"] == button_id:
-                button_data = btn
-                break
+        # Get the button data, with its scripts, from the database
+        button_data = self.toggle_db.get_hydrated_function_button(button_id)
         
         if button_data:
             # Open the script manager
@@ -916,83 +1309,51 @@ class ToolBoxWindow(QtWidgets.QWidget):
     
     def update_button_script(self, button_data):
         """Update a function button's script and save to the database"""
-        # Update the database
+        # Update the database (the database schedules its own save)
+        # The button widget picks up the new script and tooltip from the database's change event
         self.toggle_db.update_function_button(button_data)
-        # Save the database to ensure changes are persisted
-        self.toggle_db.save_database()
-        
-        # Find the button in the UI and update its script
-        button_id = button_data["id"]
-        tab_id = button_data["tab_id"]
-        
-        # Find the button and update only its script
-        button = self._find_function_button(button_id, tab_id)
-        if button:
-            button.set_script(button_data["script"], button_data.get("script_type", "python"))
             
     def _find_function_button(self, button_id, tab_id=None):
-        """Helper method to find a function button by ID"""
-        # If tab_id is not provided, search all tabs
-        tabs_to_search = [tab for tab in self.toggle_db.get_toggle_buttons() 
-                         if tab_id is None or tab["id"] == tab_id]
+        """Helper method to find a function button by ID
         
-        for tab in tabs_to_search:
-            widget_name = tab["widget_name"]
-            if widget_name in self.custom_widgets:
-                content_widget = self.custom_widgets[widget_name].widget()
-                
-                # Find the button in the layout
-                if hasattr(content_widget, "button_layout"):
-                    layout = content_widget.button_layout
-                    for i in range(layout.count()):
-                        item = layout.itemAt(i)
-                        if item and item.widget() and isinstance(item.widget(), CB.CustomFunctionButton):
-                            if item.widget().button_id == button_id:
-                                return item.widget()
+        The tab that holds the button is searched first, then every tab, so buttons that were
+        removed from the database or moved to another tab are found too.
+        """
+        # If tab_id is not provided, look up the tab that holds the button
+        if tab_id is None:
+            tab_id = self.toggle_db.get_tab_id_for_function_button(button_id)
+        
+        content_widget = self._get_tab_content_widget(tab_id)
+        content_widgets = [content_widget] if content_widget is not None else []
+        content_widgets += [self._get_page_content_widget(page) for page in self.custom_widgets.values()
+                            if self._get_page_content_widget(page) is not None]
+        for content_widget in content_widgets:
+            for widget in self._get_function_button_widgets(content_widget):
+                if widget.button_id == button_id:
+                    return widget
         return None
     
     def update_function_button_name(self, button_id, new_name):
         """Update a function button's name in the database and UI"""
-        # Update database
-        updated = False
-        for tab in self.toggle_db.get_toggle_buttons():
-            if "buttons" in tab:
-                for button in tab["buttons"]:
-                    if button["id"] == button_id:
-                        button["text"] = new_name
-                        updated = True
-                        break
-                if updated:
-                    break
-                    
-        if updated:
-            self.toggle_db.save_database()
-            
-        # No need to update UI since the signal is emitted by the button itself
-        # which already updated its text
+        # Update database (the database schedules its own save)
+        self.toggle_db.update_function_button_fields(button_id, text=new_name)
+            
+        # The button already updated its text, the change event leaves it as is
 
     def update_function_button_color(self, button_id, new_color):
         """Update a function button's color in the database and UI"""
-        # Update database
-        updated = False
-        for tab in self.toggle_db.get_toggle_buttons():
-            if "buttons" in tab:
-                for button in tab["buttons"]:
-                    if button["id"] == button_id:
-                        button["color"] = new_color
-                        updated = True
-                        break
-                if updated:
-                    break
-                    
-        if updated:
-            self.toggle_db.save_database()
-            
-        # No need to update UI since the signal is emitted by the button itself
-        # which already updated its color
+        # Update database (the database schedules its own save)
+        self.toggle_db.update_function_button_fields(button_id, color=new_color)
+            
+        # The button already updated its color, the change event leaves it as is
     
     def update_function_button_layouts(self, is_horizontal):
-        """Update function button layouts based on window orientation"""
+        """Update function button layouts based on window orientation
+        
+        The button layouts only change direction, the buttons stay in them and keep their parent.
+        """
+        direction = self._box_direction(is_horizontal)
+        
         # Loop through all custom tabs
         for tab in self.toggle_db.get_toggle_buttons():
             # Skip default tabs
@@ -1016,45 +1377,8 @@ class ToolBoxWindow(QtWidgets.QWidget):
             # Update orientation flag
             content_widget.is_horizontal = is_horizontal
             
-            # Get all buttons from the current layout
-            old_layout = content_widget.button_layout
-            buttons = []
-            for i in range(old_layout.count()):
-                item = old_layout.itemAt(i)
-                if item and item.widget():
-                    buttons.append(item.widget())
-            
-            # Remove old layout from main layout
-            main_layout = content_widget.layout()
-            if main_layout and old_layout:
-                main_layout.removeItem(old_layout)
-                
-                # Delete old layout by reparenting its widgets
-                while old_layout.count():
-                    item = old_layout.takeAt(0)
-                    if item.widget():
-                        item.widget().setParent(None)
-            
-            # Create new layout based on orientation
-            if is_horizontal:
-                new_layout = QtWidgets.QHBoxLayout()
-            else:
-                new_layout = QtWidgets.QVBoxLayout()
-                
-            new_layout.setContentsMargins(0, 0, 0, 0)
-            new_layout.setSpacing(4)
-            new_layout.setAlignment(QtCore.Qt.AlignCenter)
-            
-            # Add all buttons to the new layout
-            for button in buttons:
-                new_layout.addWidget(button)
-            
-            # Add the new layout to the main layout
-            if main_layout:
-                main_layout.addLayout(new_layout)
-            
-            # Update the reference to the button layout
-            content_widget.button_layout = new_layout
+            # Lay the buttons out in the new direction
+            content_widget.button_layout.setDirection(direction)
     #----------------------------------------------------------------------------------
     # Tab System
     #----------------------------------------------------------------------------------  
@@ -1065,53 +1389,75 @@ class ToolBoxWindow(QtWidgets.QWidget):
         
         # Create toggle buttons from database
         for button_data in self.toggle_db.get_toggle_buttons():
-            button_id = button_data["id"]
-            
-            # Use the button's stored border radius if available, otherwise use default
-            button_border_radius = button_data.get("border_radius", border_radius)
-            
-            button = CB.CustomToggleButton(
-                text=button_data["text"],
-                button_id=button_id,
-                group_id="widget_stack",
-                checked_color=button_data["checked_color"],
-                unchecked_color=button_data["unchecked_color"],
-                hover_color=button_data["hover_color"],
-                tooltip=button_data["tooltip"],
-                border_radius=button_border_radius,
-                width=width,
-                height=height
-            )
-            self.toggle_buttons[button_id] = button
+            self.toggle_buttons[button_data["id"]] = self._create_toggle_button(button_data, width, height, border_radius)
+    
+    def _create_toggle_button(self, tab, width=12, height=12, border_radius=2):
+        """Create the toggle button of a tab, using the tab's stored border radius if it has one"""
+        return CB.CustomToggleButton(
+            text=tab["text"],
+            button_id=tab["id"],
+            group_id="widget_stack",
+            checked_color=tab["checked_color"],
+            unchecked_color=tab["unchecked_color"],
+            hover_color=tab["hover_color"],
+            tooltip=tab["tooltip"],
+            border_radius=tab.get("border_radius", border_radius),
+            width=width,
+            height=height
+        )
+    
+    def _update_toggle_button(self, toggle_button, tab):
+        """Update the text, tooltip and colors of a tab's toggle button
+        
+        Returns:
+            bool: True if anything changed
+        """
+        changed = False
+        if toggle_button.text() != tab["text"]:
+            toggle_button.setText(tab["text"])
+            changed = True
+        tooltip = f"<html><body><p>{tab['tooltip']}</p></body></html>"
+        if toggle_button.toolTip() != tooltip:
+            toggle_button.setToolTip(tooltip)
+            changed = True
+        colors = (tab["checked_color"], tab["hover_color"], tab["unchecked_color"])
+        if (toggle_button.checked_color, toggle_button.hover_color, toggle_button.unchecked_color) != colors:
+            toggle_button.update_colors(*colors)
+            changed = True
+        return changed
     
     def update_content_widget(self):
-        """Update the content widget with widgets from the database"""
-        # Clear the stacked widget
-        while self.content_widget.count() > 0:
-            self.content_widget.removeWidget(self.content_widget.widget(0))
+        """Put the page of every tab from the database in the stacked widget and map tab IDs to them
         
-        # Add widgets in the order defined by the database
-        for tab in sorted(self.toggle_db.get_toggle_buttons(), key=lambda x: x["id"]):
+        Pages are looked up through tab_pages, so their index in the stacked widget doesn't matter
+        and adding or removing a tab never moves the other pages.
+        """
+        tab_pages = {}
+        for tab in self.toggle_db.get_toggle_buttons():
             widget_name = tab["widget_name"]
             button_id = tab["id"]
             
-            # Check if this is a default widget or a custom widget
-            if widget_name in ["modeling_scroll_area", "animation_scroll_area", "graph_scroll_area"]:
-                # Default widget - should already be in self.custom_widgets
-                if widget_name in self.custom_widgets:
-                    index = self.content_widget.addWidget(self.custom_widgets[widget_name])
-            else:
-                # Custom widget - might need to be recreated
-                if widget_name not in self.custom_widgets:
-                    # Create a default empty widget for custom tabs
-                    self._create_empty_widget(button_id, widget_name)
-                
-                # Add the widget to the stacked widget
-                index = self.content_widget.addWidget(self.custom_widgets[widget_name])
-                
-            # Verify that the index matches the button_id
-            if index != button_id:
-                print(f"Warning: Widget index {index} does not match button_id {button_id}")
+            # Tabs whose page wasn't built yet get a placeholder, see _build_tab_page
+            page = self.custom_widgets.get(widget_name)
+            if page is None:
+                page = self._placeholder_pages.get(button_id)
+                if page is None:
+                    page = self._placeholder_pages[button_id] = QtWidgets.QWidget()
+            
+            if self.content_widget.indexOf(page) < 0:
+                self.content_widget.addWidget(page)
+            tab_pages[button_id] = page
+        
+        # Take out the pages of tabs that no longer exist
+        pages = list(tab_pages.values())
+        for index in reversed(range(self.content_widget.count())):
+            page = self.content_widget.widget(index)
+            if not any(page is tab_page for tab_page in pages):
+                self.content_widget.removeWidget(page)
+        for tab_id in list(self._placeholder_pages.keys()):
+            if tab_pages.get(tab_id) is not self._placeholder_pages[tab_id]:
+                self._placeholder_pages.pop(tab_id).deleteLater()
+        self.tab_pages = tab_pages
     
     def add_toggle_button(self, text=None, tooltip= 'Custom Tab', checked_color="#84bf4d", unchecked_color="#798b61", 
                          hover_color="#84bf4d", widget=None, widget_name=None, border_radius=2):
@@ -1124,86 +1470,68 @@ class ToolBoxWindow(QtWidgets.QWidget):
             text = str(button_id + 1)  # +1 because IDs start at 0 but we want to display starting from 1
         
         # Create button data
-        button_data = {
-            "id": button_id,
-            "text": text,
-            "tooltip": tooltip,
-            "checked_color": checked_color,
-            "unchecked_color": unchecked_color,
-            "hover_color": hover_color,
-            "widget_name": widget_name or f"custom_widget_{button_id}",
-            "border_radius": border_radius,
-            "buttons": []  # Initialize with empty buttons array
-        }
-        
-        # Add to database
-        self.toggle_db.add_toggle_button(button_data)
-        
-        # Create button
-        tbw = 12
-        tbh = 12
-        tbr = 6
-        button = CB.CustomToggleButton(
+        button_data = RC.TabRecord(
+            id=button_id,
             text=text,
-            button_id=button_id,
-            group_id="widget_stack",
+            tooltip=tooltip,
             checked_color=checked_color,
             unchecked_color=unchecked_color,
             hover_color=hover_color,
-            tooltip=tooltip,
+            widget_name=widget_name or f"custom_widget_{button_id}",
             border_radius=border_radius,
-            width=tbw,
-            height=tbh
+            buttons=[]  # Initialize with empty buttons array
         )
         
-        # Store button
-        self.toggle_buttons[button_id] = button
-        
-        def apply_transparent_scroll_style(widget):
-            widget.setStyleSheet("""
-                QScrollArea {
-                    background-color: transparent;
-                    border: none;
-                }
-                QScrollBar:horizontal {
-                    border: none;
-                    background: transparent;
-                    height: 8px;
-                    margin: 0px 0px 0px 0px;
-                }
-                QScrollBar::handle:horizontal {
-                    background: rgba(100, 100, 100, 0.5);
-                    min-width: 20px;
-                    border-radius: 0px;
-                }
-                QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {
-                    width: 0px;
-                }
-                QScrollBar:vertical {
-                    border: none;
-                    background: transparent;
-                    width: 8px;
-                    margin: 0px 0px 0px 0px;
-                }
-                QScrollBar::handle:vertical {
-                    background: rgba(100, 100, 100, 0.5);
-                    min-height: 20px;
-                    border-radius: 0px;
-                }
-                QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                    width: 0px;
-                }
-            """)
-
-        # Add widget to custom_widgets
+        # Use the given widget as the tab's page
         if widget:
             self.custom_widgets[button_data["widget_name"]] = widget
-            apply_transparent_scroll_style(widget)
-        else:
-            # Create a default empty widget if none provided
-            self._create_empty_widget(button_id, button_data["widget_name"])
-            apply_transparent_scroll_style(self.custom_widgets[button_data["widget_name"]])
+            self._apply_transparent_scroll_style(widget)
+        
+        # Add to database, the toggle button and page are created when the database reports the new tab
+        self.toggle_db.add_toggle_button(button_data)
+        
+        # Set the new button as checked to switch to it immediately
+        if button_id in self.toggle_buttons:
+            self.toggle_buttons[button_id].setChecked(True)
+        
+        return button_id
+    
+    def _add_tab_widgets(self, tab):
+        """Create the toggle button and page of a custom tab"""
+        # Create and store the button
+        self.toggle_buttons[tab["id"]] = self._create_toggle_button(tab)
+        
+        self._rebuild_tab_header()
         
+        # Update content widget, the page is built when the tab is first shown
+        self.update_content_widget()
+    
+    def _remove_tab_widgets(self, tab_id):
+        """Remove the toggle button and page of a custom tab"""
+        # Remove button from layout
+        button = self.toggle_buttons.pop(tab_id)
+        was_checked = button.isChecked()
+        self.body_header_layout.removeWidget(button)
+        button.deleteLater()
+        
+        # Remove the tab's page, the database no longer knows its widget name
+        for widget_name, page in list(self.custom_widgets.items()):
+            content_widget = self._get_page_content_widget(page)
+            if content_widget is not None and getattr(content_widget, "button_id", None) == tab_id:
+                self._discard_page(widget_name)
+        
+        self._rebuild_tab_header()
+        
+        # Update content widget
+        self.update_content_widget()
+        
+        # If we removed the active button, activate the first available button
+        if was_checked and self.toggle_buttons:
+            first_id = self._ordered_tab_ids()[0]
+            self.toggle_buttons[first_id].setChecked(True)
+    
+    def _rebuild_tab_header(self):
+        """Lay out the toggle buttons in the database's tab order, followed by the close button"""
         # Disconnect all toggle buttons first to avoid multiple connections
         for btn in self.toggle_buttons.values():
             try:
@@ -1211,28 +1539,43 @@ class ToolBoxWindow(QtWidgets.QWidget):
             except:
                 pass  # It's okay if it wasn't connected
         
-        # Clear and rebuild header layout
-        for i in reversed(range(self.body_header_layout.count())):
-            item = self.body_header_layout.itemAt(i)
-            if item.widget():
-                self.body_header_layout.removeWidget(item.widget())
+        # Clear the header layout, including its stretch and spacing
+        while self.body_header_layout.count():
+            self.body_header_layout.takeAt(0)
         
         # Add buttons back to layout
         self.body_header_layout.addStretch()
-        for btn_id in sorted(self.toggle_buttons.keys()):
+        self._header_tab_ids = self._ordered_tab_ids()
+        for btn_id in self._header_tab_ids:
             self.body_header_layout.addWidget(self.toggle_buttons[btn_id])
             self.toggle_buttons[btn_id].toggled_with_id.connect(self.switch_widget)
         
         self.body_header_layout.addSpacing(10)
         self.body_header_layout.addWidget(self.close_button)
-        
-        # Update content widget
-        self.update_content_widget()
-        
-        # Set the new button as checked to switch to it immediately
-        self.toggle_buttons[button_id].setChecked(True)
-        
-        return button_id
+    
+    def _create_style_variants(self):
+        """Add the style variants the window uses after it's built to the theme before it's attached
+
+        Function buttons in the palette colors and in the colors of the stored buttons, whose pages
+        are only built when their tab is shown, the widgets of the built-in pages and the frame's
+        resize highlight are then styled by the window's style sheet, see theme.py.
+        """
+        # The color of new function buttons, see add_function_button
+        colors = set(CB.FUNCTION_BUTTON_COLORS) | {"#5285A6"}
+        colors.update(button["color"] for button in self.toggle_db.get_function_buttons() if button.get("color"))
+        for color in sorted(colors):
+            TH.THEME.variant("QPushButton", TH.button_rules(color))
+        TH.THEME.variant("QFrame", self.resize_frame_style)
+        # The tab pages and the orient tools of the modeling page
+        TH.THEME.variant("QWidget", TH.SCROLL_AREA_RULES)
+        TH.THEME.variant("QWidget", TH.PAGE_CONTENT_RULES)
+        TH.THEME.variant("QFrame", TH.ORIENT_FRAME_RULES)
+        TH.THEME.variant("QComboBox", TH.ORIENT_DROPDOWN_RULES)
+        TH.THEME.variant("QLineEdit", TH.ORIENT_INPUT_RULES)
+
+    def _apply_transparent_scroll_style(self, widget):
+        """Give a tab page a transparent background and thin scroll bars"""
+        TH.apply_style(widget, TH.SCROLL_AREA_RULES, "QWidget")
     
     def _create_empty_widget(self, button_id, widget_name):
         """Create a default empty widget for custom tabs with horizontal layout similar to default tabs"""
@@ -1245,50 +1588,14 @@ class ToolBoxWindow(QtWidgets.QWidget):
         # Hide scrollbars but keep scrolling functionality through wheel events
         scroll_area.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
         scroll_area.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
-        def apply_transparent_scroll_style(widget):
-            widget.setStyleSheet("""
-                QScrollArea {
-                    background-color: transparent;
-                    border: none;
-                }
-                QScrollBar:horizontal {
-                    border: none;
-                    background: transparent;
-                    height: 8px;
-                    margin: 0px 0px 0px 0px;
-                }
-                QScrollBar::handle:horizontal {
-                    background: rgba(100, 100, 100, 0.5);
-                    min-width: 20px;
-                    border-radius: 0px;
-                }
-                QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {
-                    width: 0px;
-                }
-                QScrollBar:vertical {
-                    border: none;
-                    background: transparent;
-                    width: 8px;
-                    margin: 0px 0px 0px 0px;
-                }
-                QScrollBar::handle:vertical {
-                    background: rgba(100, 100, 100, 0.5);
-                    min-height: 20px;
-                    border-radius: 0px;
-                }
-                QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                    width: 0px;
-                }
-            """)
-
         # Apply transparent scroll style
-        apply_transparent_scroll_style(scroll_area)
+        self._apply_transparent_scroll_style(scroll_area)
         
         # Create a widget to hold the content
         content_widget = QtWidgets.QWidget()
         content_widget.button_id = button_id  # Store button_id for reference
         content_widget.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
-        content_widget.setStyleSheet("background-color: rgba(36, 36, 36, 0);border:none;border-radius: 4px;")
+        TH.apply_style(content_widget, TH.PAGE_CONTENT_RULES, "QWidget")
         
         # Create a horizontal layout similar to the default tabs
         main_layout = QtWidgets.QHBoxLayout(content_widget)
@@ -1314,8 +1621,11 @@ class ToolBoxWindow(QtWidgets.QWidget):
         #main_layout.addLayout(header_layout)
         #main_layout.addWidget(add_button)
         
-        # Create a flow layout for function buttons - default is horizontal
-        button_layout = QtWidgets.QHBoxLayout()
+        # Store current orientation, pages built after the window was laid out use its orientation
+        content_widget.is_horizontal = self.last_orientation
+        
+        # Create a box layout for function buttons in the current orientation, it changes direction with the window
+        button_layout = QtWidgets.QBoxLayout(self._box_direction(content_widget.is_horizontal))
         button_layout.setContentsMargins(0, 0, 0, 0)
         button_layout.setSpacing(4)
         button_layout.setAlignment(QtCore.Qt.AlignCenter)
@@ -1323,9 +1633,6 @@ class ToolBoxWindow(QtWidgets.QWidget):
         
         button_layout.addWidget(add_button)
 
-        # Store current orientation based on height threshold
-        content_widget.is_horizontal = self.height() < self.HEIGHT_THRESHOLD
-        
         # Add the button layout to the main layout
         main_layout.addLayout(button_layout)
         
@@ -1355,8 +1662,8 @@ class ToolBoxWindow(QtWidgets.QWidget):
     
     def remove_toggle_button(self):
         """Remove the currently active toggle button if it's a custom tab"""
-        # Get the current active button ID (current index of the stacked widget)
-        current_id = self.content_widget.currentIndex()
+        # Get the ID of the tab whose page is shown
+        current_id = self._get_current_tab_id()
         
         # Find which button is currently checked
         checked_button_id = None
@@ -1365,9 +1672,11 @@ class ToolBoxWindow(QtWidgets.QWidget):
                 checked_button_id = btn_id
                 break
         
-        # Use the checked button ID if found, otherwise use current index
+        # Use the checked button ID if found, otherwise use the shown page
         if checked_button_id is not None:
             current_id = checked_button_id
+        if current_id is None:
+            return False
         
         # Check if this is a default tab (IDs 0, 1, 2 are default)
         if current_id <= 2:
@@ -1380,55 +1689,12 @@ class ToolBoxWindow(QtWidgets.QWidget):
             cmds.warning(f"Button with ID {current_id} not found.")
             return False
         
-        # Get the widget name before removing from database
-        widget_name = None
-        for button_data in self.toggle_db.get_toggle_buttons():
-            if button_data["id"] == current_id:
-                widget_name = button_data["widget_name"]
-                break
-        
-        # Remove from database
+        # Remove from database, the toggle button and page are removed when the database reports it
         self.toggle_db.remove_toggle_button(current_id)
         
-        # Remove button from layout
-        button = self.toggle_buttons.pop(current_id)
-        self.body_header_layout.removeWidget(button)
-        button.deleteLater()
-        
-        # Remove widget from custom_widgets if it exists
-        if widget_name and widget_name in self.custom_widgets:
-            widget = self.custom_widgets.pop(widget_name)
-            if widget:
-                widget.deleteLater()
-        
-        # Disconnect all toggle buttons first to avoid multiple connections
-        for btn in self.toggle_buttons.values():
-            try:
-                btn.toggled_with_id.disconnect(self.switch_widget)
-            except:
-                pass  # It's okay if it wasn't connected
-        
-        # Clear and rebuild header layout
-        for i in reversed(range(self.body_header_layout.count())):
-            item = self.body_header_layout.itemAt(i)
-            if item and item.widget():
-                self.body_header_layout.removeWidget(item.widget())
-        
-        # Add buttons back to layout
-        self.body_header_layout.addStretch()
-        for btn_id in sorted(self.toggle_buttons.keys()):
-            self.body_header_layout.addWidget(self.toggle_buttons[btn_id])
-            self.toggle_buttons[btn_id].toggled_with_id.connect(self.switch_widget)
-        
-        self.body_header_layout.addSpacing(10)
-        self.body_header_layout.addWidget(self.close_button)
-        
-        # Update content widget
-        self.update_content_widget()
-        
         # Activate the first available button
         if self.toggle_buttons:
-            first_id = min(self.toggle_buttons.keys())
+            first_id = self._ordered_tab_ids()[0]
             self.toggle_buttons[first_id].setChecked(True)
         
         return True
@@ -1445,36 +1711,9 @@ class ToolBoxWindow(QtWidgets.QWidget):
             cmds.warning("Cannot remove default tabs. Only custom tabs can be removed.")
             return False
         
-        # Remove from database
+        # Remove from database, the toggle button and page are removed when the database reports it
         self.toggle_db.remove_toggle_button(button_id)
         
-        # Remove button from layout
-        button = self.toggle_buttons.pop(button_id)
-        self.body_header_layout.removeWidget(button)
-        button.deleteLater()
-        
-        # Clear and rebuild header layout
-        for i in reversed(range(self.body_header_layout.count())):
-            item = self.body_header_layout.itemAt(i)
-            if item.widget():
-                self.body_header_layout.removeWidget(item.widget())
-        
-        # Add buttons back to layout
-        self.body_header_layout.addStretch()
-        for btn_id in sorted(self.toggle_buttons.keys()):
-            self.body_header_layout.addWidget(self.toggle_buttons[btn_id])
-        
-        self.body_header_layout.addSpacing(10)
-        self.body_header_layout.addWidget(self.close_button)
-        
-        # Update content widget
-        self.update_content_widget()
-        
-        # If we removed the active button, activate the first available button
-        if self.content_widget.currentIndex() == button_id and self.toggle_buttons:
-            first_id = min(self.toggle_buttons.keys())
-            self.toggle_buttons[first_id].setChecked(True)
-        
         return True
             
         # Call the parent class closeEvent to properly close the Qt window
@@ -1562,64 +1801,50 @@ class ToolBoxWindow(QtWidgets.QWidget):
             new_height = max(self.minimumHeight(), self.initial_size.height() + delta.y())
             new_geometry.setHeight(new_height)
         
-        self.setGeometry(new_geometry)
+        # Only the latest geometry is applied, once per display frame
+        self.geometry_throttle.set_geometry(new_geometry)
+    
+    def _flush_resize(self):
+        """Apply the pending geometry and layout work right away, e.g. when a resize ends"""
+        self.geometry_throttle.flush()
+        self._resize_layout_timer.stop()
+        self._update_resize_layouts()
+        if self._orientation_timer.isActive():
+            self._orientation_timer.stop()
+            self._settle_orientation()
             
     def resizeEvent(self, event):
         """Handle window resize events
         
-        This method:
-        1. Detects when the window crosses the height threshold and updates layouts accordingly
-        2. Uses a fixed height threshold instead of width/height comparison for determining orientation
+        The layout work is deferred to _update_resize_layouts, which runs at most once per display
+        frame however many resize events arrive in between.
         """
         # Call parent implementation
         super(ToolBoxWindow, self).resizeEvent(event)
         
+        if not self._resize_layout_timer.isActive():
+            self._resize_layout_timer.start()
+    
+    def _update_resize_layouts(self):
+        """Update the layouts for the current window size
+        
+        This method:
+        1. Changes the orientation when the window crosses the height threshold, once the size settles while dragging an edge
+        2. Uses a fixed height threshold instead of width/height comparison for determining orientation
+        """
         current_height = self.height()
         
         # Determine orientation based on height threshold instead of width/height comparison
         is_horizontal = current_height < self.HEIGHT_THRESHOLD
         
-        # Check if orientation has changed and update all layouts
-        if not hasattr(self, 'last_orientation') or self.last_orientation != is_horizontal:
-            # Update custom function button layouts
-            self.update_function_button_layouts(is_horizontal)
-            
-            # Update default tab layouts based on orientation
-            if is_horizontal:
-                # Set all layouts to horizontal direction
-                self.modeling_layout.setDirection(QtWidgets.QBoxLayout.LeftToRight)
-                self.modeling_layout.setAlignment(QtCore.Qt.AlignCenter)
-                self.modeling_layout_01.setDirection(QtWidgets.QBoxLayout.LeftToRight)
-                self.animation_layout.setDirection(QtWidgets.QBoxLayout.LeftToRight)
-                self.graph_layout.setDirection(QtWidgets.QBoxLayout.LeftToRight)
-                
-                # Configure grid layouts for horizontal arrangement
-                self.modeling_layout_02.grid(1, 0)  
-                self.modeling_layout_03.grid(1, 0)  
-                self.modeling_layout_04.grid(1, 0)
-            else:
-                # Set layouts to vertical direction
-                self.modeling_layout.setDirection(QtWidgets.QBoxLayout.TopToBottom)
-                self.modeling_layout.setAlignment(QtCore.Qt.AlignCenter | QtCore.Qt.AlignTop)
-                self.modeling_layout_01.setDirection(QtWidgets.QBoxLayout.TopToBottom)
-                self.animation_layout.setDirection(QtWidgets.QBoxLayout.TopToBottom)
-                self.graph_layout.setDirection(QtWidgets.QBoxLayout.TopToBottom)
-                
-                # Configure grid layouts for vertical arrangement
-                self.modeling_layout_02.grid(0, 1)
-                self.modeling_layout_03.grid(0, 4)
-                self.modeling_layout_04.grid(0, 1)
-            
-            # Force layout update
-            self.modeling_widget.updateGeometry()
-            self.modeling_scroll_area.updateGeometry()
-            self.animation_widget.updateGeometry()
-            self.animation_scroll_area.updateGeometry()
-            self.graph_widget.updateGeometry()
-            self.graph_scroll_area.updateGeometry()
-            
-            # Store the new orientation
-            self.last_orientation = is_horizontal
+        # While dragging an edge, relayout once the size stays past the threshold, resizing back cancels it
+        if self.last_orientation == is_horizontal:
+            self._orientation_timer.stop()
+        elif self.resizing or self._system_resizing:
+            self._orientation_timer.start()
+        else:
+            self._orientation_timer.stop()
+            self._settle_orientation()
         
         # Check if we've crossed the height threshold (65 pixels) for additional layout adjustments
         # This is separate from the main orientation logic but still uses a threshold approach
@@ -1628,20 +1853,39 @@ class ToolBoxWindow(QtWidgets.QWidget):
             is_below_threshold = current_height < 65
             
             if was_below_threshold != is_below_threshold:
-                # We've crossed the threshold, update the layout
-                self.modeling_layout.horizontal_priority = is_below_threshold
-                self.animation_layout.horizontal_priority = is_below_threshold
-                self.graph_layout.horizontal_priority = is_below_threshold
-                # Force layout update
-                self.modeling_widget.updateGeometry()
-                self.modeling_scroll_area.updateGeometry()
-                self.animation_widget.updateGeometry()
-                self.animation_scroll_area.updateGeometry()
-                self.graph_widget.updateGeometry()
-                self.graph_scroll_area.updateGeometry()
+                # We've crossed the threshold, update the layouts of the built default pages
+                if "modeling_scroll_area" in self.custom_widgets:
+                    self.modeling_layout.horizontal_priority = is_below_threshold
+                    self.modeling_widget.updateGeometry()
+                    self.modeling_scroll_area.updateGeometry()
+                if "animation_scroll_area" in self.custom_widgets:
+                    self.animation_layout.horizontal_priority = is_below_threshold
+                    self.animation_widget.updateGeometry()
+                    self.animation_scroll_area.updateGeometry()
+                if "graph_scroll_area" in self.custom_widgets:
+                    self.graph_layout.horizontal_priority = is_below_threshold
+                    self.graph_widget.updateGeometry()
+                    self.graph_scroll_area.updateGeometry()
         
         # Store current height for next comparison
         self.last_height = current_height
+    
+    def _settle_orientation(self):
+        """Lay the pages out horizontally or vertically for the current window height"""
+        is_horizontal = self.height() < self.HEIGHT_THRESHOLD
+        
+        # Check if orientation has changed and update all layouts
+        if self.last_orientation == is_horizontal:
+            return
+        
+        # Update custom function button layouts
+        self.update_function_button_layouts(is_horizontal)
+        
+        # Update default tab layouts based on orientation
+        self._update_default_page_layouts(is_horizontal)
+        
+        # Store the new orientation
+        self.last_orientation = is_horizontal
             
     #----------------------------------------------------------------------------------
     def eventFilter(self, obj, event):
@@ -1704,17 +1948,27 @@ class ToolBoxWindow(QtWidgets.QWidget):
         if event_type == QtCore.QEvent.MouseButtonPress and event.button() == QtCore.Qt.LeftButton:
             # Start dragging the window when left-click and drag on util_button
             self.dragging = True
+            self._system_move_tried = False
             self.offset = event.globalPos() - self.pos()
             UT.maya_main_window().activateWindow()
             return True  
             
         elif event_type == QtCore.QEvent.MouseMove and event.buttons() == QtCore.Qt.LeftButton and self.dragging:
+            # Let the window manager move the window once the mouse moves, so a click still opens the menu
+            if not self._system_move_tried:
+                self._system_move_tried = True
+                if WD.start_system_move(self):
+                    self.dragging = False
+                    return True
+            
             # Handle dragging
-            self.move(event.globalPos() - self.offset)
+            self.geometry_throttle.move(event.globalPos() - self.offset)
             return True  # Consume the event
             
         elif event_type == QtCore.QEvent.MouseButtonRelease and event.button() == QtCore.Qt.LeftButton:
             # End dragging
+            if self.dragging:
+                self.geometry_throttle.flush()
             self.dragging = False
             return False  # Don't consume the event so the button still gets it
             
@@ -1737,16 +1991,23 @@ class ToolBoxWindow(QtWidgets.QWidget):
             old_resize_edge = self.resize_edge  # Store previous edge state
             self.resize_edge = self._get_resize_edge_from_frame_pos(frame_pos, frame_rect)
             
+            # Moving without a button pressed means a system resize has ended
+            self._system_resizing = False
+            
+            # The style and cursor only change when the mouse enters or leaves an edge
+            if self.resize_edge == old_resize_edge:
+                return True
+            
             # Update cursor based on edge, or reset it if we're not on an edge
             if self.resize_edge:
                 # Apply resize frame style
-                self.frame.setStyleSheet(self.resize_frame_style)
+                TH.apply_style(self.frame, self.resize_frame_style, "QFrame")
                 
                 # Set cursor based on the edge
                 self._update_cursor_for_edge(self.resize_edge)
             else:
                 # Reset to default frame style
-                self.frame.setStyleSheet(self.default_frame_style)
+                TH.apply_style(self.frame, self.default_frame_style, "QFrame")
                 
                 # Set default cursor for draggable area
                 self.setCursor(QtCore.Qt.ArrowCursor)
@@ -1774,7 +2035,7 @@ class ToolBoxWindow(QtWidgets.QWidget):
             return True  # Event handled
         elif self.dragging:
             # Handle dragging
-            self.move(event.globalPos() - self.offset)
+            self.geometry_throttle.move(event.globalPos() - self.offset)
             return True  # Event handled
         
         #UT.maya_main_window().activateWindow()
@@ -1796,12 +2057,21 @@ class ToolBoxWindow(QtWidgets.QWidget):
         self.resize_edge = self._get_resize_edge_from_frame_pos(frame_pos, frame_rect)
         
         if self.resize_edge:
+            # Let the window manager resize the window where the platform supports it
+            if WD.start_system_resize(self, self.resize_edge):
+                self._system_resizing = True
+                return True
+            
             # Start resizing
             self.resizing = True
             self.resize_start_pos = event.globalPos()
             self.initial_size = self.size()
             self.initial_pos = self.pos()
         else:
+            # Let the window manager move the window where the platform supports it
+            if WD.start_system_move(self):
+                return True
+            
             # Start dragging
             self.dragging = True
             self.offset = event.globalPos() - self.pos()
@@ -1837,14 +2107,21 @@ class ToolBoxWindow(QtWidgets.QWidget):
         
         # Restore cursor after operation
         if was_resizing:
+            # Apply the final size and its layouts without waiting for the timers
+            self._flush_resize()
+            
             # Reset to default frame style
-            self.frame.setStyleSheet(self.default_frame_style)
+            TH.apply_style(self.frame, self.default_frame_style, "QFrame")
             
-            # Reset cursor
+            # Reset cursor, the next hover sets them again for the edge under the mouse
             self._reset_cursor()
+            self.resize_edge = None
         elif was_dragging:
+            # Apply the final position
+            self.geometry_throttle.flush()
+            
             # Reset to default frame style
-            self.frame.setStyleSheet(self.default_frame_style)
+            TH.apply_style(self.frame, self.default_frame_style, "QFrame")
             
             # Set back to default cursor after dragging
             self.setCursor(QtCore.Qt.ArrowCursor)
@@ -1871,12 +2148,13 @@ class ToolBoxWindow(QtWidgets.QWidget):
         """
         if not self.resizing:
             # Reset to default frame style
-            self.frame.setStyleSheet(self.default_frame_style)
+            TH.apply_style(self.frame, self.default_frame_style, "QFrame")
             
             # Reset cursor
             self._reset_cursor()
             
             self.resize_edge = None
+            self._system_resizing = False
         #UT.maya_main_window().activateWindow()
         return True  # Event handled
         
@@ -1892,10 +2170,57 @@ class ToolBoxWindow(QtWidgets.QWidget):
         
         #UT.maya_main_window().activateWindow()
     
+    def restore_window_state(self):
+        """Restore the geometry, orientation, shown tab and scroll offsets saved by save_window_state
+        
+        Returns:
+            bool: True if the geometry was restored
+        """
+        state = WS.load_state() or {}
+        
+        # Without a saved state the pages start horizontal, like the default 300x70 window (see main.py)
+        self.last_orientation = state.get("horizontal", True)
+        self._initial_tab_id = state.get("tab_id", 0)
+        self._saved_scroll_offsets = state.get("scroll_offsets", {})
+        
+        self.window_state_restored = state.get("geometry") is not None
+        if self.window_state_restored:
+            self.setGeometry(state["geometry"])
+            self.last_height = self.height()
+        return self.window_state_restored
+    
+    def save_window_state(self):
+        """Save the geometry, orientation, shown tab and scroll offsets for the next session"""
+        # Pages that weren't built this session keep the offsets of the last one
+        scroll_offsets = {tab_id: offset for tab_id, offset in self._saved_scroll_offsets.items()
+                          if tab_id in self.tab_pages}
+        for tab_id, page in self.tab_pages.items():
+            if isinstance(page, QtWidgets.QAbstractScrollArea):
+                scroll_offsets[tab_id] = (page.horizontalScrollBar().value(), page.verticalScrollBar().value())
+        
+        WS.save_state(self.geometry(), self.last_orientation, self._get_current_tab_id(), scroll_offsets)
+    
+    def show_at_cursor(self):
+        """Show the window next to the mouse cursor, keeping its size and pages"""
+        cursor_position = QtGui.QCursor.pos()
+        self.move(cursor_position.x() - (self.width() + 50), cursor_position.y() - (self.height() // 2))
+        self.show()
+        self.raise_()
+    
     def closeEvent(self, event):
         """Override closeEvent to properly clean up Maya window reference"""
-        # Save the database before closing to ensure all changes are saved
-        self.toggle_db.save_database()
+        # Write any pending changes before closing to ensure all changes are saved
+        self.toggle_db.flush()
+        self.save_window_state()
+        
+        # Kept alive windows are only hidden, the scene callbacks keep the database in sync meanwhile
+        if self.keep_alive:
+            event.ignore()
+            self.hide()
+            return
+        
+        self.toggle_db.remove_scene_callbacks()
+        self.function_button_pool.clear()
         
         # Delete the window from Maya's window list if it exists
         window_name = self.objectName()
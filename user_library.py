@@ -0,0 +1,108 @@
+"""
+User-level tool box library stored in the Maya preferences directory.
+
+The library is a JSON file with the tabs and their inlined scripts:
+
+    {"tabs": [{"id": 3, ..., "buttons": [{"id": 0, "script": "...", ...}]}]}
+
+Shared library files written by "Store Data" can be used as the library as well.
+
+It is parsed once per session and kept in memory across scene changes. Every later load only
+stats the file, it is read again when its modification time or size changed and parsed again
+only when its content hash changed as well.
+"""
+import os
+import json
+import hashlib
+import maya.cmds as cmds
+
+from . import library_sync as LS
+
+LIBRARY_FILE_NAME = 'ftToolBoxLibrary.json'
+
+# path -> {"stat": (mtime_ns, size), "hash": sha1 of the file, "tabs": parsed tabs}
+_CACHE = {}
+
+# Number of times a library file was parsed, for benchmarks
+parse_count = 0
+
+
+def get_library_path():
+    """Get the path of the user library file in the Maya preferences directory"""
+    return os.path.join(cmds.internalVar(userPrefDir=True), LIBRARY_FILE_NAME)
+
+
+def _file_stat(path):
+    """Get the values used to detect a changed file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_library(path=None):
+    """Get the tabs of the user library
+
+    The returned tabs are shared with the cache and must not be modified, copy them first.
+
+    Args:
+        path (str, optional): Library file, defaults to get_library_path()
+
+    Returns:
+        list: The library tabs, empty if there is no library or it can't be read
+    """
+    global parse_count
+    path = path or get_library_path()
+    stat = _file_stat(path)
+    if stat is None:
+        _CACHE.pop(path, None)
+        return []
+
+    cached = _CACHE.get(path)
+    if cached and cached["stat"] == stat:
+        return cached["tabs"]
+
+    try:
+        with LS.FileLock(path, shared=True):
+            with open(path, 'rb') as f:
+                content = f.read()
+        content_hash = hashlib.sha1(content).hexdigest()
+
+        # The file was touched but its content is the same
+        if cached and cached["hash"] == content_hash:
+            cached["stat"] = stat
+            return cached["tabs"]
+
+        tabs = LS.parse_library(content.decode('utf-8'))
+        parse_count += 1
+    except Exception as e:
+        print(f"Error loading tool box library {path}: {e}")
+        tabs = []
+        content_hash = None
+
+    _CACHE[path] = {"stat": stat, "hash": content_hash, "tabs": tabs}
+    return tabs
+
+
+def save_library(tabs, path=None):
+    """Write tabs to the user library and update the cache
+
+    The file is written to a temporary file first and then renamed over the library while
+    holding its lock, so other sessions never read a partially written library.
+
+    Args:
+        tabs (list): Tabs with their scripts inlined, e.g. from ToggleButtonDatabase.export_tabs
+        path (str, optional): Library file, defaults to get_library_path()
+    """
+    path = path or get_library_path()
+    content = json.dumps({"tabs": tabs}, indent=4).encode('utf-8')
+    with LS.FileLock(path):
+        LS.atomic_write(path, content)
+    _CACHE[path] = {"stat": _file_stat(path), "hash": hashlib.sha1(content).hexdigest(),
+                    "tabs": json.loads(content.decode('utf-8'))["tabs"]}
+
+
+def clear_cache():
+    """Forget the parsed libraries so the next load reads them again"""
+    _CACHE.clear()
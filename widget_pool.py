@@ -0,0 +1,96 @@
+"""
+Bounded pool of detached widgets, reused instead of destroyed and built again.
+
+Building a widget like CustomFunctionButton means building its context menu, style sheet and
+timers. When a tab is rebuilt or another library is loaded, the widgets that are taken out are
+released to the pool, and the widgets that are added are taken from it and rebound to their
+new record. Only widgets beyond the pool's size limit are deleted.
+
+The pool only hides and detaches widgets, the caller rebinds them when it acquires them.
+"""
+
+# Default number of detached widgets kept for reuse
+DEFAULT_MAX_SIZE = 256
+
+
+class WidgetPool:
+    """Keeps up to max_size detached widgets for reuse
+
+    Args:
+        max_size (int): Maximum number of pooled widgets, widgets released to a full pool are deleted
+    """
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._widgets = []
+        self.hits = 0
+        self.misses = 0
+        self.released = 0
+        self.discarded = 0
+
+    def acquire(self):
+        """Take a widget from the pool
+
+        Returns:
+            QWidget: A hidden widget without a parent that has to be rebound, or None if the pool is empty
+        """
+        if not self._widgets:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._widgets.pop()
+
+    def release(self, widget):
+        """Hide and detach a widget and keep it for reuse, or delete it if the pool is full
+
+        Returns:
+            bool: True if the widget was pooled
+        """
+        widget.hide()
+        widget.setParent(None)
+        if len(self._widgets) >= self.max_size:
+            widget.deleteLater()
+            self.discarded += 1
+            return False
+        self._widgets.append(widget)
+        self.released += 1
+        return True
+
+    def __len__(self):
+        return len(self._widgets)
+
+    def set_max_size(self, max_size):
+        """Change the size limit, deleting pooled widgets that no longer fit"""
+        self.max_size = max_size
+        while len(self._widgets) > self.max_size:
+            self._widgets.pop(0).deleteLater()
+            self.discarded += 1
+
+    def clear(self):
+        """Delete every pooled widget, the statistics are kept"""
+        for widget in self._widgets:
+            widget.deleteLater()
+        self._widgets = []
+
+    def get_stats(self):
+        """Get the hit and miss counters and the current size, for profiling
+
+        Returns:
+            dict: hits, misses, hit_rate, released, discarded, pooled and max_size
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / float(lookups) if lookups else 0.0,
+            "released": self.released,
+            "discarded": self.discarded,
+            "pooled": len(self._widgets),
+            "max_size": self.max_size
+        }
+
+    def reset_stats(self):
+        """Reset the hit, miss, release and discard counters"""
+        self.hits = 0
+        self.misses = 0
+        self.released = 0
+        self.discarded = 0
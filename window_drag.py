@@ -0,0 +1,107 @@
+"""
+Moving and resizing the frameless windows.
+
+Where the platform supports it, the window manager moves and resizes the window
+(QWindow.startSystemMove and QWindow.startSystemResize, Qt 5.15 and later), so no Python
+runs while the mouse moves. Elsewhere the windows move and resize themselves, and a
+GeometryThrottle applies the latest requested geometry at most once per display frame.
+
+This module doesn't use Maya, so it can be used from benchmarks.
+"""
+try:
+    from PySide6 import QtCore
+except ImportError:
+    from PySide2 import QtCore
+
+# Set to False to always move and resize the windows from Python
+SYSTEM_MOVE_ENABLED = True
+
+# Default interval of a GeometryThrottle, one frame at 60 Hz
+FRAME_INTERVAL = 16
+
+# Resize edge names used by the windows, and the Qt edges they stand for
+EDGES = {
+    'top': QtCore.Qt.TopEdge,
+    'bottom': QtCore.Qt.BottomEdge,
+    'left': QtCore.Qt.LeftEdge,
+    'right': QtCore.Qt.RightEdge,
+    'top_left': QtCore.Qt.TopEdge | QtCore.Qt.LeftEdge,
+    'top_right': QtCore.Qt.TopEdge | QtCore.Qt.RightEdge,
+    'bottom_left': QtCore.Qt.BottomEdge | QtCore.Qt.LeftEdge,
+    'bottom_right': QtCore.Qt.BottomEdge | QtCore.Qt.RightEdge
+}
+
+
+def _window_handle(widget):
+    """Get the QWindow of a widget's window if it supports system moves, else None"""
+    if not SYSTEM_MOVE_ENABLED:
+        return None
+    handle = widget.window().windowHandle()
+    if handle is None or not hasattr(handle, "startSystemMove"):
+        return None
+    return handle
+
+
+def start_system_move(widget):
+    """Let the window manager move the widget's window until the mouse button is released
+
+    Call from a mouse press or move handler while the left button is down.
+
+    Returns:
+        bool: True if the window manager took over, False if the caller has to move the window
+    """
+    handle = _window_handle(widget)
+    return bool(handle is not None and handle.startSystemMove())
+
+
+def start_system_resize(widget, edge):
+    """Let the window manager resize the widget's window until the mouse button is released
+
+    Args:
+        widget (QWidget): A widget in the window
+        edge (str): Resize edge name, e.g. 'top' or 'bottom_left'
+
+    Returns:
+        bool: True if the window manager took over, False if the caller has to resize the window
+    """
+    handle = _window_handle(widget)
+    return bool(handle is not None and edge in EDGES and handle.startSystemResize(EDGES[edge]))
+
+
+class GeometryThrottle:
+    """Applies the latest geometry requested for a window at most once per interval
+
+    Args:
+        window (QWidget): The window to move and resize
+        interval (int): Milliseconds between geometry changes
+    """
+    def __init__(self, window, interval=FRAME_INTERVAL):
+        self.window = window
+        self._pending = None
+        self._timer = QtCore.QTimer(window)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+        # Number of geometry changes applied, for profiling
+        self.applied = 0
+
+    def move(self, pos):
+        """Request moving the window's top left corner to pos"""
+        self.set_geometry(QtCore.QRect(pos, self._pending.size() if self._pending else self.window.size()))
+
+    def set_geometry(self, rect):
+        """Request a new geometry, only the latest one is applied"""
+        self._pending = QtCore.QRect(rect)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """Apply the pending geometry right away, e.g. when the mouse button is released"""
+        self._timer.stop()
+        if self._pending is None:
+            return
+        rect = self._pending
+        self._pending = None
+        if rect != self.window.geometry():
+            self.window.setGeometry(rect)
+            self.applied += 1
@@ -0,0 +1,76 @@
+"""
+Tool box window state kept between sessions, in an ini file in the Maya preferences directory.
+
+The state is the window geometry, its orientation, the shown tab and the scroll offsets of the
+tab pages. The window reads it before it builds its pages, so they are built once in the saved
+orientation instead of being built in the default one and laid out again after the first resize.
+"""
+import os
+import json
+import maya.cmds as cmds
+try:
+    from PySide6 import QtCore, QtGui
+except ImportError:
+    from PySide2 import QtCore, QtGui
+
+SETTINGS_FILE_NAME = 'ftToolBoxWindow.ini'
+STATE_KEY = 'window/state'
+
+
+def get_settings_path():
+    """Get the path of the window settings file in the Maya preferences directory"""
+    return os.path.join(cmds.internalVar(userPrefDir=True), SETTINGS_FILE_NAME)
+
+
+def _settings():
+    return QtCore.QSettings(get_settings_path(), QtCore.QSettings.IniFormat)
+
+
+def load_state():
+    """Get the window state saved by save_state
+
+    Returns:
+        dict: geometry (QRect, None if it isn't on a screen anymore), horizontal (bool), tab_id (int)
+            and scroll_offsets ({tab id: (x, y)}), or None if no state was saved
+    """
+    raw = _settings().value(STATE_KEY)
+    if not raw:
+        return None
+    try:
+        data = json.loads(raw)
+        geometry = QtCore.QRect(*data["geometry"]) if data.get("geometry") else None
+        state = {
+            "geometry": geometry,
+            "horizontal": bool(data["horizontal"]),
+            "tab_id": int(data.get("tab_id") or 0),
+            "scroll_offsets": {int(tab_id): (int(offset[0]), int(offset[1]))
+                               for tab_id, offset in data.get("scroll_offsets", {}).items()}
+        }
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        print(f"Error reading the tool box window state: {e}")
+        return None
+
+    # Screens may have changed since the state was saved
+    if geometry is not None and QtGui.QGuiApplication.screenAt(geometry.center()) is None:
+        state["geometry"] = None
+    return state
+
+
+def save_state(geometry, horizontal, tab_id, scroll_offsets):
+    """Save the window state for the next session
+
+    Args:
+        geometry (QRect): Window geometry
+        horizontal (bool): The pages are laid out horizontally
+        tab_id (int): ID of the shown tab, or None
+        scroll_offsets (dict): tab id -> (x, y) scroll offset of its page
+    """
+    data = {
+        "geometry": [geometry.x(), geometry.y(), geometry.width(), geometry.height()],
+        "horizontal": horizontal,
+        "tab_id": tab_id,
+        "scroll_offsets": {str(tab_id): list(offset) for tab_id, offset in scroll_offsets.items()}
+    }
+    settings = _settings()
+    settings.setValue(STATE_KEY, json.dumps(data))
+    settings.sync()